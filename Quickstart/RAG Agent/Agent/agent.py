@@ -5,13 +5,20 @@ import logging
 import asyncio
 warnings.filterwarnings("ignore")
 logging.basicConfig(level = logging.INFO)
-from .tools.add_data import add_data
-from .tools.create_corpus import create_corpus
-from .tools.delete_corpus import delete_corpus
-from .tools.delete_document import delete_document
-from .tools.get_corpus_info import get_corpus_info
-from .tools.list_corpora import list_corpora
-from .tools.rag_query import rag_query
+from .tools.async_tools import (
+    add_data_async,
+    add_local_data_async,
+    cancel_ingest_job_async,
+    create_corpus_async,
+    delete_corpus_async,
+    delete_document_async,
+    delete_documents_async,
+    get_corpus_info_async,
+    get_ingest_status_async,
+    list_corposa_async,
+    rag_query_async,
+    rag_query_multi_async,
+)
 
 # *****Define constants and environment variables*****
 os.environ["GOOGLE_API_KEY"] = "YOUR_GOOGLE_API_KEY"  # Replace with your actual Google API key
@@ -41,23 +48,25 @@ root_agent = Agent(
     4. **Add New Data**: You can add new documents (Google Drive URLs, etc.) to existing corpora.
     5. **Get Corpus Info**: You can provide detailed information about a specific corpus, including file metadata and statistics.
     6. **Delete Document**: You can delete a specific document from a corpus when it's no longer needed.
-    7. **Delete Corpus**: You can delete an entire corpus and all its associated files when it's no longer needed.
+    7. **Delete Many Documents**: You can delete many documents at once, by id or by age or source, when cleaning up a corpus.
+    8. **Delete Corpus**: You can delete an entire corpus and all its associated files when it's no longer needed.
+    9. **Add Local Files**: You can build a local corpus from local text files and query it without Vertex AI.
     
     ## How to Approach User Requests
     
     When a user asks a question:
     1. First, determine if they want to manage corpora (list/create/add data/get info/delete) or query existing information.
-    2. If they're asking a knowledge question, use the `rag_query` tool to search the corpus.
+    2. If they're asking a knowledge question, use the `rag_query` tool to search the corpus. If the answer may be spread across several corpora, use `rag_query_multi` to search them all in one call.
     3. If they're asking about available corpora, use the `list_corpora` tool.
     4. If they want to create a new corpus, use the `create_corpus` tool.
-    5. If they want to add data, ensure you know which corpus to add to, then use the `add_data` tool.
+    5. If they want to add data, ensure you know which corpus to add to, then use the `add_data` tool. The import runs in the background; use `get_ingest_status` to check on it and `cancel_ingest_job` to stop it. For local files on this machine (not Drive or GCS), use `add_local_data` instead.
     6. If they want information about a specific corpus, use the `get_corpus_info` tool.
-    7. If they want to delete a specific document, use the `delete_document` tool with confirmation.
+    7. If they want to delete a specific document, use the `delete_document` tool with confirmation. To delete more than one document, use `delete_documents` instead of calling `delete_document` repeatedly.
     8. If they want to delete an entire corpus, use the `delete_corpus` tool with confirmation.
     
     ## Using Tools
     
-    You have seven specialized tools at your disposal:
+    You have twelve specialized tools at your disposal:
     
     1. `rag_query`: Query a corpus to answer questions
        - Parameters:
@@ -75,10 +84,13 @@ root_agent = Agent(
        - Parameters:
          - corpus_name: The name of the corpus to add data to (required, but can be empty to use current corpus)
          - paths: List of Google Drive or GCS URLs
+       - Returns a job_id right away; the import itself runs in the background
     
     5. `get_corpus_info`: Get detailed information about a specific corpus
        - Parameters:
          - corpus_name: The name of the corpus to get information about
+         - refresh: Optional, defaults to False. Set to True to list the corpus again instead of using cached statistics (use it if recently added files are reported as not listed yet)
+       - Returns file statistics and the most recent files, not a full file listing
          
     6. `delete_document`: Delete a specific document from a corpus
        - Parameters:
@@ -90,6 +102,33 @@ root_agent = Agent(
        - Parameters:
          - corpus_name: The name of the corpus to delete
          - confirm: Boolean flag that must be set to True to confirm deletion
+
+    8. `rag_query_multi`: Query several corpora at once and get one merged list of the best results
+       - Parameters:
+         - corpus_names: The names of the corpora to query
+         - query: The text question to ask
+
+    9. `get_ingest_status`: Check the progress of background imports started by add_data and background deletes started by delete_documents
+       - Parameters:
+         - job_id: The job id returned by add_data (can be empty to report every import of this session)
+
+    10. `cancel_ingest_job`: Stop a background import or delete started by add_data or delete_documents
+       - Parameters:
+         - job_id: The job id returned by add_data
+
+    11. `delete_documents`: Delete many documents from a corpus in one call
+       - Parameters:
+         - corpus_name: The name of the corpus containing the documents
+         - document_ids: The IDs of the documents to delete (can be empty when a filter is given)
+         - older_than: Only delete documents created before this date, e.g. 2024-01-31 (can be empty)
+         - source_prefix: Only delete documents imported from sources starting with this prefix, e.g. gs://bucket/archive/ (can be empty)
+         - confirm: Set to False first to see how many documents match, then True to delete them
+       - Large deletes run in the background and return a job_id; follow them with `get_ingest_status`
+
+    12. `add_local_data`: Add local text files to a local corpus that `rag_query` then answers from
+       - Parameters:
+         - corpus_name: The name of the local corpus (created on first use; can be empty to use current corpus)
+         - paths: List of local file paths
     
     ## INTERNAL: Technical Implementation Details
     
@@ -107,7 +146,7 @@ root_agent = Agent(
     - Be clear and concise in your responses.
     - If querying a corpus, explain which corpus you're using to answer the question.
     - If managing corpora, explain what actions you've taken.
-    - When new data is added, confirm what was added and to which corpus.
+    - When new data is added, confirm what is being added and to which corpus, and that it is importing in the background.
     - When corpus information is displayed, organize it clearly for the user.
     - When deleting a document or corpus, always ask for confirmation before proceeding.
     - If an error occurs, explain what went wrong and suggest next steps.
@@ -116,5 +155,5 @@ root_agent = Agent(
     Remember, your primary goal is to help users access and manage information through RAG capabilities.
     
     """,
-    tools  = [ rag_query, list_corpora, create_corpora, add_data, get_corpus_info, delete_corpus, delete_document],
+    tools  = [ rag_query_async, rag_query_multi_async, list_corposa_async, create_corpus_async, add_data_async, add_local_data_async, get_corpus_info_async, delete_corpus_async, delete_document_async, delete_documents_async, get_ingest_status_async, cancel_ingest_job_async],
 )
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+Check that the async RAG tools keep concurrent sessions moving during a slow import.
+
+Two sessions share one event loop, as they do inside the ADK Runner. Session A
+adds data to a corpus and polls get_ingest_status until the import is done,
+against a FakeRag whose import_files takes `--import-latency` seconds. Once
+the import is in flight, session B lists the corpora, and list_corpora takes
+`--list-latency` seconds. With the async tools, B's list_corposa must finish
+while A's import is still running, and the event loop must never stall for
+long (a heartbeat task measures the longest gap between its ticks).
+
+For contrast, the same two sessions are run with the sync tools called
+straight from the coroutines: B's slow list_corposa then blocks the event
+loop, so A's polling and the heartbeat stop for the whole listing. Both runs
+poll with asyncio.sleep, so any stall comes from the tools themselves.
+
+Exits with status 1 if the async run does not meet these conditions.
+
+Usage:
+    python "Quickstart/RAG Agent/benchmarks/bench_async_tools.py"
+    python "Quickstart/RAG Agent/benchmarks/bench_async_tools.py" --import-latency 2 --list-latency 0.5 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+from fake_rag import FakeRag  # noqa: E402
+from run_benchmarks import load_tools, new_context  # noqa: E402
+
+POLL_SECONDS = 0.01
+HEARTBEAT_SECONDS = 0.005
+
+
+async def heartbeat(stop: asyncio.Event, gaps: list) -> None:
+    """Tick every HEARTBEAT_SECONDS and record the longest time between ticks."""
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+async def run_sessions(fake: FakeRag, corpus_name: str, add_data, get_ingest_status, list_corposa, use_async: bool) -> dict:
+    timeline = {}
+    import_started = asyncio.Event()
+
+    async def call(func, *args):
+        result = func(*args)
+        return await result if use_async else result
+
+    async def session_a():
+        context = new_context()
+        # New paths on every run, so the ingest index does not skip them as unchanged
+        paths = [f"gs://bench-bucket/async/{'async' if use_async else 'sync'}/{index}.pdf" for index in range(5)]
+        submitted = await call(add_data, corpus_name, paths, context)
+        timeline["a_submitted"] = time.perf_counter()
+        while True:
+            if fake.in_flight:
+                import_started.set()
+            status = await call(get_ingest_status, submitted["job_id"], context)
+            job = status["jobs"][0]
+            if job["state"] in ("succeeded", "failed", "cancelled"):
+                break
+            await asyncio.sleep(POLL_SECONDS)
+        timeline["a_finished"] = time.perf_counter()
+        timeline["a_state"] = job["state"]
+        import_started.set()
+
+    async def session_b():
+        await import_started.wait()
+        timeline["b_started"] = time.perf_counter()
+        page = await call(list_corposa)
+        timeline["b_finished"] = time.perf_counter()
+        timeline["b_status"] = page["status"]
+
+    stop = asyncio.Event()
+    gaps: list = []
+    ticker = asyncio.create_task(heartbeat(stop, gaps))
+    start = time.perf_counter()
+    await asyncio.gather(session_a(), session_b())
+    stop.set()
+    await ticker
+    return {
+        "import_state": timeline["a_state"],
+        "list_status": timeline["b_status"],
+        "import_seconds": round(timeline["a_finished"] - start, 3),
+        "list_finished_at_seconds": round(timeline["b_finished"] - start, 3),
+        "list_finished_during_import": timeline["b_finished"] < timeline["a_finished"],
+        "max_event_loop_gap_ms": round(max(gaps, default=0.0) * 1000, 1),
+    }
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Check that the async RAG tools do not block concurrent sessions.")
+    parser.add_argument("--import-latency", type=float, default=1.0,
+                        help="Seconds each fake import_files call takes (default: 1.0)")
+    parser.add_argument("--list-latency", type=float, default=0.3,
+                        help="Seconds each fake list_corpora page takes (default: 0.3)")
+    parser.add_argument("--latency", type=float, default=0.005,
+                        help="Seconds every other remote call takes (default: 0.005)")
+    args = parser.parse_args(argv)
+
+    fake = FakeRag(
+        latency=args.latency,
+        latencies={"import_files": args.import_latency, "list_corpora": args.list_latency},
+        corpus_count=3,
+    )
+    tools = load_tools(fake)
+    from rag_agent.tools import async_tools
+    from rag_agent.tools.ingest_jobs import get_ingest_status
+
+    corpus_name = fake.display_names()[0]
+    results = {
+        "async": asyncio.run(run_sessions(
+            fake, corpus_name, async_tools.add_data_async, async_tools.get_ingest_status_async,
+            async_tools.list_corposa_async, use_async=True,
+        )),
+        "sync": asyncio.run(run_sessions(
+            fake, corpus_name, tools.add_data, get_ingest_status, tools.list_corposa, use_async=False,
+        )),
+    }
+    print(json.dumps(results, indent=2))
+
+    async_run = results["async"]
+    problems = []
+    if async_run["import_state"] != "succeeded" or async_run["list_status"] != "Success":
+        problems.append("the import or the listing did not succeed")
+    if not async_run["list_finished_during_import"]:
+        problems.append("list_corposa did not finish while the import was running")
+    if async_run["max_event_loop_gap_ms"] > args.list_latency * 1000 / 4:
+        problems.append("the event loop stalled for a large part of the listing")
+    if problems:
+        print("FAILED: " + "; ".join(problems))
+        sys.exit(1)
+    print("OK: session B listed corpora while session A's import was in flight")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+In-process stand-in for vertexai.rag used by the offline benchmarks.
+
+FakeRag implements the parts of the vertexai.rag API the tools call, with a
+configurable latency per call, a configurable number of pre-existing corpora,
+random failure injection and deliberate throttling: with max_concurrency set,
+a call that would exceed that many concurrent calls is rejected with a 429,
+like a Vertex AI quota. Every call that would be a network round trip
+in the real SDK (including each page fetched by a list_corpora pager and each
+source fingerprint lookup or listing page) is counted, so a benchmark can
+report how many remote calls an operation made.
+"""
+
+import random
+import sys
+import threading
+import time
+import types
+from collections import Counter
+from types import SimpleNamespace
+from typing import Dict, Iterable, Optional
+
+RESOURCE_PREFIX = "projects/bench-project/locations/us-central1/ragCorpora"
+
+
+class InjectedFailure(Exception):
+    """
+    Raised by FakeRag when failure injection or throttling triggers on a call.
+
+    `code` is the HTTP status, as on google.api_core exceptions: 503 for
+    injected failures and 429 for throttled calls.
+    """
+
+    def __init__(self, message: str, code: int = 503):
+        super().__init__(message)
+        self.code = code
+
+
+class FakePager:
+    """
+    Mimics the SDK's ListRagCorporaPager: iterating it yields every corpus and
+    fetches the following pages lazily, and `.pages` yields one page at a time.
+    """
+
+    def __init__(self, fake: "FakeRag", page_size: Optional[int], page_token: Optional[str]):
+        self._fake = fake
+        self._page_size = page_size or fake.default_page_size
+        self._first_token = page_token
+
+    @property
+    def pages(self):
+        token = self._first_token
+        while True:
+            page = self._fake._fetch_corpora_page(self._page_size, token)
+            yield page
+            token = page.next_page_token
+            if not token:
+                return
+
+    def __iter__(self):
+        for page in self.pages:
+            yield from page.rag_corpora
+
+
+def _config_class(name: str):
+    """Build a stand-in for one of the SDK's config types that just stores its kwargs."""
+    return type(name, (SimpleNamespace,), {})
+
+
+class FakeRag(types.ModuleType):
+    """
+    Fake vertexai.rag module.
+
+    Args:
+        latency (float): Seconds every remote call sleeps for
+        latencies (Dict[str, float], optional): Per-method overrides of latency
+        corpus_count (int): Number of corpora that exist before the benchmark starts
+        failure_rate (float): Probability that a remote call raises InjectedFailure
+        fail_methods (Iterable[str], optional): Only inject failures into these methods
+        default_page_size (int): Page size used by list_corpora when none is given
+        max_concurrency (int, optional): Reject calls beyond this many in flight with a 429
+        seed (int): Seed for failure injection, so runs are repeatable
+    """
+
+    TransformationConfig = _config_class("TransformationConfig")
+    ChunkingConfig = _config_class("ChunkingConfig")
+    RagEmbeddingModelConfig = _config_class("RagEmbeddingModelConfig")
+    VertexPredictionEndpoint = _config_class("VertexPredictionEndpoint")
+    RagVectorDbConfig = _config_class("RagVectorDbConfig")
+    RagResource = _config_class("RagResource")
+    RagRetrievalConfig = _config_class("RagRetrievalConfig")
+    Filter = _config_class("Filter")
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        latencies: Optional[Dict[str, float]] = None,
+        corpus_count: int = 0,
+        failure_rate: float = 0.0,
+        fail_methods: Optional[Iterable[str]] = None,
+        default_page_size: int = 100,
+        max_concurrency: Optional[int] = None,
+        seed: int = 0,
+    ):
+        super().__init__("vertexai.rag")
+        self.latency = latency
+        self.latencies = dict(latencies or {})
+        self.failure_rate = failure_rate
+        self.fail_methods = set(fail_methods) if fail_methods else None
+        self.default_page_size = default_page_size
+        self.max_concurrency = max_concurrency
+        self.calls: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._corpora: Dict[str, SimpleNamespace] = {}
+        self._files: Dict[str, Dict[str, SimpleNamespace]] = {}
+        self._next_id = 0
+        self.reset(corpus_count)
+
+    # Bookkeeping
+
+    def _remote_call(self, method: str) -> None:
+        """Count one round trip, throttle it or sleep for its latency, and maybe inject a failure."""
+        with self._lock:
+            self.calls[method] += 1
+            if self.max_concurrency is not None and self.in_flight >= self.max_concurrency:
+                self.throttled[method] += 1
+                raise InjectedFailure(f"Quota exceeded for {method}", code=429)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            fail = (
+                self.failure_rate > 0
+                and (self.fail_methods is None or method in self.fail_methods)
+                and self._random.random() < self.failure_rate
+            )
+        try:
+            delay = self.latencies.get(method, self.latency)
+            if delay:
+                time.sleep(delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        if fail:
+            raise InjectedFailure(f"Injected failure in {method}")
+
+    def _add_corpus(self, display_name: str) -> SimpleNamespace:
+        with self._lock:
+            self._next_id += 1
+            corpus = SimpleNamespace(
+                name=f"{RESOURCE_PREFIX}/{self._next_id}",
+                display_name=display_name,
+                create_time="2024-01-01T00:00:00Z",
+                update_time="2024-01-01T00:00:00Z",
+            )
+            self._corpora[corpus.name] = corpus
+            self._files[corpus.name] = {}
+        return corpus
+
+    def reset(self, corpus_count: int) -> None:
+        """
+        Replace all corpora with `corpus_count` empty ones and clear the call counts.
+
+        Resource ids keep increasing across resets, so state the tools keyed by
+        resource name in an earlier scenario never matches a new corpus.
+        """
+        with self._lock:
+            self._corpora = {}
+            self._files = {}
+            self.calls.clear()
+            self.throttled.clear()
+        for index in range(corpus_count):
+            self._add_corpus(f"bench_corpus_{index}")
+
+    def reset_calls(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.throttled.clear()
+            self.peak_in_flight = self.in_flight
+
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def corpus_names(self):
+        return list(self._corpora)
+
+    def display_names(self):
+        return [corpus.display_name for corpus in self._corpora.values()]
+
+    # vertexai.rag API
+
+    def list_corpora(self, page_size: Optional[int] = None, page_token: Optional[str] = None) -> FakePager:
+        return FakePager(self, page_size, page_token)
+
+    def _fetch_corpora_page(self, page_size: int, page_token: Optional[str]) -> SimpleNamespace:
+        self._remote_call("list_corpora")
+        start = int(page_token) if page_token else 0
+        corpora = list(self._corpora.values())[start:start + page_size]
+        end = start + len(corpora)
+        return SimpleNamespace(
+            rag_corpora=corpora,
+            next_page_token=str(end) if end < len(self._corpora) else "",
+        )
+
+    def create_corpus(self, display_name: str, backend_config=None, **kwargs) -> SimpleNamespace:
+        self._remote_call("create_corpus")
+        return self._add_corpus(display_name)
+
+    def delete_corpus(self, name: str) -> None:
+        self._remote_call("delete_corpus")
+        with self._lock:
+            if name not in self._corpora:
+                raise KeyError(f"Corpus {name} not found")
+            del self._corpora[name]
+            self._files.pop(name, None)
+
+    def import_files(self, corpus_name: str, paths, **kwargs) -> SimpleNamespace:
+        self._remote_call("import_files")
+        with self._lock:
+            files = self._files.setdefault(corpus_name, {})
+            for path in paths:
+                file_id = str(len(files) + 1)
+                files[file_id] = SimpleNamespace(
+                    name=f"{corpus_name}/ragFiles/{file_id}",
+                    display_name=path.rstrip("/").split("/")[-1],
+                    source_uri=path,
+                    create_time="2024-01-01T00:00:00Z",
+                    update_time="2024-01-01T00:00:00Z",
+                )
+        return SimpleNamespace(
+            imported_rag_files_count=len(paths),
+            failed_rag_files_count=0,
+            skipped_rag_files_count=0,
+        )
+
+    def list_files(self, corpus_name: str, page_size: Optional[int] = None, page_token: Optional[str] = None):
+        self._remote_call("list_files")
+        return list(self._files.get(corpus_name, {}).values())
+
+    def get_file(self, name: str) -> SimpleNamespace:
+        self._remote_call("get_file")
+        corpus_name, _, file_id = name.partition("/ragFiles/")
+        rag_file = self._files.get(corpus_name, {}).get(file_id)
+        if rag_file is None:
+            raise InjectedFailure(f"RagFile {name} not found", code=404)
+        return rag_file
+
+    def delete_file(self, name: str) -> None:
+        self._remote_call("delete_file")
+        corpus_name, _, file_id = name.partition("/ragFiles/")
+        with self._lock:
+            self._files.get(corpus_name, {}).pop(file_id, None)
+
+    def retrieval_query(self, rag_resources, text: str, rag_retrieval_config=None) -> SimpleNamespace:
+        self._remote_call("retrieval_query")
+        return SimpleNamespace(contexts=SimpleNamespace(contexts=[]))
+
+    # Source fingerprints (GCS/Drive metadata lookups made by the ingest index)
+
+    def fingerprint(self, uri: str) -> Optional[str]:
+        try:
+            self._remote_call("fingerprint")
+        except InjectedFailure:
+            return None
+        return f"bench:{uri}"
+
+    def list_fingerprints(self, bucket: str, prefix: str, names) -> Dict[str, str]:
+        """Fingerprint objects under one prefix like a GCS objects.list: one call per 1000 objects."""
+        found = {}
+        for start in range(0, len(names), 1000):
+            try:
+                self._remote_call("list_fingerprints")
+            except InjectedFailure:
+                break
+            found.update((name, f"bench:gs://{bucket}/{name}") for name in names[start:start + 1000])
+        return found
+
+    # Source text downloads (made by the lexical index)
+
+    def fetch_text(self, uri: str) -> Optional[str]:
+        if not uri.endswith((".txt", ".md")):
+            return None
+        try:
+            self._remote_call("fetch_text")
+        except InjectedFailure:
+            return None
+        return f"Document {uri.rsplit('/', 1)[-1]} mentions ticket TICKET-{abs(hash(uri)) % 100000}."
+
+
+def install(fake: FakeRag) -> FakeRag:
+    """Register the fake as vertexai / vertexai.rag so `from vertexai import rag` returns it."""
+    vertexai = types.ModuleType("vertexai")
+    vertexai.rag = fake
+    vertexai.init = lambda **kwargs: None
+    sys.modules["vertexai"] = vertexai
+    sys.modules["vertexai.rag"] = fake
+    return fake
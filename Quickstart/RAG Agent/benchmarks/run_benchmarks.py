@@ -0,0 +1,310 @@
+"""
+Offline benchmarks for the RAG tools.
+
+Runs create_corpus, list_corposa, corpus name resolution and add_data against
+the in-process FakeRag backend at several corpus counts and path counts, and
+reports wall time and the number of remote calls each operation made. A burst
+of concurrent rag_query calls against a fake that throttles above a fixed
+concurrency shows how the Vertex client layer backs off and adapts its limit.
+No Google Cloud credentials or network access are needed.
+
+Usage:
+    python "Quickstart/RAG Agent/benchmarks/run_benchmarks.py" \\
+        --corpora 10,1000,10000 --paths 1,1000,100000 --latency 0.002 \\
+        --output results.json
+
+Compare two runs by diffing the "results" lists of their JSON files; each
+entry is keyed by operation, corpora and paths.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, List
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+RAG_AGENT_DIR = os.path.dirname(BENCHMARK_DIR)
+PACKAGE_NAME = "rag_agent"
+
+sys.path.insert(0, BENCHMARK_DIR)
+from fake_rag import FakeRag, install  # noqa: E402
+
+
+def load_tools(fake: FakeRag) -> SimpleNamespace:
+    """Import the RAG tools with the fake installed as vertexai.rag."""
+    install(fake)
+    # Keep the ingest index out of the real .rag_state directory
+    os.environ["RAG_INGEST_INDEX_PATH"] = ":memory:"
+    os.environ["RAG_LEXICAL_INDEX_DIR"] = tempfile.mkdtemp(prefix="rag-bench-lexical-")
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [RAG_AGENT_DIR]
+    sys.modules[PACKAGE_NAME] = package
+
+    from rag_agent.tools import (
+        add_data,
+        create_corpus,
+        ingest_index,
+        ingest_jobs,
+        lexical_index,
+        list_corpora,
+        rag_query,
+        utils,
+        vertex_client,
+    )
+    from rag_agent.tools.registry import corpus_registry
+
+    # The fake backend embeds nothing, so do not let the embedding quota throttle imports
+    vertex_client.embedding_budget.resize(10**9)
+    ingest_index.ingest_index.fingerprinter = fake.fingerprint
+    ingest_index.ingest_index.list_fingerprinter = fake.list_fingerprints
+    lexical_index.lexical_indexes.fetcher = fake.fetch_text
+
+    return SimpleNamespace(
+        add_data=add_data.add_data,
+        create_corpus=create_corpus.create_corpus,
+        list_corposa=list_corpora.list_corposa,
+        get_corpus_resource_name=utils.get_corpus_resource_name,
+        check_corpus_exists=utils.check_corpus_exists,
+        rag_query=rag_query.rag_query,
+        vertex_client=vertex_client.vertex_client,
+        corpus_registry=corpus_registry,
+        ingest_jobs=ingest_jobs.ingest_jobs,
+    )
+
+
+def new_context() -> SimpleNamespace:
+    """A minimal stand-in for ToolContext: the tools only use state and invocation_id."""
+    return SimpleNamespace(state={}, invocation_id="benchmark")
+
+
+def measure(fake: FakeRag, operation: str, corpora: int, paths: int, func: Callable, repeat: int = 1) -> dict:
+    """
+    Run func `repeat` times and report wall time and remote calls per run.
+
+    func may return a status dict; its "status" is recorded for the last run.
+    """
+    fake.reset_calls()
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    calls = dict(fake.calls)
+    entry = {
+        "operation": operation,
+        "corpora": corpora,
+        "paths": paths,
+        "repeat": repeat,
+        "mean_seconds": round(sum(timings) / len(timings), 6),
+        "min_seconds": round(min(timings), 6),
+        "max_seconds": round(max(timings), 6),
+        "remote_calls": round(sum(calls.values()) / repeat, 3),
+        "remote_calls_by_method": {method: round(count / repeat, 3) for method, count in sorted(calls.items())},
+    }
+    if isinstance(result, dict) and "status" in result:
+        entry["status"] = str(result["status"]).lower()
+    return entry
+
+
+def bench_corpus_operations(fake: FakeRag, tools: SimpleNamespace, corpus_count: int, repeat: int) -> List[dict]:
+    """create_corpus, list_corposa and name resolution with `corpus_count` existing corpora."""
+    fake.reset(corpus_count)
+    tools.corpus_registry.invalidate()
+    display_names = fake.display_names()
+    target = display_names[-1] if display_names else "bench_missing"
+    results = []
+
+    results.append(measure(
+        fake, "resolve_cold", corpus_count, 0,
+        lambda: (tools.corpus_registry.invalidate(), tools.get_corpus_resource_name(target))[1],
+    ))
+    results.append(measure(
+        fake, "resolve_warm", corpus_count, 0,
+        lambda: tools.get_corpus_resource_name(target), repeat=max(repeat, 100),
+    ))
+    results.append(measure(
+        fake, "check_corpus_exists_hit", corpus_count, 0,
+        lambda: tools.check_corpus_exists(target, new_context()), repeat=max(repeat, 100),
+    ))
+    missing_names = iter(f"bench_missing_{index}" for index in range(10**9))
+    results.append(measure(
+        fake, "check_corpus_exists_miss", corpus_count, 0,
+        lambda: tools.check_corpus_exists(next(missing_names), new_context()), repeat=repeat,
+    ))
+    results.append(measure(
+        fake, "list_corposa_first_page", corpus_count, 0,
+        lambda: tools.list_corposa(), repeat=repeat,
+    ))
+
+    def list_all():
+        page_token = ""
+        while True:
+            page = tools.list_corposa(page_token=page_token)
+            page_token = page["next_page_token"]
+            if not page_token or page["status"] != "Success":
+                return page
+
+    results.append(measure(fake, "list_corposa_all_pages", corpus_count, 0, list_all))
+
+    new_names = iter(f"bench_new_{index}" for index in range(10**9))
+    results.append(measure(
+        fake, "create_corpus", corpus_count, 0,
+        lambda: tools.create_corpus(next(new_names), new_context()), repeat=repeat,
+    ))
+    return results
+
+
+def bench_add_data(fake: FakeRag, tools: SimpleNamespace, corpus_count: int, path_count: int) -> List[dict]:
+    """add_data of `path_count` GCS paths, first as a fresh import and then as an unchanged re-ingest."""
+    fake.reset(max(corpus_count, 1))
+    tools.corpus_registry.invalidate()
+    corpus_name = fake.display_names()[0]
+    paths = [f"gs://bench-bucket/docs/{path_count}/{index}.pdf" for index in range(path_count)]
+
+    def run_job():
+        tool_context = new_context()
+        submitted = tools.add_data(corpus_name, paths, tool_context)
+        if submitted.get("status") != "success":
+            return submitted
+        job = tools.ingest_jobs.get(submitted["job_id"])
+        while not job.finished:
+            time.sleep(0.001)
+        return job.result or {"status": job.state}
+
+    return [
+        measure(fake, "add_data", corpus_count, path_count, run_job),
+        measure(fake, "add_data_unchanged", corpus_count, path_count, run_job),
+    ]
+
+
+def bench_throttled_burst(
+    fake: FakeRag, tools: SimpleNamespace, burst: int, max_concurrency: int, latency: float
+) -> List[dict]:
+    """
+    `burst` concurrent rag_query calls against a backend that returns 429 above `max_concurrency` calls in flight.
+
+    Each retrieval_query takes `latency` seconds, whatever --latency is, so that
+    the calls overlap and actually exceed the fake's concurrency. Reports how
+    many calls were throttled and retried, how many queries still failed, and
+    the concurrency limit the client layer settled on.
+    """
+    fake.reset(1)
+    tools.corpus_registry.invalidate()
+    corpus_name = fake.display_names()[0]
+    tools.get_corpus_resource_name(corpus_name)
+    client = tools.vertex_client
+    queries = iter(f"burst question {index}" for index in range(10**9))
+    outcome = {}
+
+    def run_burst():
+        before = client.stats()
+        fake.max_concurrency = max_concurrency
+        previous_latency = fake.latencies.get("retrieval_query")
+        fake.latencies["retrieval_query"] = latency
+        try:
+            with ThreadPoolExecutor(max_workers=burst) as pool:
+                results = list(pool.map(
+                    lambda query: tools.rag_query(corpus_name, query, new_context()),
+                    [next(queries) for _ in range(burst)],
+                ))
+        finally:
+            fake.max_concurrency = None
+            if previous_latency is None:
+                fake.latencies.pop("retrieval_query", None)
+            else:
+                fake.latencies["retrieval_query"] = previous_latency
+        after = client.stats()
+        outcome.update(
+            failed_queries=sum(result.get("status") == "Error" for result in results),
+            throttled=after["throttled"] - before["throttled"],
+            retries=after["retries"] - before["retries"],
+            concurrency_limit=after["concurrency_limit"],
+            peak_in_flight=fake.peak_in_flight,
+        )
+
+    entry = measure(fake, "rag_query_throttled_burst", 1, 0, run_burst)
+    entry.update(burst=burst, max_concurrency=max_concurrency, retrieval_latency=latency, **outcome)
+    return [entry]
+
+
+def parse_counts(value: str) -> List[int]:
+    return [int(count) for count in value.split(",") if count.strip()]
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark the RAG tools against a fake Vertex AI RAG backend.")
+    parser.add_argument("--corpora", type=parse_counts, default=[10, 1000, 10000],
+                        help="Comma-separated corpus counts (default: 10,1000,10000)")
+    parser.add_argument("--paths", type=parse_counts, default=[1, 1000, 100000],
+                        help="Comma-separated add_data path counts (default: 1,1000,100000)")
+    parser.add_argument("--add-data-corpora", type=int, default=10,
+                        help="Number of existing corpora during the add_data runs (default: 10)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds every remote call takes (default: 0)")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Probability that a remote call fails (default: 0)")
+    parser.add_argument("--fail-methods", default="",
+                        help="Comma-separated methods to inject failures into (default: all)")
+    parser.add_argument("--burst", type=int, default=64,
+                        help="Concurrent rag_query calls in the throttling run, 0 to skip it (default: 64)")
+    parser.add_argument("--throttle-concurrency", type=int, default=4,
+                        help="Calls in flight above which the fake answers 429 in the throttling run (default: 4)")
+    parser.add_argument("--burst-latency", type=float, default=0.02,
+                        help="Seconds each retrieval_query takes in the throttling run, so calls overlap (default: 0.02)")
+    parser.add_argument("--page-size", type=int, default=100,
+                        help="Server page size of the fake list_corpora (default: 100)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Runs per read-only operation (default: 5)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(BENCHMARK_DIR, "results.json"),
+                        help="Where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    fake = FakeRag(
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        fail_methods=[method for method in args.fail_methods.split(",") if method] or None,
+        default_page_size=args.page_size,
+        seed=args.seed,
+    )
+    tools = load_tools(fake)
+
+    results = []
+    for corpus_count in args.corpora:
+        results.extend(bench_corpus_operations(fake, tools, corpus_count, args.repeat))
+    for path_count in args.paths:
+        results.extend(bench_add_data(fake, tools, args.add_data_corpora, path_count))
+    if args.burst:
+        results.extend(bench_throttled_burst(fake, tools, args.burst, args.throttle_concurrency, args.burst_latency))
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'operation':<26} {'corpora':>8} {'paths':>8} {'mean s':>10} {'remote calls':>13}")
+    for entry in results:
+        print(
+            f"{entry['operation']:<26} {entry['corpora']:>8} {entry['paths']:>8} "
+            f"{entry['mean_seconds']:>10.4f} {entry['remote_calls']:>13}"
+        )
+    print(f"\nResults written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -12,3 +12,82 @@ DEFAULT_THRESHOLD_DISTANCE = 0.5
 DEFAULT_EMBEDDING_MODEL = "publishers/google/models/text-embedding-005"
 DEFAULT_EMBEDDING_REQUEST_PER_MIN = 1000
 
+CORPUS_REGISTRY_TTL_SECONDS = 300
+CORPUS_REGISTRY_NEGATIVE_TTL_SECONDS = 30
+
+DEFAULT_LIST_PAGE_SIZE = 50
+MAX_LIST_PAGE_SIZE = 1000
+
+IMPORT_BATCH_SIZE = 25
+IMPORT_MAX_WORKERS = 4
+# Import budgeting: one embedding request per chunk, estimated from the source size when known
+IMPORT_BYTES_PER_TOKEN = 4
+IMPORT_DEFAULT_CHUNKS_PER_FILE = 20
+
+BULK_INGEST_CHUNK_SIZE = 1000
+
+INGEST_INDEX_PATH = os.getenv(
+    "RAG_INGEST_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".rag_state", "ingest_index.db"),
+)
+INGEST_FINGERPRINT_WORKERS = 16
+INGEST_FINGERPRINT_LIST_MIN = 20
+
+LOCAL_IVF_MIN_SIZE = 20000
+LOCAL_IVF_NPROBE = 8
+# "vertex" embeds local corpora with DEFAULT_EMBEDDING_MODEL; "hashing" runs fully offline
+LOCAL_STORE_EMBEDDER = os.getenv("RAG_LOCAL_EMBEDDER", "vertex")
+LOCAL_EMBED_BATCH_SIZE = 100
+# Estimated tokens per embedding request, below the text-embedding-005 limit of 20,000
+LOCAL_EMBED_MAX_TOKENS = 15000
+
+QUERY_CACHE_MAX_ENTRIES = 1024
+QUERY_CACHE_TTL_SECONDS = 600
+
+RAG_EXECUTOR_MAX_WORKERS = 8
+
+VERTEX_INITIAL_CONCURRENCY = 8
+VERTEX_MAX_CONCURRENCY = 32
+VERTEX_MAX_RETRIES = 5
+VERTEX_BACKOFF_BASE_SECONDS = 0.5
+VERTEX_BACKOFF_MAX_SECONDS = 30
+# Longest a call waits for a free slot before failing instead of queueing behind a stuck burst
+VERTEX_SLOT_TIMEOUT_SECONDS = 60
+# import_files calls run for minutes, so they get their own limiter instead of holding the shared slots;
+# this covers every import batch of INGEST_JOB_MAX_WORKERS jobs running IMPORT_MAX_WORKERS batches each
+VERTEX_IMPORT_CONCURRENCY = 16
+VERTEX_HTTP_POOL_SIZE = 32
+
+MULTI_QUERY_MAX_WORKERS = 16
+MULTI_QUERY_TIMEOUT_SECONDS = 10
+
+INGEST_JOB_MAX_WORKERS = 4
+INGEST_JOB_RETENTION_SECONDS = 24 * 60 * 60
+# Job ids remembered per session for get_ingest_status with no job id
+INGEST_JOB_SESSION_HISTORY = 50
+
+RAG_METRICS_ENABLED = os.getenv("RAG_METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+RAG_METRICS_MAX_TURNS = 1000
+
+CORPUS_STATS_TTL_SECONDS = 3600
+CORPUS_STATS_MAX_CORPORA = 64
+CORPUS_INFO_PAGE_SIZE = 100
+CORPUS_INFO_RECENT_FILES = 20
+
+BULK_DELETE_MAX_WORKERS = 8
+BULK_DELETE_REQUESTS_PER_MIN = 600
+BULK_DELETE_REPORTED_IDS = 50
+# Deletes of more documents than this run as a background job; progress is reported per batch
+BULK_DELETE_BACKGROUND_MIN = 100
+BULK_DELETE_BATCH_SIZE = 100
+
+LEXICAL_INDEX_ENABLED = os.getenv("RAG_LEXICAL_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+LEXICAL_INDEX_DIR = os.getenv(
+    "RAG_LEXICAL_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".rag_state", "lexical"),
+)
+LEXICAL_FETCH_WORKERS = 8
+LEXICAL_MAX_SOURCE_BYTES = 5 * 1024 * 1024
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
@@ -1,24 +1,118 @@
-import re
-from typing import List, Optional
+import logging
+from typing import List, Optional, Tuple
 
 from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
 
-from utils import get_corpus_resource_name, check_corpus_exists
-from ..config import (
-    DEFAULT_CHUNK_SIZE,
-    DEFAULT_CHUNK_OVERLAP,
-    DEFAULT_EMBEDDING_REQUEST_PER_MIN)
+from ..config import IMPORT_BATCH_SIZE, LEXICAL_INDEX_ENABLED
+from .utils import get_corpus_resource_name, check_corpus_exists, normalize_path
+from .import_engine import ImportReport, import_paths
+from .ingest_index import fingerprint_size, ingest_index
+from .corpus_stats import corpus_stats
+from .ingest_jobs import IngestJob, ingest_jobs, remember_job
+from .lexical_index import lexical_indexes
+from .metrics import instrument_tool
+from .query_cache import query_cache
 
+logger = logging.getLogger(__name__)
+
+
+def import_and_record(
+    corpus_resource_name: str,
+    paths: List[str],
+    job: Optional[IngestJob] = None,
+) -> Tuple[ImportReport, int, Optional[int]]:
+    """
+    Import paths into a corpus, skipping unchanged sources, and update the ingest index and local caches.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+        paths (List[str]): Normalized paths to import
+        job (IngestJob, optional): Background job to report progress on and to check for cancellation
+    Returns:
+        Tuple: The import report, the number of sources skipped as unchanged, and the
+        number of chunks lexically indexed (None if lexical indexing did not run).
+    """
+    to_import, skipped_unchanged = ingest_index.partition(corpus_resource_name, paths)
+    fingerprints = dict(to_import)
+    paths_to_import = list(fingerprints)
+    if job is not None:
+        job.set_plan(-(-len(paths_to_import) // IMPORT_BATCH_SIZE), skipped_unchanged)
+
+    import_report = import_paths(
+        corpus_resource_name,
+        paths_to_import,
+        cancel_event=job.cancel_event if job else None,
+        on_batch=job.record_batch if job else None,
+        sizes={path: fingerprint_size(fingerprint) for path, fingerprint in to_import},
+    )
+    if import_report.imported:
+        query_cache.invalidate_corpus(corpus_resource_name)
+        # Partially failed batches leave it unclear which files landed, so relist those
+        if import_report.imported == len(import_report.completed_paths):
+            corpus_stats.record_import(corpus_resource_name, import_report.completed_paths)
+        else:
+            corpus_stats.invalidate(corpus_resource_name)
+    ingest_index.record(
+        corpus_resource_name,
+        ((path, fingerprints[path]) for path in import_report.completed_paths),
+    )
+
+    lexically_indexed = None
+    if LEXICAL_INDEX_ENABLED and import_report.completed_paths:
+        # The vector import already succeeded, so a lexical indexing failure is only logged
+        try:
+            lexically_indexed = lexical_indexes.index_sources(corpus_resource_name, import_report.completed_paths)
+        except Exception as e:
+            logger.warning(f"Lexical indexing of {corpus_resource_name} failed: {str(e)}")
+    return import_report, skipped_unchanged, lexically_indexed
+
+
+def import_sources(
+    corpus_name: str,
+    corpus_resource_name: str,
+    validated_paths: List[str],
+    invalid_paths: List[str],
+    conversions: List[str],
+    job: Optional[IngestJob] = None,
+) -> dict:
+    """
+    Import validated paths into a corpus, skipping unchanged sources, and build the add_data status dict.
+
+    Args:
+        job (IngestJob, optional): Background job to report progress on and to check for cancellation
+    Returns:
+        A dictionary providing the status of the data addition.
+    """
+    try:
+        import_report, skipped_unchanged, lexically_indexed = import_and_record(
+            corpus_resource_name, validated_paths, job
+        )
+        status = import_report.to_status(
+            corpus_name, validated_paths, invalid_paths, conversions, skipped_unchanged
+        )
+        if lexically_indexed is not None:
+            status["lexically_indexed"] = lexically_indexed
+        return status
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Error adding data to corpus: {str(e)}",
+            "corpus_name": corpus_name,
+            "paths": validated_paths,
+        }
+
+@instrument_tool
 def add_data(corpus_name:str,paths:List[str] ,tool_context:ToolContext) -> dict:
     """
     Add new data sources to the rag corpus specified by the corpus_name.
+    The import runs in the background; use get_ingest_status with the returned job_id to follow it.
     Args:
         corpus_name (str): The name of the corpus to which data will be added.
         path (List[str]): List of paths to the data files to be added.
         tool_context (ToolContext): The tool context required by the session and for state management.
     Returns:
-        A dictionary providing the status of the data addition.
+        A dictionary providing the status of the submission and the job_id of the background import.
     """
     if not check_corpus_exists(corpus_name, tool_context):
         return {
@@ -44,31 +138,11 @@ def add_data(corpus_name:str,paths:List[str] ,tool_context:ToolContext) -> dict:
             invalid_paths.append(path)
             continue
         
-        docs_match = re.match(
-            r"https:\/\/docs\.google\.com\/(?:document|spreadsheets|presentation)\/d\/([a-zA-Z0-9_-]+)(?:\/|$)",
-            path,
-        )
-        if docs_match:
-            file_id = docs_match.group(1)
-            drive_url = f"https://drive.google.com/file/d/{file_id}/view"
-            validated_paths.append(drive_url)
-            conversions.append(f"{path} → {drive_url}")
-            continue
-        
-        drive_match = re.match(
-            r"https:\/\/drive\.google\.com\/(?:file\/d\/|open\?id=)([a-zA-Z0-9_-]+)(?:\/|$)",
-            path,
-        )
-        if drive_match:
-            file_id = drive_match.group(1)
-            drive_url = f"https://drive.google.com/file/d/{file_id}/view"
-            validated_paths.append(drive_url)
-            if drive_url != path:
-                conversions.append(f"{path} → {drive_url}")
-            continue
-
-        if path.startswith("gs://"):
-            validated_paths.append(path)
+        normalized_path, conversion = normalize_path(path)
+        if normalized_path:
+            validated_paths.append(normalized_path)
+            if conversion:
+                conversions.append(conversion)
             continue
 
         invalid_paths.append(f"{path} (Invalid format)")
@@ -84,32 +158,23 @@ def add_data(corpus_name:str,paths:List[str] ,tool_context:ToolContext) -> dict:
     try:
         corpus_resource_name = get_corpus_resource_name(corpus_name)
 
-        transformation_config = rag.TransformationConfig(
-            chunking_config=rag.ChunkingConfig(
-                chunk_size=DEFAULT_CHUNK_SIZE,
-                chunk_overlap=DEFAULT_CHUNK_OVERLAP,
+        job = ingest_jobs.submit(
+            corpus_name,
+            len(validated_paths),
+            lambda job: import_sources(
+                corpus_name, corpus_resource_name, validated_paths, invalid_paths, conversions, job
             ),
         )
-
-        import_result = rag.import_files(
-            corpus_resource_name,
-            validated_paths,
-            transformation_config=transformation_config,
-            max_embedding_requests_per_min=DEFAULT_EMBEDDING_REQUEST_PER_MIN,
-        )
+        remember_job(job.job_id, tool_context)
 
         if not tool_context.state.get("current_corpus"):
             tool_context.state["current_corpus"] = corpus_name
 
-        conversion_msg = ""
-        if conversions:
-            conversion_msg = " (Converted Google Docs URLs to Drive format)"
-
         return {
             "status": "success",
-            "message": f"Successfully added {import_result.imported_rag_files_count} file(s) to corpus '{corpus_name}'{conversion_msg}",
+            "message": f"Started importing {len(validated_paths)} file(s) into corpus '{corpus_name}' in the background. Use get_ingest_status with job id '{job.job_id}' to follow its progress.",
             "corpus_name": corpus_name,
-            "files_added": import_result.imported_rag_files_count,
+            "job_id": job.job_id,
             "paths": validated_paths,
             "invalid_paths": invalid_paths,
             "conversions": conversions,
@@ -121,4 +186,4 @@ def add_data(corpus_name:str,paths:List[str] ,tool_context:ToolContext) -> dict:
             "message": f"Error adding data to corpus: {str(e)}",
             "corpus_name": corpus_name,
             "paths": paths,
-        }
\ No newline at end of file
+        }
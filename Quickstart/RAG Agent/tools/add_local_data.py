@@ -0,0 +1,97 @@
+import logging
+import os
+from typing import List
+
+from google.adk.tools.tool_context import ToolContext
+
+from ..config import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE, LOCAL_EMBED_BATCH_SIZE
+from .chunk_preview import iter_chunks
+from .local_store import get_or_create_local_store
+from .metrics import instrument_tool
+
+logger = logging.getLogger(__name__)
+
+
+def _file_chunks(path: str) -> List[str]:
+    """Cut a local text file into chunks with the same size and overlap add_data asks Vertex AI for."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return [
+        data[start:end].decode("utf-8", errors="replace")
+        for start, end, _ in iter_chunks(path, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP)
+    ]
+
+
+@instrument_tool
+def add_local_data(corpus_name: str, paths: List[str], tool_context: ToolContext) -> dict:
+    """
+    Add local text files to a local corpus that rag_query answers from in-process, without Vertex AI RAG.
+    The corpus is created on first use. Adding a file again replaces its earlier chunks.
+    Args:
+        corpus_name (str): The name of the local corpus. If empty, the current corpus is used.
+        paths (List[str]): Paths of local text files to add.
+        tool_context (ToolContext): The tool context required by the session and for state management.
+    Returns:
+        A dictionary providing the status of the data addition.
+    """
+    if not corpus_name:
+        corpus_name = tool_context.state.get("current_corpus", "")
+    if not corpus_name:
+        return {
+            "status": "error",
+            "message": "No corpus specified and no current corpus is set. Please specify a corpus.",
+            "corpus_name": corpus_name,
+        }
+    if not paths or not all(isinstance(path, str) for path in paths):
+        return {
+            "status": "error",
+            "message": "Invalid or empty paths provided.",
+            "corpus_name": corpus_name,
+        }
+
+    try:
+        store = get_or_create_local_store(corpus_name)
+        files_added = 0
+        chunks_added = 0
+        invalid_paths = []
+        for path in paths:
+            if not os.path.isfile(path):
+                invalid_paths.append(f"{path} (Not a local file)")
+                continue
+            try:
+                chunks = _file_chunks(path)
+            except OSError as e:
+                invalid_paths.append(f"{path} ({str(e)})")
+                continue
+            for start in range(0, len(chunks), LOCAL_EMBED_BATCH_SIZE):
+                batch = chunks[start:start + LOCAL_EMBED_BATCH_SIZE]
+                store.add(
+                    batch,
+                    source_uris=[path] * len(batch),
+                    ids=[f"{path}#{index}" for index in range(start, start + len(batch))],
+                )
+            files_added += 1
+            chunks_added += len(chunks)
+
+        if files_added:
+            tool_context.state["current_corpus"] = corpus_name
+        return {
+            "status": "success" if files_added else "error",
+            "message": (
+                f"Added {chunks_added} chunk(s) from {files_added} file(s) to local corpus '{corpus_name}'"
+                if files_added else "No valid local files provided."
+            ),
+            "corpus_name": corpus_name,
+            "files_added": files_added,
+            "chunks_added": chunks_added,
+            "corpus_size": len(store),
+            "invalid_paths": invalid_paths,
+        }
+    except Exception as e:
+        logger.warning(f"Adding local data to {corpus_name} failed: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"Error adding data to local corpus: {str(e)}",
+            "corpus_name": corpus_name,
+            "paths": paths,
+        }
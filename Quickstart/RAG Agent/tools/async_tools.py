@@ -0,0 +1,57 @@
+"""
+Async versions of the RAG tools for use inside the ADK Runner event loop.
+
+The vertexai.rag functions the tools call are blocking, so calling the sync
+tools from the Runner's asyncio loop stalls every other session in the process.
+Each async tool runs its sync counterpart on a dedicated, bounded executor and
+awaits the result. The wrappers keep the name, docstring and signature of the
+sync tool, so the model sees exactly the same tool declarations.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from ..config import RAG_EXECUTOR_MAX_WORKERS
+from . import utils
+from .add_data import add_data
+from .add_local_data import add_local_data
+from .create_corpus import create_corpus
+from .delete_corpus import delete_corpus
+from .delete_document import delete_document
+from .delete_documents import delete_documents
+from .get_corpus_info import get_corpus_info
+from .ingest_jobs import cancel_ingest_job, get_ingest_status
+from .list_corpora import list_corposa
+from .rag_query import rag_query, rag_query_multi
+
+_rag_executor = ThreadPoolExecutor(max_workers=RAG_EXECUTOR_MAX_WORKERS, thread_name_prefix="rag-sdk")
+
+
+def run_in_rag_executor(func):
+    """Wrap a blocking tool or helper as a coroutine function that runs on the RAG executor."""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_rag_executor, functools.partial(func, *args, **kwargs))
+
+    return wrapper
+
+
+add_data_async = run_in_rag_executor(add_data)
+add_local_data_async = run_in_rag_executor(add_local_data)
+create_corpus_async = run_in_rag_executor(create_corpus)
+delete_corpus_async = run_in_rag_executor(delete_corpus)
+delete_document_async = run_in_rag_executor(delete_document)
+delete_documents_async = run_in_rag_executor(delete_documents)
+get_corpus_info_async = run_in_rag_executor(get_corpus_info)
+list_corposa_async = run_in_rag_executor(list_corposa)
+get_ingest_status_async = run_in_rag_executor(get_ingest_status)
+cancel_ingest_job_async = run_in_rag_executor(cancel_ingest_job)
+rag_query_async = run_in_rag_executor(rag_query)
+rag_query_multi_async = run_in_rag_executor(rag_query_multi)
+
+get_corpus_resource_name_async = run_in_rag_executor(utils.get_corpus_resource_name)
+check_corpus_exists_async = run_in_rag_executor(utils.check_corpus_exists)
+set_current_corpus_async = run_in_rag_executor(utils.set_current_corpus)
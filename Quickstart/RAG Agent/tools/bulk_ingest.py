@@ -0,0 +1,285 @@
+"""
+Streaming bulk ingestion from a JSONL or CSV manifest.
+
+Large backfills do not fit in a tool argument, so this module reads the
+manifest line by line, normalizes and dedupes the paths, and submits them in
+chunks through the same import path as add_data, so unchanged sources are
+skipped and the ingest index, query cache, corpus stats and lexical index are
+kept up to date. Progress is written to a checkpoint after every chunk, and a
+rerun with the same checkpoint resumes after the last completed chunk instead
+of importing everything again.
+
+Paths of batches that failed (an import error such as a quota error, or files
+the service reported as failed) are written to a retry file next to the
+checkpoint, together with the checkpoint itself, so a failed batch is never
+lost: the next run with the same checkpoint imports them again before it
+continues with the manifest, even if the manifest was already read to the end.
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+from ..config import BULK_INGEST_CHUNK_SIZE
+from .add_data import import_and_record
+from .metrics import instrument_tool
+from .registry import corpus_registry
+from .utils import get_corpus_resource_name, normalize_path
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH_KEYS = ("path", "uri", "url")
+COUNT_KEYS = (
+    "submitted", "imported", "skipped_unchanged", "failed_batches", "retried", "pending_retry", "duplicates", "invalid",
+)
+
+
+class SeenPaths:
+    """
+    Compact set of the paths already submitted, stored as 64-bit hashes.
+
+    Holding 8-byte integers instead of full URI strings keeps a 500k-path
+    backfill to a few tens of MB, and the hashes can be saved next to the
+    checkpoint as a flat binary array.
+    """
+
+    def __init__(self):
+        self._hashes = set()
+
+    @staticmethod
+    def _hash(path: str) -> int:
+        return int.from_bytes(hashlib.blake2b(path.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def add(self, path: str) -> bool:
+        """Add a path, returning False if it was already present."""
+        key = self._hash(path)
+        if key in self._hashes:
+            return False
+        self._hashes.add(key)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def save(self, file_path: str) -> None:
+        with open(file_path, "wb") as f:
+            array("Q", self._hashes).tofile(f)
+
+    @classmethod
+    def load(cls, file_path: str) -> "SeenPaths":
+        seen = cls()
+        if os.path.exists(file_path):
+            hashes = array("Q")
+            with open(file_path, "rb") as f:
+                hashes.frombytes(f.read())
+            seen._hashes = set(hashes)
+        return seen
+
+
+def _parse_manifest_line(line: str, is_csv: bool) -> Optional[str]:
+    """Extract the path from one manifest line, or None for blank or header lines."""
+    line = line.strip()
+    if not line:
+        return None
+    if is_csv:
+        row = next(csv.reader([line]))
+        if not row or row[0].strip().lower() in MANIFEST_PATH_KEYS:
+            return None
+        return row[0].strip()
+    record = json.loads(line)
+    if isinstance(record, str):
+        return record
+    if not isinstance(record, dict):
+        raise ValueError(f"Manifest record is a {type(record).__name__}, expected a string or an object")
+    for key in MANIFEST_PATH_KEYS:
+        if key in record:
+            if not isinstance(record[key], str):
+                raise ValueError(f"Manifest record has a non-string {key!r}")
+            return record[key]
+    raise ValueError(f"Manifest record has none of the keys {', '.join(MANIFEST_PATH_KEYS)}")
+
+
+def iter_manifest(manifest_path: str, offset: int = 0) -> Iterator[Tuple[Optional[str], int]]:
+    """
+    Stream paths from a JSONL or CSV manifest.
+
+    Args:
+        manifest_path (str): Path to a .jsonl or .csv manifest. CSV manifests take the
+            path from the first column; JSONL records are strings or objects with a
+            path, uri or url key.
+        offset (int): Byte offset to start reading from
+
+    Yields:
+        Tuple[Optional[str], int]: The path on the line (None if the line holds no
+        path) and the byte offset just after the line.
+    """
+    is_csv = manifest_path.lower().endswith(".csv")
+    with open(manifest_path, "rb") as f:
+        f.seek(offset)
+        for raw_line in f:
+            offset += len(raw_line)
+            try:
+                yield _parse_manifest_line(raw_line.decode("utf-8"), is_csv), offset
+            except ValueError as e:
+                logger.warning(f"Skipping unreadable manifest line ending at byte {offset}: {str(e)}")
+                yield None, offset
+
+
+def _load_checkpoint(checkpoint_path: str, manifest_path: str, corpus_resource_name: str) -> dict:
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("manifest") == manifest_path and checkpoint.get("corpus") == corpus_resource_name:
+            return checkpoint
+        logger.warning(f"Ignoring checkpoint {checkpoint_path}: it belongs to a different manifest or corpus")
+    return {
+        "manifest": manifest_path,
+        "corpus": corpus_resource_name,
+        "offset": 0,
+        "submitted": 0,
+        "imported": 0,
+        "skipped_unchanged": 0,
+        "failed_batches": 0,
+        "retried": 0,
+        "pending_retry": 0,
+        "duplicates": 0,
+        "invalid": 0,
+        "done": False,
+    }
+
+
+def _load_retry_paths(checkpoint_path: str) -> List[str]:
+    retry_file = checkpoint_path + ".retry"
+    if not os.path.exists(retry_file):
+        return []
+    with open(retry_file) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _save_checkpoint(checkpoint_path: str, checkpoint: dict, seen: SeenPaths, retry_paths: List[str]) -> None:
+    # Write to temporary files and rename so a crash never leaves a torn checkpoint
+    seen.save(checkpoint_path + ".seen.tmp")
+    with open(checkpoint_path + ".retry.tmp", "w") as f:
+        f.writelines(f"{path}\n" for path in retry_paths)
+    checkpoint["pending_retry"] = len(retry_paths)
+    with open(checkpoint_path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(checkpoint_path + ".seen.tmp", checkpoint_path + ".seen")
+    os.replace(checkpoint_path + ".retry.tmp", checkpoint_path + ".retry")
+    os.replace(checkpoint_path + ".tmp", checkpoint_path)
+
+
+@instrument_tool
+def bulk_ingest(
+    corpus_name: str,
+    manifest_path: str,
+    checkpoint_path: Optional[str] = None,
+    chunk_size: int = BULK_INGEST_CHUNK_SIZE,
+) -> dict:
+    """
+    Import every path listed in a manifest file into a corpus, resumably.
+
+    Args:
+        corpus_name (str): The name of the corpus to add data to
+        manifest_path (str): Path to a .jsonl or .csv manifest of Drive/Docs/GCS paths
+        checkpoint_path (str, optional): Where to record progress. Defaults to
+            "<manifest_path>.checkpoint"
+        chunk_size (int): Number of unique paths submitted per chunk
+
+    Returns:
+        dict: A dictionary providing the status of the bulk ingestion.
+    """
+    if not corpus_registry.exists(corpus_name):
+        return {
+            "status": "error",
+            "message": f"Corpus '{corpus_name}' does not exist.",
+            "corpus_name": corpus_name,
+        }
+    if not os.path.exists(manifest_path):
+        return {
+            "status": "error",
+            "message": f"Manifest '{manifest_path}' does not exist.",
+            "corpus_name": corpus_name,
+        }
+
+    corpus_resource_name = get_corpus_resource_name(corpus_name)
+    checkpoint_path = checkpoint_path or f"{manifest_path}.checkpoint"
+    checkpoint = _load_checkpoint(checkpoint_path, manifest_path, corpus_resource_name)
+    for key in ("retried", "pending_retry", "skipped_unchanged"):
+        checkpoint.setdefault(key, 0)
+    resumed = bool(checkpoint["offset"] or checkpoint["done"])
+    # Paths of batches that failed in earlier runs; replayed before the manifest continues
+    retry_paths = _load_retry_paths(checkpoint_path) if resumed else []
+    if checkpoint["done"] and not retry_paths:
+        return {
+            "status": "success",
+            "message": f"Manifest '{manifest_path}' was already fully ingested into corpus '{corpus_name}'.",
+            "corpus_name": corpus_name,
+            **{key: checkpoint[key] for key in COUNT_KEYS},
+        }
+    seen = SeenPaths.load(checkpoint_path + ".seen") if resumed else SeenPaths()
+    errors = []
+    failed_paths = []
+
+    def submit(chunk, offset, retry=False):
+        report, skipped_unchanged, _ = import_and_record(corpus_resource_name, chunk)
+        checkpoint["retried" if retry else "submitted"] += len(chunk)
+        checkpoint["imported"] += report.imported
+        checkpoint["skipped_unchanged"] += skipped_unchanged
+        failed = [batch for batch in report.batches if batch.error or batch.failed]
+        checkpoint["failed_batches"] += len(failed)
+        failed_paths.extend(path for batch in failed for path in batch.paths)
+        checkpoint["offset"] = offset
+        errors.extend(report.errors[:10 - len(errors)])
+        # Retry paths not attempted yet in this run stay in the file until they are
+        _save_checkpoint(checkpoint_path, checkpoint, seen, failed_paths + retry_paths)
+        logger.info(f"Bulk ingest of {manifest_path}: {checkpoint['submitted']} path(s) submitted")
+
+    try:
+        while retry_paths:
+            chunk, retry_paths = retry_paths[:chunk_size], retry_paths[chunk_size:]
+            submit(chunk, checkpoint["offset"], retry=True)
+        if not checkpoint["done"]:
+            chunk = []
+            offset = checkpoint["offset"]
+            for path, offset in iter_manifest(manifest_path, checkpoint["offset"]):
+                if path is None:
+                    continue
+                normalized_path, _ = normalize_path(path)
+                if not normalized_path:
+                    checkpoint["invalid"] += 1
+                    continue
+                if not seen.add(normalized_path):
+                    checkpoint["duplicates"] += 1
+                    continue
+                chunk.append(normalized_path)
+                if len(chunk) >= chunk_size:
+                    submit(chunk, offset)
+                    chunk = []
+            if chunk:
+                submit(chunk, offset)
+            checkpoint["offset"] = offset
+            checkpoint["done"] = True
+        _save_checkpoint(checkpoint_path, checkpoint, seen, failed_paths)
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Bulk ingest stopped, rerun to resume from the checkpoint: {str(e)}",
+            "corpus_name": corpus_name,
+            "checkpoint": checkpoint_path,
+            **{key: checkpoint[key] for key in COUNT_KEYS},
+        }
+
+    return {
+        "status": "success",
+        "message": f"Imported {checkpoint['imported']} file(s) from manifest '{manifest_path}' into corpus '{corpus_name}'"
+                   + (f"; {len(failed_paths)} path(s) failed, rerun to retry them" if failed_paths else ""),
+        "corpus_name": corpus_name,
+        "checkpoint": checkpoint_path,
+        "errors": errors,
+        **{key: checkpoint[key] for key in COUNT_KEYS},
+    }
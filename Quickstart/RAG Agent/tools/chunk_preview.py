@@ -0,0 +1,159 @@
+"""
+Local chunking preview and embedding-cost estimate for add_data.
+
+Streams local text files through a memory-mapped reader and cuts them into
+chunks with the same size/overlap semantics as the rag.ChunkingConfig used by
+add_data, without calling any remote API. Token counts are approximated by
+splitting on words and punctuation, so the numbers are an estimate of what the
+service will produce rather than an exact match.
+"""
+
+import mmap
+import os
+import re
+from collections import deque
+from typing import Iterable, Iterator, List, Tuple
+
+from ..config import (
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_EMBEDDING_REQUEST_PER_MIN,
+)
+from .metrics import instrument_tool
+
+TOKEN_PATTERN = re.compile(rb"\w+|[^\w\s]")
+
+
+def iter_token_spans(path: str) -> Iterator[Tuple[int, int]]:
+    """Yield the (start, end) byte offsets of each approximate token in a file."""
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for match in TOKEN_PATTERN.finditer(data):
+            yield match.span()
+
+
+def iter_windows(
+    spans: Iterable[Tuple[int, int]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> Iterator[Tuple[int, int, int]]:
+    """
+    Group a stream of token spans into overlapping chunks.
+
+    Each chunk holds up to chunk_size tokens and starts chunk_size - chunk_overlap
+    tokens after the previous one. Only one chunk's worth of token offsets is kept
+    in memory at a time.
+
+    Args:
+        spans (Iterable[Tuple[int, int]]): (start, end) offsets of each token, in order
+        chunk_size (int): Tokens per chunk
+        chunk_overlap (int): Tokens shared by consecutive chunks
+
+    Yields:
+        Tuple[int, int, int]: Start offset, end offset and token count of each chunk
+    """
+    if chunk_size <= 0 or not 0 <= chunk_overlap < chunk_size:
+        raise ValueError("chunk_size must be positive and chunk_overlap must be in [0, chunk_size)")
+    step = chunk_size - chunk_overlap
+    window = deque()
+    new_tokens = 0
+    for span in spans:
+        window.append(span)
+        new_tokens += 1
+        if len(window) == chunk_size:
+            yield window[0][0], window[-1][1], len(window)
+            for _ in range(step):
+                window.popleft()
+            new_tokens = 0
+    if new_tokens:
+        yield window[0][0], window[-1][1], len(window)
+
+
+def iter_chunks(
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> Iterator[Tuple[int, int, int]]:
+    """
+    Stream the chunk boundaries of a local text file.
+
+    Args:
+        path (str): Path to a local text file
+        chunk_size (int): Tokens per chunk
+        chunk_overlap (int): Tokens shared by consecutive chunks
+
+    Yields:
+        Tuple[int, int, int]: Start byte, end byte and token count of each chunk
+    """
+    return iter_windows(iter_token_spans(path), chunk_size, chunk_overlap)
+
+
+@instrument_tool
+def preview_chunking(
+    paths: List[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    max_boundaries: int = 10,
+) -> dict:
+    """
+    Estimate how many chunks, embedding requests and minutes importing local files would take.
+
+    Args:
+        paths (List[str]): Local text files to preview
+        chunk_size (int): Tokens per chunk, defaults to DEFAULT_CHUNK_SIZE
+        chunk_overlap (int): Tokens shared by consecutive chunks, defaults to DEFAULT_CHUNK_OVERLAP
+        max_boundaries (int): Number of chunk boundaries to include per file
+
+    Returns:
+        dict: Per-file chunk counts and boundaries, plus totals and the estimated import
+        time under DEFAULT_EMBEDDING_REQUEST_PER_MIN (one embedding request per chunk).
+    """
+    files = []
+    invalid_paths = []
+    total_chunks = 0
+    total_tokens = 0
+    for path in paths:
+        if not os.path.isfile(path):
+            invalid_paths.append(f"{path} (Not a local file)")
+            continue
+        try:
+            chunks = 0
+            tokens = 0
+            boundaries = []
+            for start, end, count in iter_chunks(path, chunk_size, chunk_overlap):
+                chunks += 1
+                tokens += count
+                if len(boundaries) < max_boundaries:
+                    boundaries.append({"start_byte": start, "end_byte": end, "tokens": count})
+        except ValueError as e:
+            return {
+                "status": "error",
+                "message": str(e),
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+            }
+        except OSError as e:
+            invalid_paths.append(f"{path} ({str(e)})")
+            continue
+        files.append({
+            "path": path,
+            "size_bytes": os.path.getsize(path),
+            "chunks": chunks,
+            "boundaries": boundaries,
+        })
+        total_chunks += chunks
+        total_tokens += tokens
+
+    return {
+        "status": "success",
+        "message": f"{total_chunks} chunk(s) estimated across {len(files)} file(s)",
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "files": files,
+        "invalid_paths": invalid_paths,
+        "total_chunks": total_chunks,
+        "total_chunk_tokens": total_tokens,
+        "estimated_embedding_requests": total_chunks,
+        "estimated_minutes": round(total_chunks / DEFAULT_EMBEDDING_REQUEST_PER_MIN, 2),
+    }
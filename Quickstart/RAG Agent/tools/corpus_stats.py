@@ -0,0 +1,225 @@
+"""
+Cached per-corpus file statistics for get_corpus_info.
+
+get_corpus_info streams a corpus's file listing once into a CorpusStats, which
+keeps running aggregates (file count, total size, type breakdown, oldest and
+newest file) and a compact record per file. add_data and delete_document then
+update the cached stats in place, so a repeat info request is answered without
+listing the corpus again.
+"""
+
+import heapq
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..config import CORPUS_STATS_MAX_CORPORA, CORPUS_STATS_TTL_SECONDS
+
+# size_bytes, file_type, created (epoch seconds or None), display_name
+FileRecord = Tuple[int, str, Optional[float], str]
+# created, file_id, display_name
+FileMarker = Tuple[float, str, str]
+
+_FILE_TYPE_PREFIX = "RAG_FILE_TYPE_"
+
+
+def file_type(name: str, rag_file_type=None) -> str:
+    """Classify a file by its RagFile type if set, otherwise by the extension of its name or path."""
+    type_name = getattr(rag_file_type, "name", "") or ""
+    if type_name.startswith(_FILE_TYPE_PREFIX) and not type_name.endswith("UNSPECIFIED"):
+        return type_name[len(_FILE_TYPE_PREFIX):].lower()
+    extension = os.path.splitext(name.split("?")[0].rstrip("/"))[1]
+    return extension.lstrip(".").lower() or "unknown"
+
+
+def to_epoch(value) -> Optional[float]:
+    """Convert a datetime, protobuf Timestamp or ISO 8601 string to epoch seconds."""
+    if value is None or value == "":
+        return None
+    if hasattr(value, "timestamp"):
+        return value.timestamp()
+    if hasattr(value, "seconds"):
+        return value.seconds + getattr(value, "nanos", 0) / 1e9
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _iso(epoch: Optional[float]) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat() if epoch is not None else ""
+
+
+def _marker_dict(marker: Optional[FileMarker]) -> Optional[dict]:
+    if marker is None:
+        return None
+    created, file_id, display_name = marker
+    return {"file_id": file_id, "display_name": display_name, "create_time": _iso(created)}
+
+
+class CorpusStats:
+    """
+    Running file statistics of one corpus.
+
+    Files imported by add_data after the listing are counted in the aggregates
+    but have no file id or size yet; they are reported as unlisted_files until
+    the next full listing.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, FileRecord] = {}
+        self.file_count = 0
+        self.total_size_bytes = 0
+        self.types: Counter = Counter()
+        self.unlisted_files = 0
+        self.newest: Optional[FileMarker] = None
+        self.oldest: Optional[FileMarker] = None
+        self.latest_import: Optional[FileMarker] = None
+        self.listed_at = time.time()
+        self._recent: Optional[List[dict]] = None
+
+    def add_file(self, file_id: str, size_bytes: int, type_: str, created: Optional[float], display_name: str) -> None:
+        """Fold one listed file into the aggregates."""
+        if file_id in self.files:
+            self.remove_file(file_id)
+        self.files[file_id] = (size_bytes, type_, created, display_name)
+        self.file_count += 1
+        self.total_size_bytes += size_bytes
+        self.types[type_] += 1
+        if created is not None:
+            marker = (created, file_id, display_name)
+            if self.newest is None or marker[0] > self.newest[0]:
+                self.newest = marker
+            if self.oldest is None or marker[0] < self.oldest[0]:
+                self.oldest = marker
+        self._recent = None
+
+    def add_imported(self, paths: Iterable[str], imported_at: float) -> None:
+        """Count files that add_data just imported, before they have been listed."""
+        for path in paths:
+            self.file_count += 1
+            self.unlisted_files += 1
+            self.types[file_type(path)] += 1
+            self.latest_import = (imported_at, "", path)
+        if self.latest_import is not None and (self.newest is None or self.latest_import[0] >= self.newest[0]):
+            self.newest = self.latest_import
+
+    def remove_file(self, file_id: str) -> bool:
+        """Remove a listed file from the aggregates. Returns False if the file is not known."""
+        record = self.files.pop(file_id, None)
+        if record is None:
+            return False
+        size_bytes, type_, _, _ = record
+        self.file_count -= 1
+        self.total_size_bytes -= size_bytes
+        self.types[type_] -= 1
+        if self.types[type_] <= 0:
+            del self.types[type_]
+        # Only deleting the newest or oldest file needs a pass over the records
+        if (self.newest and self.newest[1] == file_id) or (self.oldest and self.oldest[1] == file_id):
+            self._recompute_extremes()
+        self._recent = None
+        return True
+
+    def _recompute_extremes(self) -> None:
+        markers = [
+            (created, file_id, display_name)
+            for file_id, (_, _, created, display_name) in self.files.items()
+            if created is not None
+        ]
+        self.newest = max(markers, default=None)
+        self.oldest = min(markers, default=None)
+        if self.latest_import is not None and (self.newest is None or self.latest_import[0] >= self.newest[0]):
+            self.newest = self.latest_import
+
+    def recent_files(self, limit: int) -> List[dict]:
+        """The most recently created listed files, newest first."""
+        if self._recent is None or len(self._recent) < min(limit, len(self.files)):
+            newest = heapq.nlargest(limit, self.files.items(), key=lambda item: item[1][2] or 0.0)
+            self._recent = [
+                {
+                    "file_id": file_id,
+                    "display_name": display_name,
+                    "file_type": type_,
+                    "size_bytes": size_bytes,
+                    "create_time": _iso(created),
+                }
+                for file_id, (size_bytes, type_, created, display_name) in newest
+            ]
+        return self._recent[:limit]
+
+    def to_dict(self, recent_limit: int) -> dict:
+        return {
+            "file_count": self.file_count,
+            "total_size_bytes": self.total_size_bytes,
+            "file_types": dict(self.types.most_common()),
+            "unlisted_files": self.unlisted_files,
+            "newest_file": _marker_dict(self.newest),
+            "oldest_file": _marker_dict(self.oldest),
+            "recent_files": self.recent_files(recent_limit),
+            "listed_at": _iso(self.listed_at),
+        }
+
+
+class CorpusStatsCache:
+    """
+    Thread-safe LRU map of corpus resource name -> CorpusStats, expired after a TTL.
+
+    Args:
+        max_corpora (int): Maximum number of corpora whose stats are kept
+        ttl (float): Seconds after which a corpus is listed again, to pick up
+            changes made outside this process
+    """
+
+    def __init__(self, max_corpora: int = CORPUS_STATS_MAX_CORPORA, ttl: float = CORPUS_STATS_TTL_SECONDS):
+        self.max_corpora = max_corpora
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CorpusStats]" = OrderedDict()
+
+    def _get(self, corpus_resource_name: str) -> Optional[CorpusStats]:
+        stats = self._entries.get(corpus_resource_name)
+        if stats is not None and time.time() - stats.listed_at > self.ttl:
+            del self._entries[corpus_resource_name]
+            return None
+        return stats
+
+    def describe(self, corpus_resource_name: str, recent_limit: int) -> Optional[dict]:
+        """Return the cached stats of a corpus as a dict, or None if they are missing or expired."""
+        with self._lock:
+            stats = self._get(corpus_resource_name)
+            if stats is None:
+                return None
+            self._entries.move_to_end(corpus_resource_name)
+            return stats.to_dict(recent_limit)
+
+    def store(self, corpus_resource_name: str, stats: CorpusStats) -> None:
+        with self._lock:
+            self._entries[corpus_resource_name] = stats
+            self._entries.move_to_end(corpus_resource_name)
+            while len(self._entries) > self.max_corpora:
+                self._entries.popitem(last=False)
+
+    def record_import(self, corpus_resource_name: str, paths: List[str]) -> None:
+        """Count paths that were just imported into a corpus."""
+        with self._lock:
+            stats = self._get(corpus_resource_name)
+            if stats is not None:
+                stats.add_imported(paths, time.time())
+
+    def record_delete(self, corpus_resource_name: str, file_id: str) -> None:
+        """Remove a deleted file. A file the stats do not know forces a fresh listing."""
+        with self._lock:
+            stats = self._get(corpus_resource_name)
+            if stats is not None and not stats.remove_file(file_id):
+                del self._entries[corpus_resource_name]
+
+    def invalidate(self, corpus_resource_name: str) -> None:
+        with self._lock:
+            self._entries.pop(corpus_resource_name, None)
+
+
+corpus_stats = CorpusStatsCache()
@@ -2,9 +2,14 @@ import re
 from ..config import (
     DEFAULT_EMBEDDING_MODEL
 )
-from vertexai import rag
 from google.adk.tools.tool_context import ToolContext
-from utils import check_corpus_exists
+from .utils import check_corpus_exists
+from .metrics import instrument_tool
+from .registry import corpus_registry
+from .vertex_client import rag
+
+
+@instrument_tool
 def create_corpus(corpus_name:str, tool_context: ToolContext)-> dict:
     """
     Create a new corpus with the specified name and based on Vertex AI RAG capabilities.
@@ -38,7 +43,9 @@ def create_corpus(corpus_name:str, tool_context: ToolContext)-> dict:
             ),
         )
         
-        tool_context.state["corpus_exists_{corpus_name}"] = True
+        corpus_registry.add(rag_corpus)
+
+        tool_context.state[f"corpus_exists_{corpus_name}"] = True
         
         tool_context.state["current_corpus"] = corpus_name
         
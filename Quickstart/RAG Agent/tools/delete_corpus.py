@@ -0,0 +1,65 @@
+from google.adk.tools.tool_context import ToolContext
+from .corpus_stats import corpus_stats
+from .ingest_index import ingest_index
+from .lexical_index import lexical_indexes
+from .query_cache import query_cache
+from .utils import check_corpus_exists, get_corpus_resource_name
+from .metrics import instrument_tool
+from .registry import corpus_registry
+from .vertex_client import rag
+
+
+@instrument_tool
+def delete_corpus(corpus_name: str, confirm: bool, tool_context: ToolContext) -> dict:
+    """
+    Delete an entire corpus and all of its associated files.
+
+    Args:
+        corpus_name (str): The name of the corpus to delete
+        confirm (bool): Must be True to confirm the deletion
+        tool_context (ToolContext): the tool context required by the session and for state management
+
+    Returns:
+        Dict: A dictionary providing the status of the corpus deletion.
+    """
+    if not confirm:
+        return {
+            "status": "Error",
+            "message": f"Deletion of corpus '{corpus_name}' was not confirmed. Set confirm to True to delete it.",
+            "corpus-deleted": False,
+            "corpus-name": corpus_name,
+        }
+    if not check_corpus_exists(corpus_name, tool_context):
+        return {
+            "status": "Error",
+            "message": f"Corpus '{corpus_name}' does not exist.",
+            "corpus-deleted": False,
+            "corpus-name": corpus_name,
+        }
+    try:
+        corpus_resource_name = get_corpus_resource_name(corpus_name)
+        rag.delete_corpus(name=corpus_resource_name)
+
+        corpus_registry.remove(corpus_resource_name)
+        ingest_index.forget(corpus_resource_name)
+        query_cache.invalidate_corpus(corpus_resource_name)
+        corpus_stats.invalidate(corpus_resource_name)
+        lexical_indexes.drop(corpus_resource_name)
+
+        tool_context.state[f"corpus_exists_{corpus_name}"] = False
+        if tool_context.state.get("current_corpus") == corpus_name:
+            tool_context.state["current_corpus"] = None
+
+        return {
+            "status": "Success",
+            "message": f"Corpus {corpus_name} successfully deleted.",
+            "corpus-deleted": True,
+            "corpus-name": corpus_name,
+        }
+    except Exception as e:
+        return {
+            "status": "Error",
+            "message": f"Failed to delete corpus '{corpus_name}': {str(e)}",
+            "corpus-deleted": False,
+            "corpus-name": corpus_name,
+        }
@@ -0,0 +1,115 @@
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+from google.adk.tools.tool_context import ToolContext
+from .corpus_stats import corpus_stats
+from .ingest_index import ingest_index
+from .lexical_index import lexical_indexes
+from .query_cache import query_cache
+from .metrics import instrument_tool
+from .utils import check_corpus_exists, get_corpus_resource_name, rag_file_sources
+from .vertex_client import rag, status_code
+
+NOT_FOUND_STATUS_CODE = 404
+
+logger = logging.getLogger(__name__)
+
+
+def get_document_resource_name(corpus_resource_name: str, document_id: str) -> str:
+    """Build the full RagFile resource name from a document id or resource name."""
+    if "/ragFiles/" in document_id:
+        return document_id
+    return f"{corpus_resource_name}/ragFiles/{document_id}"
+
+
+def lookup_file_sources(document_resource_name: str) -> Optional[Tuple[List[str], str]]:
+    """
+    Read a RagFile's source URIs and display name, which can no longer be read once it is deleted.
+
+    Returns:
+        The (source URIs, display name) of the file, or None if the lookup failed.
+        A 404 is raised, since the file does not exist.
+    """
+    try:
+        rag_file = rag.get_file(name=document_resource_name)
+    except Exception as e:
+        if status_code(e) == NOT_FOUND_STATUS_CODE:
+            raise
+        logger.warning(f"Could not look up {document_resource_name} before deleting it: {str(e)}")
+        return None
+    return rag_file_sources(rag_file), getattr(rag_file, "display_name", "") or ""
+
+
+def forget_deleted_sources(corpus_resource_name: str, files: Iterable[Optional[Tuple[List[str], str]]]) -> None:
+    """
+    Drop the ingest records of deleted files so their sources are imported again if re-added.
+
+    Args:
+        files: (source URIs, display name) of each deleted file, or None where the lookup failed
+    """
+    uris = []
+    for file in files:
+        if file is None or not file[0]:
+            # A deleted file's source is unknown, so no record can be trusted
+            ingest_index.forget(corpus_resource_name)
+            return
+        uris.extend(file[0])
+    ingest_index.forget_sources(corpus_resource_name, uris)
+
+
+@instrument_tool
+def delete_document(corpus_name: str, document_id: str, confirm: bool, tool_context: ToolContext) -> dict:
+    """
+    Delete a specific document from a corpus.
+
+    Args:
+        corpus_name (str): The name of the corpus containing the document
+        document_id (str): The ID of the document to delete, as reported by get_corpus_info
+        confirm (bool): Must be True to confirm the deletion
+        tool_context (ToolContext): the tool context required by the session and for state management
+
+    Returns:
+        Dict: A dictionary providing the status of the document deletion.
+    """
+    if not confirm:
+        return {
+            "status": "Error",
+            "message": f"Deletion of document '{document_id}' was not confirmed. Set confirm to True to delete it.",
+            "document-deleted": False,
+            "corpus-name": corpus_name,
+            "document-id": document_id,
+        }
+    if not check_corpus_exists(corpus_name, tool_context):
+        return {
+            "status": "Error",
+            "message": f"Corpus '{corpus_name}' does not exist.",
+            "document-deleted": False,
+            "corpus-name": corpus_name,
+            "document-id": document_id,
+        }
+    try:
+        corpus_resource_name = get_corpus_resource_name(corpus_name)
+        document_resource_name = get_document_resource_name(corpus_resource_name, document_id)
+        file = lookup_file_sources(document_resource_name)
+        rag.delete_file(name=document_resource_name)
+        if file is not None:
+            lexical_indexes.remove_files(corpus_resource_name, [file])
+        corpus_stats.record_delete(corpus_resource_name, document_resource_name.split("/")[-1])
+        forget_deleted_sources(corpus_resource_name, [file])
+        query_cache.invalidate_corpus(corpus_resource_name)
+
+        return {
+            "status": "Success",
+            "message": f"Document {document_id} successfully deleted from corpus {corpus_name}.",
+            "document-deleted": True,
+            "corpus-name": corpus_name,
+            "document-id": document_id,
+        }
+    except Exception as e:
+        return {
+            "status": "Error",
+            "message": f"Failed to delete document '{document_id}' from corpus '{corpus_name}': {str(e)}",
+            "document-deleted": False,
+            "corpus-name": corpus_name,
+            "document-id": document_id,
+        }
@@ -0,0 +1,312 @@
+"""
+Bulk deletion of documents from a corpus.
+
+Deletes a list of document ids, or every document matching a filter (created
+before a date and/or imported from a source prefix), in one tool call. The
+deletes run concurrently on a bounded pool under their own process-wide rate
+limit (BULK_DELETE_REQUESTS_PER_MIN), the Vertex client layer retries throttled
+and transient errors, and the result reports counts plus the ids that were not
+deleted.
+
+Deletes of more than BULK_DELETE_BACKGROUND_MIN documents take minutes at that
+rate, so they run as a background job on the ingest job pool: the tool returns
+a job id for get_ingest_status and cancel_ingest_job, and the job's result is
+the same dict a direct call returns.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from google.adk.tools.tool_context import ToolContext
+
+from ..config import (
+    BULK_DELETE_BACKGROUND_MIN,
+    BULK_DELETE_BATCH_SIZE,
+    BULK_DELETE_MAX_WORKERS,
+    BULK_DELETE_REPORTED_IDS,
+    BULK_DELETE_REQUESTS_PER_MIN,
+    CORPUS_INFO_PAGE_SIZE,
+)
+from .corpus_stats import corpus_stats, to_epoch
+from .delete_document import (
+    NOT_FOUND_STATUS_CODE,
+    forget_deleted_sources,
+    get_document_resource_name,
+    lookup_file_sources,
+)
+from .import_engine import CANCELLED_ERROR, BatchResult
+from .ingest_jobs import IngestJob, ingest_jobs, remember_job
+from .lexical_index import lexical_indexes
+from .metrics import instrument_tool, submit_in_context
+from .query_cache import query_cache
+from .utils import check_corpus_exists, get_corpus_resource_name, rag_file_sources
+from .vertex_client import TokenBucket, rag, status_code
+
+# Small capacity so a large delete ramps up at the configured rate instead of bursting
+delete_rate_limiter = TokenBucket(BULK_DELETE_REQUESTS_PER_MIN, capacity=BULK_DELETE_MAX_WORKERS)
+_delete_pool = ThreadPoolExecutor(max_workers=BULK_DELETE_MAX_WORKERS, thread_name_prefix="rag-delete")
+
+
+def _parse_cutoff(older_than: str) -> float:
+    """Parse an ISO 8601 date or datetime, treating naive values as UTC."""
+    cutoff = datetime.fromisoformat(older_than.strip().replace("Z", "+00:00"))
+    if cutoff.tzinfo is None:
+        cutoff = cutoff.replace(tzinfo=timezone.utc)
+    return cutoff.timestamp()
+
+
+def _iter_files(corpus_resource_name: str) -> Iterator[Tuple[str, Optional[float], List[str], str]]:
+    """Stream the corpus's file listing as (file id, created epoch, source URIs, display name)."""
+    for rag_file in rag.list_files(corpus_name=corpus_resource_name, page_size=CORPUS_INFO_PAGE_SIZE):
+        yield (
+            rag_file.name.split("/")[-1],
+            to_epoch(getattr(rag_file, "create_time", None)),
+            rag_file_sources(rag_file),
+            getattr(rag_file, "display_name", "") or "",
+        )
+
+
+def _matching_files(
+    corpus_resource_name: str, cutoff: Optional[float], source_prefix: str
+) -> Dict[str, Tuple[List[str], str]]:
+    """Return the files that match every filter, as file id -> (source URIs, display name)."""
+    matches = {}
+    for file_id, created, sources, display_name in _iter_files(corpus_resource_name):
+        if cutoff is not None and (created is None or created >= cutoff):
+            continue
+        if source_prefix and not any(source.startswith(source_prefix) for source in (*sources, display_name)):
+            continue
+        matches[file_id] = (sources, display_name)
+    return matches
+
+
+def _delete_one(
+    document_resource_name: str, file: Optional[Tuple[List[str], str]]
+) -> Tuple[str, Optional[str], Optional[Tuple[List[str], str]]]:
+    """
+    Delete one file. Throttled and transient errors are retried by the Vertex client layer.
+
+    Args:
+        file: The file's (source URIs, display name) if the listing already provided them;
+            otherwise the file is looked up before it is deleted
+
+    Returns:
+        Tuple: The outcome ("deleted", "not_found" or "failed"), the error message
+        of a failure, and the file's (source URIs, display name) or None if unknown.
+    """
+    delete_rate_limiter.acquire()
+    try:
+        if file is None:
+            file = lookup_file_sources(document_resource_name)
+        rag.delete_file(name=document_resource_name)
+        return "deleted", None, file
+    except Exception as e:
+        if status_code(e) == NOT_FOUND_STATUS_CODE:
+            return "not_found", None, file
+        return "failed", str(e), file
+
+
+def delete_files(
+    corpus_name: str,
+    corpus_resource_name: str,
+    document_ids: List[str],
+    files: Dict[str, Tuple[List[str], str]],
+    job: Optional[IngestJob] = None,
+) -> dict:
+    """
+    Delete the given documents in batches of BULK_DELETE_BATCH_SIZE and update the local caches.
+
+    Args:
+        corpus_name (str): The name of the corpus, as given by the user
+        corpus_resource_name (str): The full resource name of the corpus
+        document_ids (List[str]): IDs of the documents to delete
+        files (Dict): Source URIs and display name per document id, where the file listing was read;
+            other documents are looked up before they are deleted
+        job (IngestJob, optional): Background job to report progress on and to check for cancellation
+    Returns:
+        Dict: The number of documents deleted, not found and failed, and the ids that were not deleted.
+    """
+    try:
+        files = dict(files)
+        batches = [
+            document_ids[start:start + BULK_DELETE_BATCH_SIZE]
+            for start in range(0, len(document_ids), BULK_DELETE_BATCH_SIZE)
+        ]
+        if job is not None:
+            job.set_plan(len(batches), 0)
+        deleted = []
+        not_found = []
+        failed = []
+        cancelled = []
+        for index, batch_ids in enumerate(batches):
+            batch = BatchResult(index=index, paths=batch_ids)
+            if job is not None and job.cancel_event.is_set():
+                cancelled.extend(batch_ids)
+                batch.error = CANCELLED_ERROR
+                job.record_batch(batch)
+                continue
+            futures = [
+                submit_in_context(
+                    _delete_pool,
+                    _delete_one,
+                    get_document_resource_name(corpus_resource_name, document_id),
+                    files.get(document_id),
+                )
+                for document_id in batch_ids
+            ]
+            for document_id, future in zip(batch_ids, futures):
+                outcome, error, file = future.result()
+                if file is not None:
+                    files[document_id] = file
+                if outcome == "deleted":
+                    deleted.append(document_id)
+                    batch.imported += 1
+                elif outcome == "not_found":
+                    not_found.append(document_id)
+                else:
+                    failed.append({"document_id": document_id, "error": error})
+                    batch.failed += 1
+            if job is not None:
+                job.record_batch(batch)
+
+        if deleted or not_found:
+            for document_id in deleted:
+                corpus_stats.record_delete(corpus_resource_name, document_id)
+            lexical_indexes.remove_files(
+                corpus_resource_name, (files[document_id] for document_id in deleted if document_id in files)
+            )
+            # Files already gone are forgotten only where their sources are known
+            forget_deleted_sources(
+                corpus_resource_name,
+                [files.get(document_id) for document_id in deleted]
+                + [files[document_id] for document_id in not_found if files.get(document_id) and files[document_id][0]],
+            )
+            query_cache.invalidate_corpus(corpus_resource_name)
+
+        return {
+            "status": "Error" if failed and not deleted else "Success",
+            "message": (
+                f"Deleted {len(deleted)} of {len(document_ids)} document(s) from corpus '{corpus_name}'"
+                f" ({len(not_found)} not found, {len(failed)} failed"
+                + (f", {len(cancelled)} cancelled" if cancelled else "")
+                + ")."
+            ),
+            "corpus-name": corpus_name,
+            "requested": len(document_ids),
+            "deleted": len(deleted),
+            "not_found": len(not_found),
+            "failed": len(failed),
+            "cancelled": len(cancelled),
+            "not_found_ids": not_found[:BULK_DELETE_REPORTED_IDS],
+            "failed_ids": failed[:BULK_DELETE_REPORTED_IDS],
+        }
+    except Exception as e:
+        return {
+            "status": "Error",
+            "message": f"Failed to delete documents from corpus '{corpus_name}': {str(e)}",
+            "corpus-name": corpus_name,
+        }
+
+
+@instrument_tool
+def delete_documents(
+    corpus_name: str,
+    document_ids: List[str],
+    older_than: str,
+    source_prefix: str,
+    confirm: bool,
+    tool_context: ToolContext,
+) -> dict:
+    """
+    Delete many documents from a corpus in one call, by id or by filter.
+
+    Args:
+        corpus_name (str): The name of the corpus containing the documents
+        document_ids (List[str]): IDs of the documents to delete, as reported by get_corpus_info.
+            May be empty when a filter is given; with a filter, only matching ids are deleted.
+        older_than (str): Only delete documents created before this ISO 8601 date (e.g. 2024-01-31), or empty
+        source_prefix (str): Only delete documents imported from a source starting with this prefix
+            (e.g. gs://bucket/archive/), or empty
+        confirm (bool): Must be True to delete. When False, reports how many documents would be deleted.
+            Deletes of more than BULK_DELETE_BACKGROUND_MIN documents run in the background and return a job id.
+        tool_context (ToolContext): the tool context required by the session and for state management
+
+    Returns:
+        Dict: The number of documents deleted, not found and failed, and the ids that were not deleted,
+        or the job id of a background delete.
+    """
+    document_ids = [document_id for document_id in (document_ids or []) if document_id]
+    if not document_ids and not older_than and not source_prefix:
+        return {
+            "status": "Error",
+            "message": "Provide document_ids, older_than or source_prefix to choose the documents to delete.",
+            "corpus-name": corpus_name,
+        }
+    if not check_corpus_exists(corpus_name, tool_context):
+        return {
+            "status": "Error",
+            "message": f"Corpus '{corpus_name}' does not exist.",
+            "corpus-name": corpus_name,
+        }
+    try:
+        cutoff = _parse_cutoff(older_than) if older_than else None
+    except ValueError:
+        return {
+            "status": "Error",
+            "message": f"Invalid older_than date '{older_than}'. Use an ISO 8601 date such as 2024-01-31.",
+            "corpus-name": corpus_name,
+        }
+
+    try:
+        corpus_resource_name = get_corpus_resource_name(corpus_name)
+        document_ids = list(dict.fromkeys(document_id.split("/")[-1] for document_id in document_ids))
+        files = {}
+        if cutoff is not None or source_prefix:
+            files = _matching_files(corpus_resource_name, cutoff, source_prefix)
+            if document_ids:
+                files = {document_id: files[document_id] for document_id in document_ids if document_id in files}
+            document_ids = list(files)
+
+        if not confirm:
+            return {
+                "status": "Success",
+                "message": f"{len(document_ids)} document(s) in corpus '{corpus_name}' would be deleted. Set confirm to True to delete them.",
+                "corpus-name": corpus_name,
+                "matched": len(document_ids),
+                "sample_ids": document_ids[:BULK_DELETE_REPORTED_IDS],
+                "documents-deleted": False,
+            }
+        if not document_ids:
+            return {
+                "status": "Success",
+                "message": f"No documents in corpus '{corpus_name}' matched; nothing was deleted.",
+                "corpus-name": corpus_name,
+                "requested": 0,
+                "deleted": 0,
+                "not_found": 0,
+                "failed": 0,
+            }
+
+        if len(document_ids) > BULK_DELETE_BACKGROUND_MIN:
+            job = ingest_jobs.submit(
+                corpus_name,
+                len(document_ids),
+                lambda job: delete_files(corpus_name, corpus_resource_name, document_ids, files, job),
+                kind="delete",
+            )
+            remember_job(job.job_id, tool_context)
+            return {
+                "status": "Success",
+                "message": f"Started deleting {len(document_ids)} document(s) from corpus '{corpus_name}' in the background. Use get_ingest_status with job id '{job.job_id}' to follow its progress.",
+                "corpus-name": corpus_name,
+                "job_id": job.job_id,
+                "requested": len(document_ids),
+            }
+        return delete_files(corpus_name, corpus_resource_name, document_ids, files)
+    except Exception as e:
+        return {
+            "status": "Error",
+            "message": f"Failed to delete documents from corpus '{corpus_name}': {str(e)}",
+            "corpus-name": corpus_name,
+        }
@@ -0,0 +1,76 @@
+from google.adk.tools.tool_context import ToolContext
+
+from ..config import CORPUS_INFO_PAGE_SIZE, CORPUS_INFO_RECENT_FILES
+from .corpus_stats import CorpusStats, corpus_stats, file_type, to_epoch
+from .metrics import instrument_tool
+from .registry import corpus_registry
+from .utils import check_corpus_exists, get_corpus_resource_name
+from .vertex_client import rag
+
+
+def collect_corpus_stats(corpus_resource_name: str) -> CorpusStats:
+    """
+    Stream a corpus's file listing page by page into a CorpusStats.
+
+    Only one page of RagFile objects is held at a time, so memory stays flat
+    no matter how many files the corpus has.
+    """
+    stats = CorpusStats()
+    for rag_file in rag.list_files(corpus_name=corpus_resource_name, page_size=CORPUS_INFO_PAGE_SIZE):
+        display_name = getattr(rag_file, "display_name", "") or ""
+        stats.add_file(
+            file_id=rag_file.name.split("/")[-1],
+            size_bytes=int(getattr(rag_file, "size_bytes", 0) or 0),
+            type_=file_type(display_name, getattr(rag_file, "rag_file_type", None)),
+            created=to_epoch(getattr(rag_file, "create_time", None)),
+            display_name=display_name,
+        )
+    return stats
+
+
+@instrument_tool
+def get_corpus_info(corpus_name: str, tool_context: ToolContext, refresh: bool = False) -> dict:
+    """
+    Get file statistics about a specific corpus.
+
+    Args:
+        corpus_name (str): The name of the corpus to get information about
+        tool_context (ToolContext): the tool context required by the session and for state management
+        refresh (bool): Set to True to list the corpus again instead of using the cached statistics (default: False)
+
+    Returns:
+        Dict: The file count, total size, type breakdown, newest and oldest file, and the
+        most recently created files (with the file_id delete_document expects).
+    """
+    if not check_corpus_exists(corpus_name, tool_context):
+        return {
+            "status": "Error",
+            "message": f"Corpus '{corpus_name}' does not exist.",
+            "corpus_name": corpus_name,
+        }
+    try:
+        corpus_resource_name = get_corpus_resource_name(corpus_name)
+        info = None if refresh else corpus_stats.describe(corpus_resource_name, CORPUS_INFO_RECENT_FILES)
+        cached = info is not None
+        if info is None:
+            corpus_stats.store(corpus_resource_name, collect_corpus_stats(corpus_resource_name))
+            info = corpus_stats.describe(corpus_resource_name, CORPUS_INFO_RECENT_FILES)
+
+        metadata = corpus_registry.get(corpus_resource_name) or {}
+        unlisted_msg = ""
+        if info["unlisted_files"]:
+            unlisted_msg = f" ({info['unlisted_files']} recently added file(s) not listed yet, refresh to include them)"
+        return {
+            "status": "Success",
+            "message": f"Corpus '{corpus_name}' contains {info['file_count']} file(s){unlisted_msg}.",
+            "corpus_name": corpus_resource_name,
+            "corpus_display_name": metadata.get("display_name", ""),
+            "cached": cached,
+            **info,
+        }
+    except Exception as e:
+        return {
+            "status": "Error",
+            "message": f"Failed to get information about corpus '{corpus_name}': {str(e)}",
+            "corpus_name": corpus_name,
+        }
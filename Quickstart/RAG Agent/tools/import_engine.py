@@ -0,0 +1,229 @@
+"""
+Batched, concurrent import engine for the RAG tools.
+
+Path lists are split into batches that run on a bounded, process-wide worker
+pool. All imports in the process draw from the shared embedding budget of
+the Vertex client layer, sized to DEFAULT_EMBEDDING_REQUEST_PER_MIN, so
+concurrent sessions share the embedding quota instead of each assuming they
+own all of it. Each batch reserves one embedding request per chunk it is
+expected to produce, estimated from the source sizes when the caller knows
+them (see estimate_embedding_requests).
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from ..config import (
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_SIZE,
+    IMPORT_BATCH_SIZE,
+    IMPORT_BYTES_PER_TOKEN,
+    IMPORT_DEFAULT_CHUNKS_PER_FILE,
+    IMPORT_MAX_WORKERS,
+)
+
+from .metrics import submit_in_context
+from .vertex_client import embedding_budget, rag
+
+logger = logging.getLogger(__name__)
+
+CANCELLED_ERROR = "Cancelled"
+
+
+_import_pool = ThreadPoolExecutor(max_workers=IMPORT_MAX_WORKERS, thread_name_prefix="rag-import")
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one import_files call."""
+
+    index: int
+    paths: List[str]
+    imported: int = 0
+    failed: int = 0
+    skipped: int = 0
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "batch": self.index,
+            "num-of-paths": len(self.paths),
+            "imported": self.imported,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "error": self.error,
+        }
+
+
+@dataclass
+class ImportReport:
+    """Aggregated outcome of all batches of one import."""
+
+    batches: List[BatchResult] = field(default_factory=list)
+
+    @property
+    def imported(self) -> int:
+        return sum(batch.imported for batch in self.batches)
+
+    @property
+    def failed(self) -> int:
+        return sum(batch.failed for batch in self.batches)
+
+    @property
+    def errors(self) -> List[str]:
+        return [batch.error for batch in self.batches if batch.error]
+
+    @property
+    def completed_paths(self) -> List[str]:
+        """Paths of the batches that imported without any error or failed file."""
+        return [
+            path
+            for batch in self.batches
+            if not batch.error and not batch.failed
+            for path in batch.paths
+        ]
+
+    def to_status(
+        self,
+        corpus_name: str,
+        paths: List[str],
+        invalid_paths: List[str],
+        conversions: List[str],
+        skipped_unchanged: int = 0,
+    ) -> dict:
+        """Build the status dict add_data returns to the agent."""
+        if self.batches and len(self.errors) == len(self.batches):
+            return {
+                "status": "error",
+                "message": f"Error adding data to corpus: {self.errors[0]}",
+                "corpus_name": corpus_name,
+                "paths": paths,
+                "batches": [batch.to_dict() for batch in self.batches],
+            }
+
+        conversion_msg = ""
+        if conversions:
+            conversion_msg = " (Converted Google Docs URLs to Drive format)"
+        failed_msg = ""
+        if self.errors:
+            failed_msg = f" ({len(self.errors)} of {len(self.batches)} batch(es) failed)"
+        skipped_msg = ""
+        if skipped_unchanged:
+            skipped_msg = f", skipped {skipped_unchanged} unchanged file(s)"
+
+        return {
+            "status": "success",
+            "message": f"Successfully added {self.imported} file(s) to corpus '{corpus_name}'{skipped_msg}{conversion_msg}{failed_msg}",
+            "corpus_name": corpus_name,
+            "files_added": self.imported,
+            "skipped_unchanged": skipped_unchanged,
+            "paths": paths,
+            "invalid_paths": invalid_paths,
+            "conversions": conversions,
+            "batches": [batch.to_dict() for batch in self.batches],
+        }
+
+
+def estimate_embedding_requests(
+    paths: List[str],
+    sizes: Optional[Dict[str, Optional[int]]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> int:
+    """
+    Estimate the embedding requests importing paths will cost: one per chunk.
+
+    Args:
+        paths (List[str]): Paths of one batch
+        sizes (Dict[str, int], optional): Source size in bytes by path; missing or None if unknown
+        chunk_size (int): Tokens per chunk
+        chunk_overlap (int): Tokens shared by consecutive chunks
+
+    Returns:
+        int: Estimated chunks across all paths; sources of unknown size count
+        as IMPORT_DEFAULT_CHUNKS_PER_FILE chunks.
+    """
+    bytes_per_chunk = IMPORT_BYTES_PER_TOKEN * (chunk_size - chunk_overlap)
+    total = 0
+    for path in paths:
+        size = (sizes or {}).get(path)
+        total += max(1, -(-size // bytes_per_chunk)) if size is not None else IMPORT_DEFAULT_CHUNKS_PER_FILE
+    return total
+
+
+def _import_batch(
+    corpus_resource_name: str,
+    batch: BatchResult,
+    transformation_config,
+    cancel_event: Optional[threading.Event],
+    sizes: Optional[Dict[str, Optional[int]]],
+) -> BatchResult:
+    if cancel_event is not None and cancel_event.is_set():
+        batch.error = CANCELLED_ERROR
+        return batch
+    estimated_requests = estimate_embedding_requests(batch.paths, sizes)
+    with embedding_budget.lease(estimated_requests, cancel_event) as requests_per_min:
+        if requests_per_min is None:
+            batch.error = CANCELLED_ERROR
+            return batch
+        try:
+            import_result = rag.import_files(
+                corpus_resource_name,
+                batch.paths,
+                transformation_config=transformation_config,
+                max_embedding_requests_per_min=requests_per_min,
+            )
+            batch.imported = import_result.imported_rag_files_count
+            batch.failed = getattr(import_result, "failed_rag_files_count", 0) or 0
+            batch.skipped = getattr(import_result, "skipped_rag_files_count", 0) or 0
+        except Exception as e:
+            logger.warning(f"Import batch {batch.index} into {corpus_resource_name} failed: {str(e)}")
+            batch.error = str(e)
+    return batch
+
+
+def import_paths(
+    corpus_resource_name: str,
+    paths: List[str],
+    batch_size: int = IMPORT_BATCH_SIZE,
+    cancel_event: Optional[threading.Event] = None,
+    on_batch: Optional[Callable[[BatchResult], None]] = None,
+    sizes: Optional[Dict[str, Optional[int]]] = None,
+) -> ImportReport:
+    """
+    Import paths into a corpus in concurrent batches.
+
+    Args:
+        corpus_resource_name (str): The full resource name of the corpus
+        paths (List[str]): Validated Google Drive URLs or GCS paths
+        batch_size (int): Number of paths per import_files call
+        cancel_event (threading.Event, optional): Set to stop batches that have not started yet
+        on_batch (Callable, optional): Called with each BatchResult as soon as that batch finishes
+        sizes (Dict[str, int], optional): Source sizes in bytes (None if unknown), used to budget embedding requests
+
+    Returns:
+        ImportReport: The per-batch results, in batch order
+    """
+    transformation_config = rag.TransformationConfig(
+        chunking_config=rag.ChunkingConfig(
+            chunk_size=DEFAULT_CHUNK_SIZE,
+            chunk_overlap=DEFAULT_CHUNK_OVERLAP,
+        ),
+    )
+    batches = [
+        BatchResult(index=index, paths=paths[start:start + batch_size])
+        for index, start in enumerate(range(0, len(paths), batch_size))
+    ]
+    futures = [
+        submit_in_context(
+            _import_pool, _import_batch, corpus_resource_name, batch, transformation_config, cancel_event, sizes
+        )
+        for batch in batches
+    ]
+    if on_batch is not None:
+        for future in futures:
+            future.add_done_callback(lambda done: on_batch(done.result()))
+    return ImportReport(batches=[future.result() for future in futures])
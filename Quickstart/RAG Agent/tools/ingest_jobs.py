@@ -0,0 +1,283 @@
+"""
+Background ingestion jobs for add_data and large delete_documents calls.
+
+Imports of large Drive folders take minutes, so add_data validates its input,
+submits the import as a job and returns the job id straight away.
+delete_documents does the same for deletes of many documents. Jobs run on a
+process-wide worker pool and are kept after they finish, so a later turn (or a
+different session) can poll them with get_ingest_status or stop them with
+cancel_ingest_job.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from google.adk.tools.tool_context import ToolContext
+
+from ..config import INGEST_JOB_MAX_WORKERS, INGEST_JOB_RETENTION_SECONDS, INGEST_JOB_SESSION_HISTORY
+from .import_engine import CANCELLED_ERROR, BatchResult
+from .metrics import instrument_tool, submit_in_context
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+
+@dataclass
+class IngestJob:
+    """Progress and outcome of one background import or delete."""
+
+    job_id: str
+    corpus_name: str
+    total_paths: int
+    kind: str = "import"
+    state: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    total_batches: int = 0
+    batches_done: int = 0
+    imported: int = 0
+    failed: int = 0
+    skipped_unchanged: int = 0
+    errors: List[str] = field(default_factory=list)
+    result: Optional[dict] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def set_plan(self, total_batches: int, skipped_unchanged: int) -> None:
+        """Record how many batches the import will run and how many paths it skipped."""
+        with self._lock:
+            self.total_batches = total_batches
+            self.skipped_unchanged = skipped_unchanged
+
+    def start(self) -> bool:
+        """Mark the job running, or cancelled if a cancel arrived while it was queued. Returns whether to run it."""
+        with self._lock:
+            if self.cancel_event.is_set():
+                self.state = "cancelled"
+                self.finished_at = time.time()
+                return False
+            self.state = "running"
+            self.started_at = time.time()
+            return True
+
+    def finish(self, result: Optional[dict], error: Optional[str] = None) -> None:
+        """Store the final status dict (or the exception that ended the job) and set the finished state."""
+        with self._lock:
+            self.result = result
+            if error is not None:
+                self.errors.append(error)
+                self.state = "failed"
+            # A cancel that arrived after every batch had started changes nothing
+            elif self.cancel_event.is_set() and any(e.endswith(CANCELLED_ERROR) for e in self.errors):
+                self.state = "cancelled"
+            elif str(result.get("status", "")).lower() == "error":
+                self.state = "failed"
+            else:
+                self.state = "succeeded"
+            self.finished_at = time.time()
+
+    def request_cancel(self) -> bool:
+        """Set the cancel event unless the job already finished. Returns whether it was still running."""
+        with self._lock:
+            if self.state in FINISHED_STATES:
+                return False
+            self.cancel_event.set()
+            return True
+
+    @property
+    def finished(self) -> bool:
+        with self._lock:
+            return self.state in FINISHED_STATES
+
+    def finished_before(self, cutoff: float) -> bool:
+        with self._lock:
+            return self.finished_at is not None and self.finished_at < cutoff
+
+    def record_batch(self, batch: BatchResult) -> None:
+        """Fold one finished batch into the running totals."""
+        with self._lock:
+            self.batches_done += 1
+            self.imported += batch.imported
+            self.failed += batch.failed
+            if batch.error:
+                self.errors.append(f"Batch {batch.index}: {batch.error}")
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "kind": self.kind,
+                "corpus_name": self.corpus_name,
+                "state": self.state,
+                "total_paths": self.total_paths,
+                "batches_done": self.batches_done,
+                "total_batches": self.total_batches,
+                "deleted" if self.kind == "delete" else "imported": self.imported,
+                "failed": self.failed,
+                "skipped_unchanged": self.skipped_unchanged,
+                "errors": self.errors[:10],
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "result": self.result,
+            }
+
+
+class IngestJobManager:
+    """Runs ingest jobs on a bounded pool and keeps finished jobs for INGEST_JOB_RETENTION_SECONDS."""
+
+    def __init__(self, max_workers: int = INGEST_JOB_MAX_WORKERS, retention: float = INGEST_JOB_RETENTION_SECONDS):
+        self.retention = retention
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-ingest-job")
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention
+        with self._lock:
+            for job_id in [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_before(cutoff)
+            ]:
+                del self._jobs[job_id]
+
+    def submit(
+        self, corpus_name: str, total_paths: int, run: Callable[[IngestJob], dict], kind: str = "import"
+    ) -> IngestJob:
+        """
+        Start a job in the background.
+
+        Args:
+            corpus_name (str): The corpus the job imports into or deletes from
+            total_paths (int): Number of paths (or document ids) the job will process
+            run (Callable): Does the work, reporting progress on the job, and returns the final status dict
+            kind (str): "import" or "delete"; delete jobs report their count as "deleted"
+        """
+        self._prune()
+        job = IngestJob(
+            job_id=f"ingest-{uuid.uuid4().hex[:12]}", corpus_name=corpus_name, total_paths=total_paths, kind=kind
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+        submit_in_context(self._pool, self._run, job, run)
+        return job
+
+    def _run(self, job: IngestJob, run: Callable[[IngestJob], dict]) -> None:
+        # Job fields are read by get_ingest_status from other threads, so all writes go through the job's lock
+        if not job.start():
+            return
+        try:
+            result = run(job)
+        except Exception as e:
+            logger.error(f"Ingest job {job.job_id} failed: {str(e)}")
+            job.finish(None, error=str(e))
+            return
+        job.finish(result)
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        """Ask a job to stop. Batches already submitted to Vertex AI still finish."""
+        job = self.get(job_id)
+        if job is not None:
+            job.request_cancel()
+        return job
+
+
+ingest_jobs = IngestJobManager()
+
+
+def remember_job(job_id: str, tool_context: ToolContext) -> None:
+    """
+    Record a job id in the session state so later turns can find it.
+    Ids of jobs that have expired are dropped, and only the last INGEST_JOB_SESSION_HISTORY ids are kept.
+    """
+    known = [
+        known_id for known_id in tool_context.state.get("ingest_jobs", [])
+        if known_id != job_id and ingest_jobs.get(known_id) is not None
+    ]
+    tool_context.state["ingest_jobs"] = [*known, job_id][-INGEST_JOB_SESSION_HISTORY:]
+    tool_context.state["last_ingest_job"] = job_id
+
+
+@instrument_tool
+def get_ingest_status(job_id: str, tool_context: ToolContext) -> dict:
+    """
+    Report the progress of background jobs started by add_data or delete_documents.
+
+    Args:
+        job_id (str): The job id returned by add_data or delete_documents. If empty, all jobs of this session are reported.
+        tool_context (ToolContext): the tool context required by the session and for state management
+
+    Returns:
+        Dict: The state, progress, imported/failed counts and errors of the job(s).
+    """
+    job_ids = [job_id] if job_id else list(tool_context.state.get("ingest_jobs", []))
+    if not job_ids:
+        return {
+            "status": "Error",
+            "message": "No ingestion jobs have been started in this session.",
+            "jobs": [],
+        }
+    jobs = []
+    unknown = []
+    for requested_id in job_ids:
+        job = ingest_jobs.get(requested_id)
+        if job is None:
+            unknown.append(requested_id)
+        else:
+            jobs.append(job.to_dict())
+    if not jobs:
+        return {
+            "status": "Error",
+            "message": f"Unknown or expired ingestion job(s): {', '.join(unknown)}",
+            "jobs": [],
+        }
+    return {
+        "status": "Success",
+        "message": f"Status of {len(jobs)} ingestion job(s).",
+        "jobs": jobs,
+        "unknown_jobs": unknown,
+    }
+
+
+@instrument_tool
+def cancel_ingest_job(job_id: str, tool_context: ToolContext) -> dict:
+    """
+    Cancel a background job started by add_data or delete_documents.
+
+    Args:
+        job_id (str): The job id returned by add_data or delete_documents
+        tool_context (ToolContext): the tool context required by the session and for state management
+
+    Returns:
+        Dict: The status of the cancellation request and the job's current progress.
+    """
+    job = ingest_jobs.cancel(job_id)
+    if job is None:
+        return {
+            "status": "Error",
+            "message": f"Unknown or expired ingestion job '{job_id}'.",
+            "job_id": job_id,
+        }
+    snapshot = job.to_dict()
+    if snapshot["state"] in FINISHED_STATES:
+        return {
+            "status": "Error",
+            "message": f"Ingestion job '{job_id}' already finished with state '{snapshot['state']}'.",
+            "job": snapshot,
+        }
+    return {
+        "status": "Success",
+        "message": f"Cancellation requested for ingestion job '{job_id}'. Batches already submitted will still finish.",
+        "job": snapshot,
+    }
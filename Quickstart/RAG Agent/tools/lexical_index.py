@@ -0,0 +1,501 @@
+"""
+Local BM25 index for exact-term retrieval next to Vertex AI vector search.
+
+Vector retrieval tends to miss exact identifiers such as ticket numbers, SKUs
+and error codes. add_data therefore also fetches the text of the sources it
+imports, cuts it into chunks with the same size and overlap as the import, and
+indexes the chunks here. rag_query fuses the BM25 hits with the vector hits by
+reciprocal rank fusion.
+
+Postings are stored per term as two array('I') columns (chunk ids and term
+frequencies), 8 bytes per posting. Deleted chunks are tombstoned and dropped
+when the index is saved with too many of them.
+
+Each corpus's index is persisted under LEXICAL_INDEX_DIR as a .npz snapshot
+(postings plus the chunk texts as one UTF-8 byte array) and a .log append log.
+A batch of adds or deletes appends its changes to the log; the snapshot is
+only rewritten, and the log emptied, once the log outgrows a fraction of it.
+Loading replays the log over the snapshot. Log entries are idempotent, so a
+crash between writing a snapshot and emptying the log is harmless.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+
+from ..config import (
+    BM25_B,
+    BM25_K1,
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_TOP_K,
+    LEXICAL_FETCH_WORKERS,
+    LEXICAL_INDEX_DIR,
+    LEXICAL_MAX_SOURCE_BYTES,
+)
+from .chunk_preview import TOKEN_PATTERN, iter_windows
+from .utils import DRIVE_URL_PATTERN
+from .vertex_client import authorized_session
+
+logger = logging.getLogger(__name__)
+
+# Identifiers like TICKET-4521, v2.3.1 or a/b/c are kept whole and also split into their parts
+TERM_PATTERN = re.compile(r"\w+(?:[-./:#]\w+)*")
+_TERM_SEPARATOR_PATTERN = re.compile(r"[-./:#_]")
+
+TEXT_EXTENSIONS = (".txt", ".md", ".csv", ".tsv", ".json", ".jsonl", ".html", ".htm", ".xml", ".log", ".yaml", ".yml")
+DRIVE_EXPORT_TYPES = {
+    "application/vnd.google-apps.document": "text/plain",
+    "application/vnd.google-apps.presentation": "text/plain",
+    "application/vnd.google-apps.spreadsheet": "text/csv",
+}
+COMPACT_DEAD_FRACTION = 0.25
+# The snapshot is rewritten once the append log outgrows this fraction of it and LOG_COMPACT_MIN_BYTES
+LOG_COMPACT_FRACTION = 0.5
+LOG_COMPACT_MIN_BYTES = 1 << 20
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into case-folded BM25 terms."""
+    terms = TERM_PATTERN.findall(text.casefold())
+    for term in terms[:]:
+        if not term.isalnum():
+            terms.extend(part for part in _TERM_SEPARATOR_PATTERN.split(term) if part)
+    return terms
+
+
+def chunk_text(text: str) -> Iterator[str]:
+    """Cut text into chunks with the DEFAULT_CHUNK_SIZE/DEFAULT_CHUNK_OVERLAP token windows add_data uses."""
+    data = text.encode("utf-8")
+    spans = (match.span() for match in TOKEN_PATTERN.finditer(data))
+    for start, end, _ in iter_windows(spans, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP):
+        yield data[start:end].decode("utf-8", errors="ignore")
+
+
+def fetch_source_text(uri: str) -> Optional[str]:
+    """
+    Download the text of a GCS object or Drive file for lexical indexing.
+
+    Only text formats are fetched: GCS objects with a text extension, Google
+    Docs/Slides/Sheets (exported as text or CSV) and Drive files with a text
+    MIME type. At most LEXICAL_MAX_SOURCE_BYTES are read.
+
+    Returns:
+        Optional[str]: The text, or None if the source is not text or could not be read.
+    """
+    byte_range = {"Range": f"bytes=0-{LEXICAL_MAX_SOURCE_BYTES - 1}"}
+    try:
+        if uri.startswith("gs://"):
+            if not uri.lower().endswith(TEXT_EXTENSIONS):
+                return None
+            bucket, _, name = uri[len("gs://"):].partition("/")
+            response = authorized_session().get(
+                f"https://storage.googleapis.com/storage/v1/b/{bucket}/o/{quote(name, safe='')}",
+                params={"alt": "media"},
+                headers=byte_range,
+            )
+        else:
+            drive_match = DRIVE_URL_PATTERN.match(uri)
+            if not drive_match:
+                return None
+            file_url = f"https://www.googleapis.com/drive/v3/files/{drive_match.group(1)}"
+            meta = authorized_session().get(file_url, params={"fields": "mimeType", "supportsAllDrives": "true"})
+            meta.raise_for_status()
+            mime_type = meta.json().get("mimeType", "")
+            if mime_type in DRIVE_EXPORT_TYPES:
+                response = authorized_session().get(f"{file_url}/export", params={"mimeType": DRIVE_EXPORT_TYPES[mime_type]})
+            elif mime_type.startswith("text/") or mime_type == "application/json":
+                response = authorized_session().get(
+                    file_url, params={"alt": "media", "supportsAllDrives": "true"}, headers=byte_range
+                )
+            else:
+                return None
+        response.raise_for_status()
+        return response.content[:LEXICAL_MAX_SOURCE_BYTES].decode("utf-8", errors="ignore")
+    except Exception as e:
+        logger.warning(f"Could not fetch text of {uri} for the lexical index: {str(e)}")
+    return None
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the chunks of one corpus, with incremental adds and deletes.
+
+    Args:
+        k1 (float): Term frequency saturation
+        b (float): Length normalization
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        # Changes not yet written to disk, as append log entries
+        self._journal: List[dict] = []
+        self._reset()
+
+    def _reset(self) -> None:
+        self._term_ids: Dict[str, int] = {}
+        self._postings_chunks: List[array] = []
+        self._postings_tfs: List[array] = []
+        self._df = array("I")
+        self._chunk_lengths = array("I")
+        self._alive = bytearray()
+        self._chunks: List[Tuple[str, str]] = []
+        self._chunks_by_source: Dict[str, List[int]] = {}
+        self._live_chunks = 0
+        self._live_length = 0
+
+    def __len__(self) -> int:
+        return self._live_chunks
+
+    @property
+    def dead_fraction(self) -> float:
+        return 1.0 - self._live_chunks / len(self._chunks) if self._chunks else 0.0
+
+    def _add_chunk(self, source_uri: str, text: str) -> None:
+        chunk_id = len(self._chunks)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                term_id = self._term_ids[term] = len(self._postings_chunks)
+                self._postings_chunks.append(array("I"))
+                self._postings_tfs.append(array("I"))
+                self._df.append(0)
+            self._postings_chunks[term_id].append(chunk_id)
+            self._postings_tfs[term_id].append(tf)
+            self._df[term_id] += 1
+        length = sum(counts.values())
+        self._chunk_lengths.append(length)
+        self._alive.append(1)
+        self._chunks.append((source_uri, text))
+        self._chunks_by_source.setdefault(source_uri, []).append(chunk_id)
+        self._live_chunks += 1
+        self._live_length += length
+
+    def add_source(self, source_uri: str, text: str) -> int:
+        """Index the text of a source, replacing what was indexed for it before. Returns the chunk count."""
+        with self._lock:
+            added = self._add_source(source_uri, text)
+            self._journal.append({"add": source_uri, "text": text})
+            return added
+
+    def _add_source(self, source_uri: str, text: str) -> int:
+        self._delete_source(source_uri)
+        added = 0
+        for chunk in chunk_text(text):
+            self._add_chunk(source_uri, chunk)
+            added += 1
+        return added
+
+    def delete_source(self, source_uri: str) -> int:
+        """Tombstone every chunk of a source. Returns the number of chunks removed."""
+        with self._lock:
+            removed = self._delete_source(source_uri)
+            if removed:
+                self._journal.append({"delete": source_uri})
+            return removed
+
+    def _delete_source(self, source_uri: str) -> int:
+        with self._lock:
+            chunk_ids = self._chunks_by_source.pop(source_uri, [])
+            for chunk_id in chunk_ids:
+                self._alive[chunk_id] = 0
+                for term in set(tokenize(self._chunks[chunk_id][1])):
+                    self._df[self._term_ids[term]] -= 1
+                self._live_chunks -= 1
+                self._live_length -= self._chunk_lengths[chunk_id]
+            return len(chunk_ids)
+
+    def delete_file(self, source_uris: Iterable[str], display_name: str = "") -> int:
+        """
+        Remove the sources of a deleted RagFile.
+
+        If none of its source URIs is indexed, fall back to the one indexed
+        source whose file name equals the display name, if exactly one does.
+        """
+        with self._lock:
+            removed = sum(self.delete_source(uri) for uri in source_uris if uri in self._chunks_by_source)
+            if removed or not display_name:
+                return removed
+            candidates = [uri for uri in self._chunks_by_source if uri.rstrip("/").rsplit("/", 1)[-1] == display_name]
+            return self.delete_source(candidates[0]) if len(candidates) == 1 else 0
+
+    def search(self, query: str, top_k: int = DEFAULT_TOP_K) -> List[dict]:
+        """
+        Return the top_k chunks by BM25 score.
+
+        Returns:
+            List[dict]: Entries with source_uri, source_name, text and score, best first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            if not self._live_chunks or not terms:
+                return []
+            live_chunks = self._live_chunks
+            average_length = self._live_length / live_chunks or 1.0
+            lengths = np.frombuffer(self._chunk_lengths, dtype=np.uint32)
+            scores = np.zeros(len(lengths), dtype=np.float64)
+            for term in terms:
+                term_id = self._term_ids.get(term)
+                if term_id is None or not self._df[term_id]:
+                    continue
+                df = self._df[term_id]
+                idf = math.log(1.0 + (live_chunks - df + 0.5) / (df + 0.5))
+                chunk_ids = np.frombuffer(self._postings_chunks[term_id], dtype=np.uint32)
+                tfs = np.frombuffer(self._postings_tfs[term_id], dtype=np.uint32).astype(np.float64)
+                norm = self.k1 * (1.0 - self.b + self.b * lengths[chunk_ids] / average_length)
+                scores[chunk_ids] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+            scores[np.frombuffer(self._alive, dtype=np.uint8) == 0] = 0.0
+            candidates = np.flatnonzero(scores > 0)
+            if not len(candidates):
+                return []
+            k = min(top_k, len(candidates))
+            best = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            best = best[np.argsort(-scores[best])]
+            results = []
+            for chunk_id in best:
+                source_uri, text = self._chunks[chunk_id]
+                results.append({
+                    "source_uri": source_uri,
+                    "source_name": source_uri.rstrip("/").rsplit("/", 1)[-1],
+                    "text": text,
+                    "score": float(scores[chunk_id]),
+                })
+            return results
+
+    def compact(self) -> None:
+        """Rebuild the postings without the tombstoned chunks."""
+        with self._lock:
+            live = [chunk for chunk_id, chunk in enumerate(self._chunks) if self._alive[chunk_id]]
+            self._reset()
+            for source_uri, text in live:
+                self._add_chunk(source_uri, text)
+
+    def save(self, path: str) -> None:
+        """Write a full .npz snapshot, compacting first if many chunks are dead, and empty the append log."""
+        with self._lock:
+            if self.dead_fraction > COMPACT_DEAD_FRACTION:
+                self.compact()
+            lengths = [len(postings) for postings in self._postings_chunks]
+            offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            source_ids = {}
+            chunk_sources = array("I", (source_ids.setdefault(uri, len(source_ids)) for uri, _ in self._chunks))
+            texts = [text.encode("utf-8") for _, text in self._chunks]
+            text_offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+            np.cumsum([len(text) for text in texts], out=text_offsets[1:])
+            meta = {"k1": self.k1, "b": self.b, "terms": list(self._term_ids), "sources": list(source_ids)}
+            arrays = {
+                "meta": np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+                "offsets": offsets,
+                "postings_chunks": np.frombuffer(b"".join(p.tobytes() for p in self._postings_chunks), dtype=np.uint32),
+                "postings_tfs": np.frombuffer(b"".join(p.tobytes() for p in self._postings_tfs), dtype=np.uint32),
+                "df": np.frombuffer(self._df.tobytes(), dtype=np.uint32),
+                "chunk_lengths": np.frombuffer(self._chunk_lengths.tobytes(), dtype=np.uint32),
+                "alive": np.frombuffer(bytes(self._alive), dtype=np.uint8),
+                "chunk_sources": np.frombuffer(chunk_sources.tobytes(), dtype=np.uint32),
+                "texts": np.frombuffer(b"".join(texts), dtype=np.uint8),
+                "text_offsets": text_offsets,
+            }
+            self._journal = []
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file and rename so a crash never leaves a torn index
+            with open(path + ".tmp", "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(path + ".tmp", path)
+            if os.path.exists(log_path(path)):
+                os.remove(log_path(path))
+
+    def flush(self, path: str) -> None:
+        """
+        Persist the changes made since the last flush by appending them to the log.
+
+        The snapshot is rewritten instead once the log would outgrow
+        LOG_COMPACT_FRACTION of it (and LOG_COMPACT_MIN_BYTES).
+        """
+        with self._lock:
+            if not self._journal:
+                return
+            entries = "".join(json.dumps(entry) + "\n" for entry in self._journal).encode("utf-8")
+            log_size = os.path.getsize(log_path(path)) if os.path.exists(log_path(path)) else 0
+            snapshot_size = os.path.getsize(path) if os.path.exists(path) else 0
+            if log_size + len(entries) > max(LOG_COMPACT_MIN_BYTES, LOG_COMPACT_FRACTION * snapshot_size):
+                self.save(path)
+                return
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(log_path(path), "ab") as f:
+                f.write(entries)
+            self._journal = []
+
+    def _replay(self, path: str) -> None:
+        """Apply the entries of an append log; a torn last line from a crash is skipped."""
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping a torn entry at the end of {path}")
+                    break
+                if "add" in entry:
+                    self._add_source(entry["add"], entry["text"])
+                else:
+                    self._delete_source(entry["delete"])
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Load the snapshot at path, if any, and replay its append log."""
+        if not os.path.exists(path):
+            index = cls()
+            index._replay(log_path(path))
+            return index
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            offsets = data["offsets"]
+            postings_chunks = data["postings_chunks"]
+            postings_tfs = data["postings_tfs"]
+            index = cls(meta["k1"], meta["b"])
+            for term_id, term in enumerate(meta["terms"]):
+                start, end = offsets[term_id], offsets[term_id + 1]
+                index._term_ids[term] = term_id
+                index._postings_chunks.append(array("I", postings_chunks[start:end].tobytes()))
+                index._postings_tfs.append(array("I", postings_tfs[start:end].tobytes()))
+            index._df = array("I", data["df"].tobytes())
+            index._chunk_lengths = array("I", data["chunk_lengths"].tobytes())
+            index._alive = bytearray(data["alive"].tobytes())
+            if "texts" in data:
+                texts = data["texts"].tobytes()
+                text_offsets = data["text_offsets"].tolist()
+                sources = meta["sources"]
+                index._chunks = [
+                    (sources[source_id], texts[text_offsets[chunk_id]:text_offsets[chunk_id + 1]].decode("utf-8"))
+                    for chunk_id, source_id in enumerate(data["chunk_sources"].tolist())
+                ]
+            else:
+                # Snapshots written before the texts moved out of the metadata
+                index._chunks = [tuple(chunk) for chunk in meta["chunks"]]
+        for chunk_id, (source_uri, _) in enumerate(index._chunks):
+            if index._alive[chunk_id]:
+                index._chunks_by_source.setdefault(source_uri, []).append(chunk_id)
+                index._live_chunks += 1
+                index._live_length += index._chunk_lengths[chunk_id]
+        if os.path.exists(log_path(path)):
+            index._replay(log_path(path))
+        return index
+
+
+def log_path(path: str) -> str:
+    """The append log that goes with the .npz snapshot at path."""
+    return os.path.splitext(path)[0] + ".log"
+
+
+class LexicalIndexStore:
+    """
+    Per-corpus BM25 indexes, loaded lazily from and saved to LEXICAL_INDEX_DIR.
+
+    Args:
+        directory (str): Where the .npz snapshots and .log append logs live
+        fetcher (Callable): Function returning the text of a source URI, or None
+    """
+
+    def __init__(
+        self,
+        directory: str = LEXICAL_INDEX_DIR,
+        fetcher: Callable[[str], Optional[str]] = fetch_source_text,
+    ):
+        self.directory = directory
+        self.fetcher = fetcher
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, Optional[BM25Index]] = {}
+
+    def _path(self, corpus_resource_name: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^a-zA-Z0-9_-]", "_", corpus_resource_name) + ".npz")
+
+    def get(self, corpus_resource_name: str, create: bool = False) -> Optional[BM25Index]:
+        """Return the index of a corpus, loading it from disk on first use. Corpora without one return None."""
+        with self._lock:
+            if corpus_resource_name not in self._indexes:
+                path = self._path(corpus_resource_name)
+                exists = os.path.exists(path) or os.path.exists(log_path(path))
+                self._indexes[corpus_resource_name] = BM25Index.load(path) if exists else None
+            index = self._indexes[corpus_resource_name]
+            if index is None and create:
+                index = self._indexes[corpus_resource_name] = BM25Index()
+            return index
+
+    def save(self, corpus_resource_name: str) -> None:
+        """Persist a corpus's index changes since its last save."""
+        index = self.get(corpus_resource_name)
+        if index is not None:
+            index.flush(self._path(corpus_resource_name))
+
+    def drop(self, corpus_resource_name: str) -> None:
+        """Forget a corpus's index and delete its files."""
+        with self._lock:
+            self._indexes[corpus_resource_name] = None
+            path = self._path(corpus_resource_name)
+            for file_path in (path, log_path(path)):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+
+    def index_sources(self, corpus_resource_name: str, uris: List[str]) -> int:
+        """
+        Fetch and index the text of imported sources, saving the index after each window of them.
+
+        Sources are fetched LEXICAL_FETCH_WORKERS at a time and indexed as they
+        arrive, and each window's texts are appended to the log before the next
+        window is fetched, so only a few source texts are held in memory at once.
+
+        Returns:
+            int: The number of sources that had text and were indexed
+        """
+        index = self.get(corpus_resource_name, create=True)
+        indexed = 0
+        window = LEXICAL_FETCH_WORKERS * 4
+        with ThreadPoolExecutor(max_workers=LEXICAL_FETCH_WORKERS, thread_name_prefix="rag-lexical") as pool:
+            for start in range(0, len(uris), window):
+                batch = uris[start:start + window]
+                for uri, text in zip(batch, pool.map(self.fetcher, batch)):
+                    if text:
+                        index.add_source(uri, text)
+                        indexed += 1
+                self.save(corpus_resource_name)
+        return indexed
+
+    def remove_files(self, corpus_resource_name: str, files: Iterable[Tuple[List[str], str]]) -> int:
+        """
+        Remove deleted RagFiles from a corpus's index and save the removals in one log append.
+
+        Args:
+            files: (source URIs, display name) of each deleted file
+
+        Returns:
+            int: The number of chunks removed
+        """
+        index = self.get(corpus_resource_name)
+        if index is None:
+            return 0
+        removed = sum(index.delete_file(source_uris, display_name) for source_uris, display_name in files)
+        if removed:
+            self.save(corpus_resource_name)
+        return removed
+
+    def search(self, corpus_resource_name: str, query: str, top_k: int = DEFAULT_TOP_K) -> List[dict]:
+        index = self.get(corpus_resource_name)
+        return index.search(query, top_k) if index is not None else []
+
+
+lexical_indexes = LexicalIndexStore()
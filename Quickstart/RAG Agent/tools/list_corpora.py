@@ -1,35 +1,131 @@
-from vertexai import rag
+import base64
+import json
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
 
-def list_corposa()-> dict:
+from ..config import DEFAULT_LIST_PAGE_SIZE, MAX_LIST_PAGE_SIZE
+from .metrics import instrument_tool
+from .vertex_client import rag
+
+CORPUS_FIELDS = ("corpus_name", "display_name", "create_time", "update_time")
+
+
+def _encode_page_token(server_token: str, offset: int) -> str:
+    """Pack a server page token and an offset inside that page into one opaque token."""
+    raw = json.dumps([server_token, offset]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_page_token(page_token: str) -> Tuple[str, int]:
+    """Reverse of _encode_page_token. An empty token starts from the beginning."""
+    if not page_token:
+        return "", 0
+    server_token, offset = json.loads(base64.urlsafe_b64decode(page_token.encode("ascii")))
+    return server_token, int(offset)
+
+
+def _iter_corpora(page_token: str, page_size: int) -> Iterator[Tuple[object, str]]:
+    """
+    Stream corpora one server page at a time, starting at page_token.
+
+    Yields (corpus, resume_token) pairs, where resume_token continues the listing
+    right after that corpus, or is "" if it was the last one.
+    """
+    server_token, offset = _decode_page_token(page_token)
+    pager = rag.list_corpora(page_size=page_size, page_token=server_token or None)
+
+    pages = getattr(pager, "pages", None)
+    if pages is None:
+        # Not a paged response: walk the iterable and resume by position
+        corpora = iter(pager)
+        corpus = next(islice(corpora, offset, None), None)
+        index = offset
+        while corpus is not None:
+            following = next(corpora, None)
+            index += 1
+            yield corpus, _encode_page_token(server_token, index) if following is not None else ""
+            corpus = following
+        return
+
+    current_token = server_token
+    for page in pages:
+        page_corpora = page.rag_corpora
+        next_token = page.next_page_token
+        for index in range(offset, len(page_corpora)):
+            if index + 1 < len(page_corpora):
+                resume_token = _encode_page_token(current_token, index + 1)
+            elif next_token:
+                resume_token = _encode_page_token(next_token, 0)
+            else:
+                resume_token = ""
+            yield page_corpora[index], resume_token
+        offset = 0
+        current_token = next_token
+
+
+@instrument_tool
+def list_corposa(
+    page_size: int = DEFAULT_LIST_PAGE_SIZE,
+    page_token: str = "",
+    name_prefix: str = "",
+    fields: Optional[List[str]] = None,
+) -> dict:
     """
-    List all available corpora in the Vertex AI RAG system.
-    
+    List available corpora in the Vertex AI RAG system, one page at a time.
+
     Args:
-        None
-    
+        page_size (int): Maximum number of corpora to return in this page
+        page_token (str): The next_page_token returned by a previous call, or empty to start from the beginning
+        name_prefix (str): Only return corpora whose display name starts with this prefix
+        fields (List[str], optional): Fields to include for each corpus, any of
+            corpus_name, display_name, create_time, update_time. Defaults to all of them.
+
     Returns:
         dict: A dictionary containing the status of corpora with each corpus containing:
             - corpus_name: The name of the corpus
             - display_name: The human readable name of the corpus
             - create_time: Time of creation of the corpus
-            - update_time: Time of last update of the corpus    
+            - update_time: Time of last update of the corpus
+            and a next_page_token that is empty when there are no more corpora.
     """
+    fields = list(fields) if fields else list(CORPUS_FIELDS)
+    unknown_fields = [field for field in fields if field not in CORPUS_FIELDS]
+    if unknown_fields:
+        return {
+            "status": "Error",
+            "message": f"Unknown corpus fields: {', '.join(unknown_fields)}. Valid fields are: {', '.join(CORPUS_FIELDS)}.",
+            "num-of-corpus": 0,
+            "corpora": [],
+            "next_page_token": "",
+        }
+    page_size = max(1, min(int(page_size), MAX_LIST_PAGE_SIZE))
+
     try:
-        corpora = rag.list_corpora()
-        
         corpus_info = []
-        for corpus in corpora:
-            corpus_info.append({
+        next_page_token = ""
+        for corpus, resume_token in _iter_corpora(page_token, page_size):
+            display_name = getattr(corpus, "display_name", "")
+            if name_prefix and not display_name.startswith(name_prefix):
+                continue
+            record = {
                 "corpus_name": corpus.name,
-                "display_name": corpus.display_name,
+                "display_name": display_name,
                 "create_time": corpus.create_time if hasattr(corpus, "create_time") else "",
                 "update_time": corpus.update_time if hasattr(corpus, "update_time") else "",
-            })    
+            }
+            corpus_info.append({field: record[field] for field in fields})
+            next_page_token = resume_token
+            if len(corpus_info) >= page_size:
+                break
+        else:
+            next_page_token = ""
+
         return {
             "status": "Success",
             "message": "List of corpora retrieved successfully.",
             "num-of-corpus": len(corpus_info),
             "corpora": corpus_info,
+            "next_page_token": next_page_token,
         }
     except Exception as e:
         return {
@@ -37,4 +133,5 @@ def list_corposa()-> dict:
             "message": f"Failed to list corpora: {str(e)}",
             "num-of-corpus": 0,
             "corpora": [],
-        }
\ No newline at end of file
+            "next_page_token": "",
+        }
@@ -0,0 +1,291 @@
+"""
+In-process vector store that rag_query can target instead of Vertex AI RAG.
+
+Vectors live in one contiguous, L2-normalized float32 matrix, so a cosine
+search is a single matrix-vector product. Above LOCAL_IVF_MIN_SIZE vectors an
+IVF index (k-means coarse centroids) restricts the search to the vectors of the
+closest LOCAL_IVF_NPROBE lists. Embeddings come from a pluggable function, so
+the store runs fully offline with hashing_embedder.
+
+Local corpora are filled by the add_local_data tool and registered under the
+corpus resource name, so rag_query finds the store whichever form of the name
+(display name or resource name) the model passes.
+"""
+
+import hashlib
+import re
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from ..config import (
+    DEFAULT_EMBEDDING_MODEL,
+    DEFAULT_THRESHOLD_DISTANCE,
+    DEFAULT_TOP_K,
+    IMPORT_BYTES_PER_TOKEN,
+    LOCAL_EMBED_BATCH_SIZE,
+    LOCAL_EMBED_MAX_TOKENS,
+    LOCAL_IVF_MIN_SIZE,
+    LOCAL_IVF_NPROBE,
+    LOCAL_STORE_EMBEDDER,
+)
+from .utils import get_corpus_resource_name
+
+EmbedFn = Callable[[List[str]], np.ndarray]
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def hashing_embedder(dim: int = 256) -> EmbedFn:
+    """
+    Build an offline embedding function based on feature hashing of words.
+
+    Texts sharing words get similar vectors, which is enough to exercise and
+    benchmark the store without any network access.
+    """
+
+    def embed(texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _WORD_PATTERN.findall(text.lower()):
+                digest = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+                vectors[row, digest % dim] += 1.0 if digest >> 63 else -1.0
+        return vectors
+
+    return embed
+
+
+def embedding_batches(
+    texts: List[str],
+    max_items: int = LOCAL_EMBED_BATCH_SIZE,
+    max_tokens: int = LOCAL_EMBED_MAX_TOKENS,
+) -> Iterator[List[str]]:
+    """Split texts into requests of at most max_items texts and max_tokens estimated tokens."""
+    batch = []
+    tokens = 0
+    for text in texts:
+        text_tokens = -(-len(text.encode("utf-8")) // IMPORT_BYTES_PER_TOKEN)
+        if batch and (len(batch) >= max_items or tokens + text_tokens > max_tokens):
+            yield batch
+            batch = []
+            tokens = 0
+        batch.append(text)
+        tokens += text_tokens
+    if batch:
+        yield batch
+
+
+def vertex_embedder(model_name: str = DEFAULT_EMBEDDING_MODEL) -> EmbedFn:
+    """Build an embedding function backed by the Vertex AI text embedding model."""
+    from vertexai.language_models import TextEmbeddingModel
+
+    from .vertex_client import embedding_budget, vertex_client
+
+    model = TextEmbeddingModel.from_pretrained(model_name.split("/")[-1])
+
+    def embed(texts: List[str]) -> np.ndarray:
+        values = []
+        for batch in embedding_batches(texts):
+            # Drawn from the same budget as corpus imports, and limited and retried like other SDK calls
+            embedding_budget.acquire(1)
+            embeddings = vertex_client.call("get_embeddings", model.get_embeddings, batch)
+            values.extend(embedding.values for embedding in embeddings)
+        return np.asarray(values, dtype=np.float32)
+
+    return embed
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class LocalVectorStore:
+    """
+    Brute-force cosine search over a float32 matrix, with an IVF index for large stores.
+
+    Args:
+        embed_fn (EmbedFn): Maps a list of texts to an (n, dim) array
+        ivf_min_size (int): Number of live vectors from which the IVF index is used
+        n_probe (int): Number of IVF lists searched per query
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        ivf_min_size: int = LOCAL_IVF_MIN_SIZE,
+        n_probe: int = LOCAL_IVF_NPROBE,
+    ):
+        self.embed_fn = embed_fn
+        self.ivf_min_size = ivf_min_size
+        self.n_probe = n_probe
+        self._lock = threading.RLock()
+        self._vectors: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._records: List[dict] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._indexed_size = 0
+
+    def __len__(self) -> int:
+        return len(self._row_by_id)
+
+    def _reserve(self, extra: int, dim: int) -> None:
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        needed = self._size + extra
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 1024)
+        vectors = np.zeros((new_capacity, dim), dtype=np.float32)
+        alive = np.zeros(new_capacity, dtype=bool)
+        assignments = np.full(new_capacity, -1, dtype=np.int32)
+        if self._vectors is not None:
+            vectors[:self._size] = self._vectors[:self._size]
+            alive[:self._size] = self._alive[:self._size]
+            assignments[:self._size] = self._assignments[:self._size]
+        self._vectors, self._alive, self._assignments = vectors, alive, assignments
+
+    def add(self, texts: List[str], source_uris: Optional[List[str]] = None, ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Embed and add texts to the store, replacing any existing entries with the same ids.
+
+        Returns:
+            List[str]: The ids of the added entries
+        """
+        if not texts:
+            return []
+        vectors = _normalize(self.embed_fn(texts))
+        source_uris = source_uris or [""] * len(texts)
+        with self._lock:
+            ids = ids or [f"doc-{len(self._records) + offset}" for offset in range(len(texts))]
+            self.delete([doc_id for doc_id in ids if doc_id in self._row_by_id])
+            self._reserve(len(texts), vectors.shape[1])
+            start = self._size
+            self._vectors[start:start + len(texts)] = vectors
+            self._alive[start:start + len(texts)] = True
+            for offset, (doc_id, text, source_uri) in enumerate(zip(ids, texts, source_uris)):
+                self._records.append({"id": doc_id, "text": text, "source_uri": source_uri})
+                self._row_by_id[doc_id] = start + offset
+            self._size += len(texts)
+            if self._centroids is not None:
+                self._assignments[start:self._size] = self._nearest_centroids(vectors)
+        return ids
+
+    def delete(self, ids: List[str]) -> int:
+        """Remove entries by id, returning how many were removed."""
+        removed = 0
+        with self._lock:
+            for doc_id in ids:
+                row = self._row_by_id.pop(doc_id, None)
+                if row is not None:
+                    self._alive[row] = False
+                    removed += 1
+        return removed
+
+    def _nearest_centroids(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def build_index(self, n_lists: Optional[int] = None, iterations: int = 10, seed: int = 0) -> None:
+        """(Re)build the IVF index with spherical k-means over the live vectors."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._size])
+            if len(rows) == 0:
+                self._centroids = None
+                return
+            data = self._vectors[rows]
+            n_lists = n_lists or max(1, int(np.sqrt(len(rows))))
+            rng = np.random.default_rng(seed)
+            centroids = data[rng.choice(len(rows), size=min(n_lists, len(rows)), replace=False)].copy()
+            for _ in range(iterations):
+                labels = np.argmax(data @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, data)
+                empty = ~sums.any(axis=1)
+                sums[empty] = centroids[empty]
+                centroids = _normalize(sums)
+            self._centroids = centroids
+            self._assignments[:self._size] = self._nearest_centroids(self._vectors[:self._size])
+            self._indexed_size = len(rows)
+
+    def _candidate_rows(self, query_vector: np.ndarray) -> np.ndarray:
+        live = len(self)
+        if live < self.ivf_min_size:
+            return np.flatnonzero(self._alive[:self._size])
+        # Rebuild once the store has doubled since the last build so lists stay balanced
+        if self._centroids is None or live > 2 * self._indexed_size:
+            self.build_index()
+        probe = np.argsort(-(self._centroids @ query_vector))[:self.n_probe]
+        mask = np.isin(self._assignments[:self._size], probe) & self._alive[:self._size]
+        return np.flatnonzero(mask)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = DEFAULT_TOP_K,
+        threshold_distance: float = DEFAULT_THRESHOLD_DISTANCE,
+    ) -> List[dict]:
+        """
+        Return up to top_k entries whose cosine distance to the query is at most threshold_distance.
+
+        Returns:
+            List[dict]: Entries with id, text, source_uri and distance, closest first
+        """
+        query_vector = _normalize(self.embed_fn([query]))[0]
+        with self._lock:
+            if not self._size:
+                return []
+            rows = self._candidate_rows(query_vector)
+            if len(rows) == 0:
+                return []
+            distances = 1.0 - self._vectors[rows] @ query_vector
+            k = min(top_k, len(rows))
+            best = np.argpartition(distances, k - 1)[:k]
+            best = best[np.argsort(distances[best])]
+            return [
+                {**self._records[rows[i]], "distance": float(distances[i])}
+                for i in best
+                if distances[i] <= threshold_distance
+            ]
+
+
+def default_embedder() -> EmbedFn:
+    """The embedding function LOCAL_STORE_EMBEDDER selects for new local corpora."""
+    if LOCAL_STORE_EMBEDDER == "hashing":
+        return hashing_embedder()
+    return vertex_embedder()
+
+
+# Local stores by corpus resource name
+local_stores: Dict[str, LocalVectorStore] = {}
+_local_stores_lock = threading.Lock()
+
+
+def register_local_corpus(corpus_name: str, store: LocalVectorStore) -> str:
+    """Make rag_query answer queries for corpus_name from a local store. Returns the resource name it is kept under."""
+    resource_name = get_corpus_resource_name(corpus_name)
+    with _local_stores_lock:
+        local_stores[resource_name] = store
+    return resource_name
+
+
+def get_or_create_local_store(corpus_name: str) -> LocalVectorStore:
+    """Return the local store of corpus_name, registering a new one with the default embedder if it has none."""
+    resource_name = get_corpus_resource_name(corpus_name)
+    with _local_stores_lock:
+        store = local_stores.get(resource_name)
+        if store is None:
+            store = local_stores[resource_name] = LocalVectorStore(default_embedder())
+        return store
+
+
+def get_local_store(corpus_name: str) -> Optional[LocalVectorStore]:
+    """Return the local store registered for corpus_name, by display or resource name, if any."""
+    # Most processes have no local corpora; skip name resolution for them
+    if not local_stores:
+        return None
+    return local_stores.get(get_corpus_resource_name(corpus_name))
@@ -0,0 +1,227 @@
+"""
+Latency and call-count instrumentation for the RAG tools.
+
+Every tool is wrapped with instrument_tool and every module's vertexai.rag
+handle with instrument_sdk. When RAG_METRICS_ENABLED is false both return
+their argument unchanged, so disabled metrics cost nothing per call. When
+enabled they record:
+
+- wall-time histograms per tool and per SDK function
+- call and error counts per tool and per SDK function
+- per agent turn (ADK invocation id), how often each tool and SDK function ran
+
+Metrics are exported with prometheus_text() or snapshot().
+"""
+
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from ..config import RAG_METRICS_ENABLED, RAG_METRICS_MAX_TURNS
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_turn: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("rag_metrics_turn", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus layout."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Yield (upper bound, cumulative count) pairs, ending with +Inf."""
+        total = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            yield bound, total
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 6),
+            "mean_seconds": round(self.sum / self.count, 6) if self.count else 0.0,
+            "buckets": {("+Inf" if bound == float("inf") else str(bound)): total for bound, total in self.cumulative()},
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe store for the tool and SDK metrics."""
+
+    def __init__(self, max_turns: int = RAG_METRICS_MAX_TURNS):
+        self.max_turns = max_turns
+        self._lock = threading.Lock()
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.calls: Dict[Tuple[str, str], int] = {}
+        self.errors: Dict[Tuple[str, str], int] = {}
+        self.turns: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+
+    def record(self, kind: str, name: str, seconds: float, error: bool) -> None:
+        key = (kind, name)
+        turn = _current_turn.get()
+        with self._lock:
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram()
+            histogram.observe(seconds)
+            self.calls[key] = self.calls.get(key, 0) + 1
+            if error:
+                self.errors[key] = self.errors.get(key, 0) + 1
+            if turn is not None:
+                counts = self.turns.get(turn)
+                if counts is None:
+                    counts = self.turns[turn] = {}
+                    while len(self.turns) > self.max_turns:
+                        self.turns.popitem(last=False)
+                counts[f"{kind}:{name}"] = counts.get(f"{kind}:{name}", 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latency.clear()
+            self.calls.clear()
+            self.errors.clear()
+            self.turns.clear()
+
+    def snapshot(self) -> dict:
+        """Return all metrics as a JSON-serializable dict."""
+        with self._lock:
+            result = {"tools": {}, "sdk": {}, "turns": {turn: dict(counts) for turn, counts in self.turns.items()}}
+            for (kind, name), histogram in self.latency.items():
+                calls = self.calls.get((kind, name), 0)
+                errors = self.errors.get((kind, name), 0)
+                result["tools" if kind == "tool" else "sdk"][name] = {
+                    "calls": calls,
+                    "errors": errors,
+                    "error_rate": round(errors / calls, 4) if calls else 0.0,
+                    "latency": histogram.to_dict(),
+                }
+            return result
+
+    def prometheus_text(self) -> str:
+        """Return the latency histograms and call/error counters in the Prometheus text format."""
+        lines = []
+        with self._lock:
+            for kind, label in (("tool", "tool"), ("sdk", "method")):
+                metric = f"rag_{kind}_latency_seconds"
+                lines.append(f"# HELP {metric} Wall time of RAG {kind} calls.")
+                lines.append(f"# TYPE {metric} histogram")
+                for (entry_kind, name), histogram in sorted(self.latency.items()):
+                    if entry_kind != kind:
+                        continue
+                    for bound, total in histogram.cumulative():
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f'{metric}_bucket{{{label}="{name}",le="{le}"}} {total}')
+                    lines.append(f'{metric}_sum{{{label}="{name}"}} {histogram.sum}')
+                    lines.append(f'{metric}_count{{{label}="{name}"}} {histogram.count}')
+                for counter, values in (("calls", self.calls), ("errors", self.errors)):
+                    metric_name = f"rag_{kind}_{counter}_total"
+                    lines.append(f"# TYPE {metric_name} counter")
+                    for (entry_kind, name), value in sorted(values.items()):
+                        if entry_kind == kind:
+                            lines.append(f'{metric_name}{{{label}="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def _is_error_result(result) -> bool:
+    return isinstance(result, dict) and str(result.get("status", "")).lower() == "error"
+
+
+def instrument_tool(func):
+    """
+    Record latency, calls and errors of a tool, and attribute nested calls to the current turn.
+
+    Returns func unchanged when metrics are disabled.
+    """
+    if not RAG_METRICS_ENABLED:
+        return func
+
+    signature = inspect.signature(func)
+    accepts_context = "tool_context" in signature.parameters
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = None
+        if accepts_context:
+            tool_context = signature.bind_partial(*args, **kwargs).arguments.get("tool_context")
+            turn = getattr(tool_context, "invocation_id", None)
+            if turn is not None:
+                token = _current_turn.set(turn)
+        start = time.perf_counter()
+        error = True
+        try:
+            result = func(*args, **kwargs)
+            error = _is_error_result(result)
+            return result
+        finally:
+            metrics.record("tool", func.__name__, time.perf_counter() - start, error)
+            if token is not None:
+                _current_turn.reset(token)
+
+    return wrapper
+
+
+class _InstrumentedSdk:
+    """Proxy for the vertexai.rag module that times every function call made through it."""
+
+    def __init__(self, module):
+        self._module = module
+        self._wrapped = {}
+
+    def __getattr__(self, name):
+        wrapped = self._wrapped.get(name)
+        if wrapped is not None:
+            return wrapped
+        attribute = getattr(self._module, name)
+        if not callable(attribute) or inspect.isclass(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            error = True
+            try:
+                result = attribute(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                metrics.record("sdk", name, time.perf_counter() - start, error)
+
+        self._wrapped[name] = timed
+        return timed
+
+
+def instrument_sdk(module):
+    """Wrap the vertexai.rag module so its calls are timed. Returns module unchanged when metrics are disabled."""
+    if not RAG_METRICS_ENABLED:
+        return module
+    return _InstrumentedSdk(module)
+
+
+def submit_in_context(pool, func, *args):
+    """Submit func to a thread pool so that it runs in the caller's context (and turn)."""
+    return pool.submit(contextvars.copy_context().run, func, *args)
+
+
+def prometheus_text() -> str:
+    return metrics.prometheus_text()
+
+
+def snapshot() -> dict:
+    return metrics.snapshot()
@@ -0,0 +1,112 @@
+"""
+Result cache for rag_query.
+
+Entries are keyed on (corpus resource name, normalized query, top_k,
+threshold), evicted least-recently-used beyond a size bound and expired after a
+TTL. Tools that change a corpus call invalidate_corpus so a cached answer never
+outlives the data it was retrieved from.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from ..config import QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_TTL_SECONDS
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+CacheKey = Tuple[str, str, int, float]
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold a query and collapse whitespace so trivially different phrasings share an entry."""
+    return _WHITESPACE_PATTERN.sub(" ", query).strip().casefold()
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache with a TTL and per-corpus invalidation.
+
+    Args:
+        max_entries (int): Maximum number of cached results
+        ttl (float): Seconds a result stays valid
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES, ttl: float = QUERY_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, Tuple[float, list]]" = OrderedDict()
+        self._keys_by_corpus: Dict[str, Set[CacheKey]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(corpus_resource_name: str, query: str, top_k: int, threshold: float) -> CacheKey:
+        return corpus_resource_name, normalize_query(query), top_k, threshold
+
+    def _drop(self, key: CacheKey) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_corpus.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_corpus[key[0]]
+
+    def get(self, key: CacheKey) -> Optional[list]:
+        """Return the cached results for key, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(self, key: CacheKey, results: list) -> None:
+        """Store results for key, evicting the least recently used entries beyond max_entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, list(results))
+            self._entries.move_to_end(key)
+            self._keys_by_corpus.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate_corpus(self, corpus_resource_name: str) -> None:
+        """Drop every cached result of a corpus after it was modified."""
+        with self._lock:
+            for key in list(self._keys_by_corpus.get(corpus_resource_name, ())):
+                self._drop(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_corpus.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size, for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+query_cache = QueryCache()
@@ -0,0 +1,286 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import islice
+from operator import itemgetter
+from typing import List, Tuple
+
+from google.adk.tools.tool_context import ToolContext
+
+from ..config import (
+    DEFAULT_TOP_K,
+    DEFAULT_THRESHOLD_DISTANCE,
+    MULTI_QUERY_MAX_WORKERS,
+    MULTI_QUERY_TIMEOUT_SECONDS,
+    RRF_K,
+)
+from .lexical_index import lexical_indexes
+from .local_store import get_local_store
+from .metrics import instrument_tool, submit_in_context
+from .query_cache import query_cache
+from .utils import check_corpus_exists, get_corpus_resource_name
+from .vertex_client import rag
+
+_fanout_pool = ThreadPoolExecutor(max_workers=MULTI_QUERY_MAX_WORKERS, thread_name_prefix="rag-query")
+
+
+def _query_local(store, query: str) -> list:
+    return [
+        {
+            "source_uri": hit["source_uri"],
+            "source_name": hit["id"],
+            "text": hit["text"],
+            "score": hit["distance"],
+        }
+        for hit in store.search(query, top_k=DEFAULT_TOP_K, threshold_distance=DEFAULT_THRESHOLD_DISTANCE)
+    ]
+
+
+def _query_vertex(corpus_resource_name: str, query: str) -> list:
+    response = rag.retrieval_query(
+        rag_resources=[rag.RagResource(rag_corpus=corpus_resource_name)],
+        text=query,
+        rag_retrieval_config=rag.RagRetrievalConfig(
+            top_k=DEFAULT_TOP_K,
+            filter=rag.Filter(vector_distance_threshold=DEFAULT_THRESHOLD_DISTANCE),
+        ),
+    )
+    results = []
+    if hasattr(response, "contexts") and response.contexts:
+        for context in response.contexts.contexts:
+            results.append({
+                "source_uri": getattr(context, "source_uri", ""),
+                "source_name": getattr(context, "source_display_name", ""),
+                "text": getattr(context, "text", ""),
+                "score": getattr(context, "score", 0.0),
+            })
+    return results
+
+
+def reciprocal_rank_fusion(ranked_lists: List[Tuple[str, list]], top_k: int = DEFAULT_TOP_K, k: int = RRF_K) -> list:
+    """
+    Merge ranked result lists by reciprocal rank fusion.
+
+    Args:
+        ranked_lists: (method, results) pairs, best result first. method is "vector"
+            (score is a vector distance) or "lexical" (score is a BM25 score).
+        top_k: Number of results to keep
+        k: RRF constant; larger values flatten the weight of the top ranks
+
+    Returns:
+        The top_k results ordered by "rrf_score", the sum of 1 / (k + rank) over the
+        lists a result appears in. Results are matched by (corpus_name, source_uri, text).
+        "score" stays the vector distance, or None for a result only BM25 found, whose
+        BM25 score is in "bm25_score". Scores from different lists are never compared.
+    """
+    fused = {}
+    for method, results in ranked_lists:
+        for rank, result in enumerate(results, start=1):
+            key = (result.get("corpus_name"), result["source_uri"], result["text"])
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {**result, "rrf_score": 0.0, "retrieval": method}
+                if method == "lexical":
+                    entry["score"] = None
+            elif entry["retrieval"] != method:
+                entry["retrieval"] = "hybrid"
+            if method == "lexical":
+                entry["bm25_score"] = result["score"]
+            elif entry["score"] is None:
+                entry["score"] = result["score"]
+            entry["rrf_score"] += 1.0 / (k + rank)
+    ranked = sorted(fused.values(), key=itemgetter("rrf_score"), reverse=True)[:top_k]
+    for entry in ranked:
+        entry["rrf_score"] = round(entry["rrf_score"], 6)
+    return ranked
+
+
+def _retrieve_lists(corpus_name: str, query: str) -> List[Tuple[str, list]]:
+    """
+    Retrieve the ranked result lists of one corpus: its local store's results, or the
+    Vertex AI results (through the cache) and the hits of its BM25 index when it has one.
+    """
+    local_store = get_local_store(corpus_name)
+    if local_store is not None:
+        return [("vector", _query_local(local_store, query))]
+
+    corpus_resource_name = get_corpus_resource_name(corpus_name)
+    cache_key = query_cache.make_key(
+        corpus_resource_name, query, DEFAULT_TOP_K, DEFAULT_THRESHOLD_DISTANCE
+    )
+    results = query_cache.get(cache_key)
+    if results is None:
+        results = _query_vertex(corpus_resource_name, query)
+        query_cache.put(cache_key, results)
+    ranked_lists = [("vector", sorted(results, key=itemgetter("score")))]
+
+    lexical_results = lexical_indexes.search(corpus_resource_name, query, DEFAULT_TOP_K)
+    if lexical_results:
+        ranked_lists.append(("lexical", lexical_results))
+    return ranked_lists
+
+
+def _retrieve(corpus_name: str, query: str) -> list:
+    """
+    Retrieve results for one corpus. Vertex AI results are fused with the corpus's
+    BM25 index when it has one; otherwise they are returned as Vertex AI ranked them.
+    """
+    ranked_lists = _retrieve_lists(corpus_name, query)
+    if len(ranked_lists) == 1:
+        return ranked_lists[0][1]
+    return reciprocal_rank_fusion(ranked_lists)
+
+
+@instrument_tool
+def rag_query(corpus_name: str, query: str, tool_context: ToolContext) -> dict:
+    """
+    Query a corpus to retrieve information relevant to a question.
+
+    Args:
+        corpus_name (str): The name of the corpus to query. If empty, the current corpus is used.
+        query (str): The text question to ask
+        tool_context (ToolContext): the tool context required by the session and for state management
+
+    Returns:
+        Dict: A dictionary with the status of the query and the retrieved results.
+    """
+    if not corpus_name:
+        corpus_name = tool_context.state.get("current_corpus", "")
+    if not corpus_name:
+        return {
+            "status": "Error",
+            "message": "No corpus specified and no current corpus is set. Please specify a corpus.",
+            "query": query,
+            "corpus-name": corpus_name,
+        }
+
+    local_store = get_local_store(corpus_name)
+    if local_store is None and not check_corpus_exists(corpus_name, tool_context):
+        return {
+            "status": "Error",
+            "message": f"Corpus '{corpus_name}' does not exist.",
+            "query": query,
+            "corpus-name": corpus_name,
+        }
+    try:
+        results = _retrieve(corpus_name, query)
+
+        tool_context.state["current_corpus"] = corpus_name
+
+        if not results:
+            return {
+                "status": "Warning",
+                "message": f"No results found in corpus '{corpus_name}' for the query.",
+                "query": query,
+                "corpus-name": corpus_name,
+                "results": [],
+                "results-count": 0,
+            }
+        return {
+            "status": "Success",
+            "message": f"Successfully queried corpus '{corpus_name}'.",
+            "query": query,
+            "corpus-name": corpus_name,
+            "results": results,
+            "results-count": len(results),
+        }
+    except Exception as e:
+        return {
+            "status": "Error",
+            "message": f"Failed to query corpus '{corpus_name}': {str(e)}",
+            "query": query,
+            "corpus-name": corpus_name,
+        }
+
+
+@instrument_tool
+def rag_query_multi(corpus_names: List[str], query: str, tool_context: ToolContext) -> dict:
+    """
+    Query several corpora at once and return a single merged list of the best results.
+    Vertex AI results are merged by distance; BM25 hits and local corpora are fused in by reciprocal rank fusion.
+
+    Args:
+        corpus_names (List[str]): The names of the corpora to query
+        query (str): The text question to ask
+        tool_context (ToolContext): the tool context required by the session and for state management
+
+    Returns:
+        Dict: A dictionary with the status of the query, the merged top results across all
+        corpora and the corpora that failed or timed out.
+    """
+    corpus_names = list(dict.fromkeys(name for name in corpus_names if name))
+    if not corpus_names:
+        return {
+            "status": "Error",
+            "message": "No corpora specified. Please specify at least one corpus.",
+            "query": query,
+            "corpus-names": corpus_names,
+        }
+
+    local_names = {name for name in corpus_names if get_local_store(name) is not None}
+    missing = [
+        name for name in corpus_names
+        if name not in local_names and not check_corpus_exists(name, tool_context)
+    ]
+    futures = {
+        submit_in_context(_fanout_pool, _retrieve_lists, name, query): name
+        for name in corpus_names
+        if name not in missing
+    }
+    done, not_done = wait(futures, timeout=MULTI_QUERY_TIMEOUT_SECONDS)
+
+    vector_lists = []
+    other_lists = []
+    failed = {}
+    for future in done:
+        name = futures[future]
+        try:
+            corpus_lists = future.result()
+        except Exception as e:
+            failed[name] = str(e)
+            continue
+        for method, results in corpus_lists:
+            results = [{**result, "corpus_name": name} for result in results]
+            if method == "vector" and name not in local_names:
+                vector_lists.append(results)
+            else:
+                other_lists.append((method, results))
+    timed_out = []
+    for future in not_done:
+        future.cancel()
+        timed_out.append(futures[future])
+
+    # Vertex AI corpora share DEFAULT_EMBEDDING_MODEL and each list is sorted by distance,
+    # so a k-way merge yields the global order
+    merged = heapq.merge(*vector_lists, key=itemgetter("score"))
+    if other_lists:
+        # BM25 scores and local embedders' distances are on other scales, so fuse those by rank
+        results = reciprocal_rank_fusion(([("vector", list(merged))] if vector_lists else []) + other_lists)
+    else:
+        results = list(islice(merged, DEFAULT_TOP_K))
+    queried = len(futures) - len(failed) - len(timed_out)
+
+    if not queried:
+        return {
+            "status": "Error",
+            "message": "None of the corpora could be queried.",
+            "query": query,
+            "corpus-names": corpus_names,
+            "missing-corpora": missing,
+            "failed-corpora": failed,
+            "timed-out-corpora": timed_out,
+        }
+    return {
+        "status": "Success" if results else "Warning",
+        "message": (
+            f"Queried {queried} of {len(corpus_names)} corpora."
+            if results else f"No results found in {queried} of {len(corpus_names)} corpora for the query."
+        ),
+        "query": query,
+        "corpus-names": corpus_names,
+        "results": results,
+        "results-count": len(results),
+        "partial": bool(missing or failed or timed_out),
+        "missing-corpora": missing,
+        "failed-corpora": failed,
+        "timed-out-corpora": timed_out,
+    }
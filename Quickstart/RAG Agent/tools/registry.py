@@ -0,0 +1,161 @@
+"""
+Process-wide corpus registry for the RAG tools.
+
+Resolving a display name used to cost a full rag.list_corpora() scan per call.
+The registry keeps the listing in memory and refreshes it on a TTL, so name
+resolution and existence checks are answered from dictionaries.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from ..config import (
+    CORPUS_REGISTRY_NEGATIVE_TTL_SECONDS,
+    CORPUS_REGISTRY_TTL_SECONDS,
+)
+from .vertex_client import rag
+
+logger = logging.getLogger(__name__)
+
+
+def _corpus_metadata(corpus) -> dict:
+    """Extract the fields the tools report from a RagCorpus object."""
+    return {
+        "corpus_name": corpus.name,
+        "display_name": getattr(corpus, "display_name", ""),
+        "create_time": getattr(corpus, "create_time", ""),
+        "update_time": getattr(corpus, "update_time", ""),
+    }
+
+
+class CorpusRegistry:
+    """
+    In-memory index of the corpora visible to this process.
+
+    Keeps two maps, display_name -> resource_name and resource_name -> metadata,
+    rebuilt from rag.list_corpora() at most once per `ttl` seconds. Names that
+    were not found are remembered for `negative_ttl` seconds so repeated lookups
+    of a missing corpus do not trigger a new scan each time.
+    """
+
+    def __init__(
+        self,
+        ttl: float = CORPUS_REGISTRY_TTL_SECONDS,
+        negative_ttl: float = CORPUS_REGISTRY_NEGATIVE_TTL_SECONDS,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.RLock()
+        self._by_display: Dict[str, str] = {}
+        self._by_resource: Dict[str, dict] = {}
+        self._missing: Dict[str, float] = {}
+        self._loaded_at: Optional[float] = None
+
+    def refresh(self) -> None:
+        """Rebuild both maps from a single rag.list_corpora() scan."""
+        by_display: Dict[str, str] = {}
+        by_resource: Dict[str, dict] = {}
+        for corpus in rag.list_corpora():
+            metadata = _corpus_metadata(corpus)
+            by_resource[corpus.name] = metadata
+            if metadata["display_name"]:
+                by_display[metadata["display_name"]] = corpus.name
+
+        with self._lock:
+            self._by_display = by_display
+            self._by_resource = by_resource
+            self._missing = {}
+            self._loaded_at = time.monotonic()
+        logger.info(f"Corpus registry refreshed with {len(by_resource)} corpora")
+
+    def _age(self) -> float:
+        if self._loaded_at is None:
+            return float("inf")
+        return time.monotonic() - self._loaded_at
+
+    def _ensure_fresh(self) -> None:
+        if self._age() > self.ttl:
+            with self._lock:
+                # Another thread may have refreshed while we waited for the lock
+                if self._age() > self.ttl:
+                    self.refresh()
+
+    def _lookup(self, name: str) -> Optional[str]:
+        if name in self._by_resource:
+            return name
+        return self._by_display.get(name)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Resolve a display name or resource name to the corpus resource name.
+
+        Args:
+            name (str): The display name or full resource name of the corpus
+
+        Returns:
+            Optional[str]: The resource name, or None if no such corpus exists
+        """
+        self._ensure_fresh()
+        resource_name = self._lookup(name)
+        if resource_name:
+            return resource_name
+
+        expires_at = self._missing.get(name)
+        if expires_at is not None and expires_at > time.monotonic():
+            return None
+
+        # Only rescan for a miss if the snapshot is older than the negative TTL,
+        # otherwise the listing is recent enough to trust.
+        if self._age() > self.negative_ttl:
+            with self._lock:
+                if self._age() > self.negative_ttl:
+                    self.refresh()
+            resource_name = self._lookup(name)
+            if resource_name:
+                return resource_name
+
+        self._missing[name] = time.monotonic() + self.negative_ttl
+        return None
+
+    def exists(self, name: str) -> bool:
+        """Return True if a corpus with this display name or resource name exists."""
+        return self.resolve(name) is not None
+
+    def get(self, name: str) -> Optional[dict]:
+        """Return the cached metadata of a corpus, or None if it does not exist."""
+        resource_name = self.resolve(name)
+        if resource_name is None:
+            return None
+        return self._by_resource.get(resource_name)
+
+    def add(self, corpus) -> None:
+        """Record a corpus that was just created by this process."""
+        metadata = _corpus_metadata(corpus)
+        with self._lock:
+            self._by_resource[corpus.name] = metadata
+            if metadata["display_name"]:
+                self._by_display[metadata["display_name"]] = corpus.name
+                self._missing.pop(metadata["display_name"], None)
+            self._missing.pop(corpus.name, None)
+
+    def remove(self, name: str) -> None:
+        """Drop a corpus that was just deleted by this process."""
+        with self._lock:
+            resource_name = self._lookup(name)
+            if resource_name is None:
+                return
+            metadata = self._by_resource.pop(resource_name, {})
+            display_name = metadata.get("display_name")
+            if display_name and self._by_display.get(display_name) == resource_name:
+                del self._by_display[display_name]
+
+    def invalidate(self) -> None:
+        """Force the next lookup to rescan the corpus listing."""
+        with self._lock:
+            self._loaded_at = None
+            self._missing = {}
+
+
+corpus_registry = CorpusRegistry()
@@ -4,18 +4,30 @@ Utility functions for the RAG tools.
 
 import logging
 import re
+from typing import List, Optional, Tuple
 
 from google.adk.tools.tool_context import ToolContext
-from vertexai import rag
 
 from ..config import (
     LOCATION,
     PROJECT_ID,
 )
+from .metrics import instrument_tool
+from .registry import corpus_registry
 
 logger = logging.getLogger(__name__)
 
+RESOURCE_NAME_PATTERN = re.compile(r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$")
+DOCS_URL_PATTERN = re.compile(
+    r"https:\/\/docs\.google\.com\/(?:document|spreadsheets|presentation)\/d\/([a-zA-Z0-9_-]+)(?:\/|$)"
+)
+DRIVE_URL_PATTERN = re.compile(
+    r"https:\/\/drive\.google\.com\/(?:file\/d\/|open\?id=)([a-zA-Z0-9_-]+)(?:\/|$)"
+)
+GCS_URL_PATTERN = re.compile(r"https:\/\/storage\.(?:cloud\.google|googleapis)\.com\/([^?#]+)")
+
 
+@instrument_tool
 def get_corpus_resource_name(corpus_name: str) -> str:
     """
     Convert a corpus name to its full resource name if needed.
@@ -30,16 +42,14 @@ def get_corpus_resource_name(corpus_name: str) -> str:
     logger.info(f"Getting resource name for corpus: {corpus_name}")
 
     # If it's already a full resource name with the projects/locations/ragCorpora format
-    if re.match(r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$", corpus_name):
+    if RESOURCE_NAME_PATTERN.match(corpus_name):
         return corpus_name
 
     # Check if this is a display name of an existing corpus
     try:
-        # List all corpora and check if there's a match with the display name
-        corpora = rag.list_corpora()
-        for corpus in corpora:
-            if hasattr(corpus, "display_name") and corpus.display_name == corpus_name:
-                return corpus.name
+        resource_name = corpus_registry.resolve(corpus_name)
+        if resource_name:
+            return resource_name
     except Exception as e:
         logger.warning(f"Error when checking for corpus display name: {str(e)}")
         # If we can't check, continue with the default behavior
@@ -59,6 +69,7 @@ def get_corpus_resource_name(corpus_name: str) -> str:
     return f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}"
 
 
+@instrument_tool
 def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
     """
     Check if a corpus with the given name exists.
@@ -75,22 +86,18 @@ def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
         return True
 
     try:
-        # Get full resource name
-        corpus_resource_name = get_corpus_resource_name(corpus_name)
-
-        # List all corpora and check if this one exists
-        corpora = rag.list_corpora()
-        for corpus in corpora:
-            if (
-                corpus.name == corpus_resource_name
-                or corpus.display_name == corpus_name
-            ):
-                # Update state
-                tool_context.state[f"corpus_exists_{corpus_name}"] = True
-                # Also set this as the current corpus if no current corpus is set
-                if not tool_context.state.get("current_corpus"):
-                    tool_context.state["current_corpus"] = corpus_name
-                return True
+        # Resolve against the registry by display name or resource name,
+        # then by the standardized resource name built from the input
+        exists = corpus_registry.exists(corpus_name) or corpus_registry.exists(
+            get_corpus_resource_name(corpus_name)
+        )
+        if exists:
+            # Update state
+            tool_context.state[f"corpus_exists_{corpus_name}"] = True
+            # Also set this as the current corpus if no current corpus is set
+            if not tool_context.state.get("current_corpus"):
+                tool_context.state["current_corpus"] = corpus_name
+            return True
 
         return False
     except Exception as e:
@@ -114,4 +121,60 @@ def set_current_corpus(corpus_name: str, tool_context: ToolContext) -> bool:
     if check_corpus_exists(corpus_name, tool_context):
         tool_context.state["current_corpus"] = corpus_name
         return True
-    return False
\ No newline at end of file
+    return False
+
+
+def normalize_path(path: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Normalize a data source path to a form accepted by rag.import_files.
+
+    Google Docs/Sheets/Slides URLs and Drive links are converted to the
+    https://drive.google.com/file/d/<id>/view form, and GCS object URLs to gs:// URIs.
+
+    Args:
+        path (str): The Google Drive, Google Docs or GCS path
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: The normalized path, or None if the format
+        is not supported, and a "path → normalized" conversion note if the path changed.
+    """
+    path = path.strip()
+
+    docs_match = DOCS_URL_PATTERN.match(path)
+    if docs_match:
+        drive_url = f"https://drive.google.com/file/d/{docs_match.group(1)}/view"
+        return drive_url, f"{path} → {drive_url}"
+
+    drive_match = DRIVE_URL_PATTERN.match(path)
+    if drive_match:
+        drive_url = f"https://drive.google.com/file/d/{drive_match.group(1)}/view"
+        return drive_url, (f"{path} → {drive_url}" if drive_url != path else None)
+
+    if path.startswith("gs://"):
+        return path, None
+
+    gcs_match = GCS_URL_PATTERN.match(path)
+    if gcs_match:
+        gcs_uri = f"gs://{gcs_match.group(1)}"
+        return gcs_uri, f"{path} → {gcs_uri}"
+
+    return None, None
+
+
+def rag_file_sources(rag_file) -> List[str]:
+    """
+    Return the source URIs a RagFile was imported from, as add_data normalized them.
+
+    Listed RagFiles carry a gcs_source or google_drive_source. Files returned
+    by other calls may have neither, in which case the list is empty.
+    """
+    sources = list(getattr(getattr(rag_file, "gcs_source", None), "uris", None) or ())
+    drive_source = getattr(rag_file, "google_drive_source", None)
+    for resource in getattr(drive_source, "resource_ids", None) or ():
+        resource_id = getattr(resource, "resource_id", "")
+        if resource_id:
+            sources.append(f"https://drive.google.com/file/d/{resource_id}/view")
+    source_uri = getattr(rag_file, "source_uri", "")
+    if source_uri:
+        sources.append(source_uri)
+    return sources
@@ -0,0 +1,436 @@
+"""
+Shared Vertex AI client layer for the RAG tools.
+
+Every tool calls vertexai.rag through the `rag` proxy exported here instead of
+importing the SDK directly. Calls made through it:
+
+- share one process-wide concurrency limit that adapts AIMD-style: it grows by
+  about one slot per limit's worth of successful calls and halves when the
+  service answers 429 (quota) or 503 (overloaded). A call that cannot get a
+  slot within VERTEX_SLOT_TIMEOUT_SECONDS fails with LimiterTimeout instead
+  of waiting forever
+- except import_files, whose calls run for minutes: it has its own limiter of
+  VERTEX_IMPORT_CONCURRENCY slots, so running imports never hold the slots
+  that queries and listings need
+- are retried on 429 and 5xx with full-jitter exponential backoff; calls that
+  are not safe to repeat, like create_corpus, are only retried on 429
+- reuse one RagDataService/RagService client (and gRPC channel) per project
+  and location instead of the SDK's new client per call
+
+Pages after the first one of a list_corpora/list_files pager are fetched lazily
+by the SDK while the caller iterates, so they are not retried here.
+
+The module also owns the process-wide embedding budget, sized to
+DEFAULT_EMBEDDING_REQUEST_PER_MIN and shared by imports and local embeddings,
+and the authorized HTTP session used for GCS and Drive metadata and downloads.
+"""
+
+import functools
+import inspect
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from vertexai import rag as _rag_module
+
+from ..config import (
+    DEFAULT_EMBEDDING_REQUEST_PER_MIN,
+    IMPORT_MAX_WORKERS,
+    VERTEX_BACKOFF_BASE_SECONDS,
+    VERTEX_BACKOFF_MAX_SECONDS,
+    VERTEX_HTTP_POOL_SIZE,
+    VERTEX_IMPORT_CONCURRENCY,
+    VERTEX_INITIAL_CONCURRENCY,
+    VERTEX_MAX_CONCURRENCY,
+    VERTEX_MAX_RETRIES,
+    VERTEX_SLOT_TIMEOUT_SECONDS,
+)
+from .metrics import instrument_sdk
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUS_CODES = (429, 503)
+TRANSIENT_STATUS_CODES = (429, 500, 502, 503, 504)
+# A retried create after a 5xx may create the corpus twice; a 429 was rejected before doing anything
+NON_IDEMPOTENT_METHODS = {"create_corpus"}
+# Calls that take minutes and run under the separate import limiter
+LONG_RUNNING_METHODS = {"import_files"}
+
+# gRPC status names mapped to the HTTP codes google.api_core uses for them
+_GRPC_STATUS_CODES = {
+    "NOT_FOUND": 404,
+    "RESOURCE_EXHAUSTED": 429,
+    "INTERNAL": 500,
+    "UNAVAILABLE": 503,
+    "DEADLINE_EXCEEDED": 504,
+}
+
+_SCOPES = [
+    "https://www.googleapis.com/auth/cloud-platform",
+    "https://www.googleapis.com/auth/drive.metadata.readonly",
+]
+_session = None
+_session_lock = threading.Lock()
+
+
+def status_code(error: Exception) -> Optional[int]:
+    """
+    The HTTP status code of an SDK error, or None if it has none.
+
+    Handles google.api_core exceptions (an int `code`) and raw gRPC errors
+    (a `code()` method returning a StatusCode).
+    """
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code
+    if callable(code):
+        try:
+            return _GRPC_STATUS_CODES.get(getattr(code(), "name", ""))
+        except Exception:
+            return None
+    return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_min` tokens per minute.
+
+    Args:
+        rate_per_min (float): Refill rate, and by default also the bucket capacity
+        capacity (float, optional): Maximum number of tokens the bucket can hold
+    """
+
+    def __init__(self, rate_per_min: float, capacity: Optional[float] = None):
+        self.rate_per_sec = rate_per_min / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_min
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_sec)
+        self._updated_at = now
+
+    def acquire(self, tokens: float = 1, cancel_event: Optional[threading.Event] = None) -> bool:
+        """
+        Block until `tokens` are available and take them.
+
+        Requests larger than the capacity are clamped to the capacity so they can
+        still be served. Returns False if cancel_event was set while waiting.
+        """
+        tokens = min(tokens, self.capacity)
+        with self._cond:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    return False
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate_per_sec
+                self._cond.wait(timeout=min(wait, 1.0))
+
+
+class EmbeddingBudget:
+    """
+    Process-wide embedding quota shared by every in-flight import and local embedding call.
+
+    Each import batch takes its estimated embedding requests from the token
+    bucket before it is submitted, and is given a fixed 1/max_leases share of
+    the per-minute budget as its own max_embedding_requests_per_min. At most
+    max_leases batches run at once (the import pool size), so the rates the
+    service is told add up to no more than the budget.
+
+    Args:
+        requests_per_min (int): The project's embedding requests per minute
+        max_leases (int): Import batches that can run at the same time
+    """
+
+    def __init__(self, requests_per_min: int = DEFAULT_EMBEDDING_REQUEST_PER_MIN, max_leases: int = IMPORT_MAX_WORKERS):
+        self.requests_per_min = requests_per_min
+        self.max_leases = max_leases
+        self.bucket = TokenBucket(requests_per_min)
+        self._lock = threading.Lock()
+
+    def resize(self, requests_per_min: int) -> None:
+        """Change the per-minute budget, e.g. after the project's quota changed."""
+        with self._lock:
+            self.requests_per_min = requests_per_min
+            self.bucket = TokenBucket(requests_per_min)
+
+    @property
+    def share(self) -> int:
+        """The per-minute rate each import batch may use."""
+        return max(1, self.requests_per_min // self.max_leases)
+
+    def acquire(self, requests: int = 1, cancel_event: Optional[threading.Event] = None) -> bool:
+        """Take `requests` embedding requests from the budget, blocking until they are available."""
+        return self.bucket.acquire(requests, cancel_event)
+
+    @contextmanager
+    def lease(self, estimated_requests: int, cancel_event: Optional[threading.Event] = None):
+        """Yield the per-minute rate this batch may use, or None if it was cancelled."""
+        if not self.acquire(estimated_requests, cancel_event):
+            yield None
+            return
+        yield self.share
+
+
+class LimiterTimeout(TimeoutError):
+    """Raised when no concurrency slot frees up within the wait timeout."""
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit adjusted by additive increase / multiplicative decrease.
+
+    Every successful call raises the limit by 1/limit, so it grows by about one
+    slot per round of calls. A throttled call multiplies it by decrease_factor,
+    unless the call started before the previous decrease: a burst of 429s from
+    calls that were already in flight then only counts as one signal.
+
+    Args:
+        initial (int): Starting limit
+        minimum (int): The limit never drops below this
+        maximum (int): The limit never grows above this
+        decrease_factor (float): Multiplier applied on a throttle signal
+    """
+
+    def __init__(
+        self,
+        initial: int = VERTEX_INITIAL_CONCURRENCY,
+        minimum: int = 1,
+        maximum: int = VERTEX_MAX_CONCURRENCY,
+        decrease_factor: float = 0.5,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        """
+        Hold one of the `limit` concurrent call slots. Yields the time the slot was taken.
+
+        Raises LimiterTimeout if no slot frees up within `timeout` seconds (None waits indefinitely).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise LimiterTimeout(
+                        f"No Vertex AI call slot freed up within {timeout:g}s ({self.in_flight} calls in flight)"
+                    )
+                self._cond.wait(remaining)
+            self.in_flight += 1
+        try:
+            yield time.monotonic()
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify()
+
+    def on_success(self) -> None:
+        with self._cond:
+            if self.limit >= self.maximum:
+                return
+            previous = int(self.limit)
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            if int(self.limit) > previous:
+                self._cond.notify_all()
+
+    def on_throttle(self, started_at: float) -> bool:
+        """Decrease the limit for a call throttled after starting at `started_at`. Returns True if it was decreased."""
+        with self._cond:
+            if started_at < self._last_decrease:
+                return False
+            self._last_decrease = time.monotonic()
+            self.limit = float(max(self.minimum, self.limit * self.decrease_factor))
+            return True
+
+
+class VertexClient:
+    """
+    Proxy for the vertexai.rag module that runs every SDK call under the shared
+    concurrency limiter and retries throttled and transient failures.
+
+    Config types and other classes are returned unchanged.
+
+    Args:
+        module: The vertexai.rag module (or an instrumented proxy of it)
+        limiter (AdaptiveConcurrencyLimiter, optional): Limiter shared by all calls except LONG_RUNNING_METHODS
+        import_limiter (AdaptiveConcurrencyLimiter, optional): Limiter for LONG_RUNNING_METHODS
+        slot_timeout (float, optional): Seconds a call waits for a shared slot before raising LimiterTimeout.
+            Imports wait for their own slots without a timeout, since those are held for minutes.
+        max_retries (int): Retries after the first attempt
+        backoff_base (float): Upper bound of the first backoff delay, doubled per retry
+        backoff_max (float): Cap on the backoff delay
+        sleep (Callable): Used to wait between attempts
+    """
+
+    def __init__(
+        self,
+        module,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        import_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        slot_timeout: Optional[float] = VERTEX_SLOT_TIMEOUT_SECONDS,
+        max_retries: int = VERTEX_MAX_RETRIES,
+        backoff_base: float = VERTEX_BACKOFF_BASE_SECONDS,
+        backoff_max: float = VERTEX_BACKOFF_MAX_SECONDS,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._module = module
+        self.limiter = limiter or AdaptiveConcurrencyLimiter()
+        self.import_limiter = import_limiter or AdaptiveConcurrencyLimiter(
+            initial=VERTEX_IMPORT_CONCURRENCY, maximum=VERTEX_IMPORT_CONCURRENCY
+        )
+        self.slot_timeout = slot_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+        self.calls = 0
+        self.retries = 0
+        self.throttled = 0
+        self._wrapped = {}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, calls: int = 0, retries: int = 0, throttled: int = 0) -> None:
+        with self._stats_lock:
+            self.calls += calls
+            self.retries += retries
+            self.throttled += throttled
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff: uniform in [0, min(max, base * 2^attempt)]."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def call(self, method: str, func: Callable, *args, **kwargs):
+        """Call func, an SDK function named `method`, with limiting and retries."""
+        retry_codes = THROTTLE_STATUS_CODES[:1] if method in NON_IDEMPOTENT_METHODS else TRANSIENT_STATUS_CODES
+        if method in LONG_RUNNING_METHODS:
+            limiter, timeout = self.import_limiter, None
+        else:
+            limiter, timeout = self.limiter, self.slot_timeout
+        attempt = 0
+        while True:
+            with limiter.slot(timeout) as started_at:
+                self._count(calls=1)
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    code = status_code(e)
+                    if code in THROTTLE_STATUS_CODES:
+                        self._count(throttled=1)
+                        limiter.on_throttle(started_at)
+                    if code not in retry_codes or attempt >= self.max_retries:
+                        raise
+                    error = e
+                else:
+                    limiter.on_success()
+                    return result
+            # Back off outside the slot so waiting retries do not hold capacity
+            delay = self.backoff_delay(attempt)
+            logger.info(f"Retrying {method} in {delay:.2f}s after: {str(error)}")
+            self._count(retries=1)
+            self.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "concurrency_limit": round(self.limiter.limit, 2),
+                "in_flight": self.limiter.in_flight,
+                "import_concurrency_limit": round(self.import_limiter.limit, 2),
+                "imports_in_flight": self.import_limiter.in_flight,
+                "calls": self.calls,
+                "retries": self.retries,
+                "throttled": self.throttled,
+            }
+
+    def __getattr__(self, name):
+        wrapped = self._wrapped.get(name)
+        if wrapped is not None:
+            return wrapped
+        attribute = getattr(self._module, name)
+        if not callable(attribute) or inspect.isclass(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def limited(*args, **kwargs):
+            return self.call(name, attribute, *args, **kwargs)
+
+        self._wrapped[name] = limited
+        return limited
+
+
+def _shared_client_factory(factory: Callable, initializer) -> Callable:
+    """Wrap an SDK client factory so it returns one client per project and location."""
+    clients = {}
+    lock = threading.Lock()
+
+    @functools.wraps(factory)
+    def shared(*args, **kwargs):
+        if args or kwargs:
+            return factory(*args, **kwargs)
+        try:
+            key = (initializer.global_config.project, initializer.global_config.location)
+        except Exception:
+            return factory()
+        with lock:
+            client = clients.get(key)
+            if client is None:
+                client = clients[key] = factory()
+            return client
+
+    shared.shared_client = True
+    return shared
+
+
+def share_gapic_clients() -> None:
+    """
+    Make vertexai.rag reuse its GAPIC clients.
+
+    The SDK builds a new client, with a new gRPC channel and TLS handshake, on
+    every call. Does nothing if the SDK does not have the expected factories.
+    """
+    try:
+        from google.cloud.aiplatform import initializer
+        from vertexai.rag.utils import _gapic_utils
+    except ImportError:
+        return
+    for factory_name in ("create_rag_data_service_client", "create_rag_service_client"):
+        factory = getattr(_gapic_utils, factory_name, None)
+        if factory is not None and not getattr(factory, "shared_client", False):
+            setattr(_gapic_utils, factory_name, _shared_client_factory(factory, initializer))
+
+
+def authorized_session():
+    """Lazily create one authorized HTTP session, with a pooled adapter, shared by all GCS/Drive requests."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import google.auth
+            from google.auth.transport.requests import AuthorizedSession
+            from requests.adapters import HTTPAdapter
+
+            credentials, _ = google.auth.default(scopes=_SCOPES)
+            _session = AuthorizedSession(credentials)
+            adapter = HTTPAdapter(pool_connections=VERTEX_HTTP_POOL_SIZE, pool_maxsize=VERTEX_HTTP_POOL_SIZE)
+            _session.mount("https://", adapter)
+        return _session
+
+
+share_gapic_clients()
+embedding_budget = EmbeddingBudget()
+vertex_client = VertexClient(instrument_sdk(_rag_module))
+rag = vertex_client
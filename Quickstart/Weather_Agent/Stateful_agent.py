@@ -1,9 +1,11 @@
 # *****Initialize New Session Service and State*****
-from google.adk.sessions import InMemorySessionService
+from compaction import CompactionConfig
+from session_store import SqliteSessionService
 from google.adk.tools.tool_context import ToolContext
 from google.adk.agents import Agent
 from google.adk.runners import Runner 
 from google.genai import types
+from weather_provider import StaticWeatherProvider, load_city_index
 import os
 import warnings 
 import logging
@@ -24,7 +26,9 @@ SESSION_ID_STATEFUL = "session_stateful_001"
 USER_ID_STATEFUL = "user_stateful_001"
 APP_NAME = "Weather Agent Stateful" 
 initial_state = {"user_preference_unit": "Celsius"}
-session_service_stateful = InMemorySessionService()
+# Sessions are kept in SQLite (WEATHER_SESSION_DB), so the conversation and its state survive restarts;
+# turns older than the last few are folded into state["conversation_summary"] to keep the prompt short
+session_service_stateful = SqliteSessionService(compaction=CompactionConfig())
 print(f"Session service initialized: {session_service_stateful}")
 
 
@@ -36,24 +40,29 @@ print(f"Session service initialized: {session_service_stateful}")
 #     asyncio.run(main())
 
 # *****# Define a state-aware tool to retrieve weather information*****
+# The city index is loaded once; the mock weather table is resolved against it up front
+weather_provider = StaticWeatherProvider(
+    load_city_index(),
+    {
+        "New York": (22, "sunny"),
+        "London": (25, "windy"),
+        "Tokyo": (30, "rainy"),
+    },
+)
+
 def get_weather_stateful(city: str, tool_context: ToolContext)-> dict:
     """ Retrieves weather information, converts units based on user preference and based on session state"""
     print(f"---TOOL: get_weather_stateful called for {city}")
     preferred_unit = tool_context.state.get("user_preference_unit", "Celsius")
     print(f"---Tool: Reading state 'user_preference_unit' : {preferred_unit}")
     
-    city_normalized = city.lower().replace(" ","_")
-    
-    mock_weather_db = {
-        "new_york":{"temperature_celsius": 22, "condition": "sunny"},
-        "london":{"temperature_celsius": 25, "condition": "windy"},
-        "tokyo":{"temperature_celsius": 30, "condition": "rainy"},
-    }
+    # Conditions come from the shared cache in Celsius and are converted per session below,
+    # so Celsius and Fahrenheit users share one cache entry per city
+    weather = weather_provider.get_weather(city)
     
-    if city_normalized in mock_weather_db:
-        weather_data = mock_weather_db[city_normalized]
-        temp_c = weather_data["temperature_celsius"]
-        condition = weather_data["condition"]
+    if weather["status"] == "success":
+        temp_c = weather["temperature_celsius"]
+        condition = weather["condition"]
         
         if preferred_unit == "Fahrenheit":
             temp_value =(9/5) * temp_c + 32
@@ -63,7 +72,7 @@ def get_weather_stateful(city: str, tool_context: ToolContext)-> dict:
             temp_value = temp_c
             temp_unit = "°C"
         
-        report = f"The weather in {city.capitalize()} is {condition} with a temperture {temp_value}{temp_unit}"
+        report = f"The weather in {weather['city']} is {condition} with a temperture {temp_value}{temp_unit}"
         result = {"status": "success", "report": report}
         print(f"---Tool: Generated report in {preferred_unit}. Result: {result}---")
         
@@ -73,6 +82,8 @@ def get_weather_stateful(city: str, tool_context: ToolContext)-> dict:
         return result
     else:
         error_message = f"City {city} not found in mock database."
+        if weather.get("suggestions"):
+            error_message += f" Did you mean: {', '.join(weather['suggestions'])}?"
         print(f"---Tool: {error_message}---")
         return {"status": "error", "message": error_message}
 print("State-aware 'get_weather_stateful' tool defined.")
@@ -139,7 +150,8 @@ if greeting_agent and farewell_agent and "get_weather_stateful" in globals():
         instruction="You are the main Weather Agent. Your job is to provide weather using 'get_weather_stateful'. "
                     "The tool will format the temperature based on user preference stored in state. "
                     "Delegate simple greetings to 'greeting_agent' and farewells to 'farewell_agent'. "
-                    "Handle only weather requests, greetings, and farewells.",
+                    "Handle only weather requests, greetings, and farewells. "
+                    "Summary of the earlier conversation, if any: {conversation_summary?}",
         tools = [get_weather_stateful],
         sub_agents = [greeting_agent, farewell_agent],
         output_key = "last_weather_report", #Auto-save agent's final weather response
@@ -185,13 +197,28 @@ if "runner_root_stateful" in globals() and runner_root_stateful:
     async def run_stateful_conversation():
     #*****# Define a stateful agent that can maintain session state*****
 
-        session_stateful = await session_service_stateful.create_session(
+        session_stateful = await session_service_stateful.get_session(
             app_name = APP_NAME,
             session_id=SESSION_ID_STATEFUL,
             user_id=USER_ID_STATEFUL,
-            state=initial_state
         )
-        print(f"Session created: {SESSION_ID_STATEFUL} for user {USER_ID_STATEFUL} in app {APP_NAME}")
+        if session_stateful:
+            # Start the demo from the initial preference again; the earlier turns stay in the history
+            await session_service_stateful.update_state(
+                app_name=APP_NAME,
+                user_id=USER_ID_STATEFUL,
+                session_id=SESSION_ID_STATEFUL,
+                state_delta=initial_state,
+            )
+            print(f"Session resumed: {SESSION_ID_STATEFUL} for user {USER_ID_STATEFUL} in app {APP_NAME}")
+        else:
+            session_stateful = await session_service_stateful.create_session(
+                app_name = APP_NAME,
+                session_id=SESSION_ID_STATEFUL,
+                user_id=USER_ID_STATEFUL,
+                state=initial_state
+            )
+            print(f"Session created: {SESSION_ID_STATEFUL} for user {USER_ID_STATEFUL} in app {APP_NAME}")
 
         retrieved_session = await session_service_stateful.get_session(app_name = APP_NAME,
             session_id=SESSION_ID_STATEFUL,
@@ -214,13 +241,15 @@ if "runner_root_stateful" in globals() and runner_root_stateful:
         )
         print("\n--- Manually Updating State: Setting unit to Fahrenheit ---")
         try:
-            stored_session = session_service_stateful.sessions[APP_NAME][USER_ID_STATEFUL][SESSION_ID_STATEFUL]
-            stored_session.state["user_preference_unit"] = "Fahrenheit"
-            print(f"---Updated session state's values, current user preference: {stored_session.state.get("user_preference_unit")}---")
-        except KeyError as e:
-            print(f"---Error updating session state: {e}---")            
+            updated_state = await session_service_stateful.update_state(
+                app_name=APP_NAME,
+                user_id=USER_ID_STATEFUL,
+                session_id=SESSION_ID_STATEFUL,
+                state_delta={"user_preference_unit": "Fahrenheit"},
+            )
+            print(f"---Updated session state's values, current user preference: {updated_state.get('user_preference_unit')}---")
         except Exception as e:
-             print(f"--- Error updating internal session state: {e} ---")
+             print(f"--- Error updating session state: {e} ---")
 
         print("\n--- Turn 2: Requesting weather in New York (expect Fahrenheit) ---")
         await call_agent_async(query= "Tell me the weather in New York.",
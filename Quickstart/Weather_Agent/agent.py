@@ -2,10 +2,14 @@ import os
 import asyncio
 from google.adk.agents import Agent
 from google.adk.models.lite_llm import LiteLlm
-from google.adk.sessions import InMemorySessionService
+from compaction import CompactionConfig
+from llm_cache import load_llm_cache
+from session_store import SqliteSessionService
 from google.adk.runners import Runner
 from google.genai import types
 
+from weather_provider import StaticWeatherProvider, load_city_index
+
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -25,6 +29,28 @@ print("\n ENVIRONMENT CONFIGURED")
 
 
 # *****TOOL SETUP*****
+# The city index is loaded once; the mock weather table is resolved against it up front
+weather_provider = StaticWeatherProvider(
+    load_city_index(),
+    {
+        "New York": (25, "sunny"),
+        "London": (18, "cloudy"),
+        "Tokyo": (22, "rainy"),
+    },
+)
+
+def _weather_report(city: str, weather: dict) -> dict:
+    """Turns a weather_provider result into the report the weather tools return."""
+    if weather["status"] == "success":
+        return {
+            "status": "success",
+            "report": f"The weather in {weather['city']} is {weather['condition']} with a temperature of {weather['temperature_celsius']}°C.",
+        }
+    suggestions = weather.get("suggestions")
+    if suggestions:
+        return {"status": "error", "error_message": f"No weather data available for {city}. Did you mean: {', '.join(suggestions)}?"}
+    return{"status":"error", "error_message": f"No weather data available for {city}."}
+
 def get_weather(city:str)-> dict:
     """
     Retreives the current weather report for a specified city
@@ -39,21 +65,32 @@ def get_weather(city:str)-> dict:
                 if "error", includes an "error_message" key.
     """
     print(f"---Tool: get weather called for the city: {city}---")
-    city_normalized = city.lower().replace(" ", "_")
-    
-    Mock_weather_db = {
-        "new_york":{"status":"success", "report":"The weather in New York is sunny with a temperature of 25°C."},
-        "london":{"status":"success", "report":"The weather in London is cloudy with a temperature of 18°C."},
-        "tokyo":{"status":"success", "report":"The weather in Tokyo is rainy with a temperature of 22°C."},
-    }
+    return _weather_report(city, weather_provider.get_weather(city))
+
+def get_weather_batch(cities: list[str]) -> dict:
+    """
+    Retreives the current weather reports for several cities in one call.
+    Use it instead of calling get_weather once per city whenever the user asks about more than one city.
     
-    if city_normalized in Mock_weather_db:
-        return Mock_weather_db[city_normalized]
-    else:
-        return{"status":"error", "error_message": f"No weather data available for {city}."}
+    Args:
+        cities(list[str]): The names of the cities (e.g., ["London", "Tokyo", "New York"])
+        
+    Returns:
+        dict: A dictionary with a "status" key ("success" if at least one city has a report, else "error")
+                and a "results" list with one entry per city, in the same order, holding the "city"
+                and the same "status"/"report"/"error_message" keys as get_weather.
+    """
+    print(f"---Tool: get_weather_batch called for the cities: {cities}---")
+    results = [
+        {"city": city, **_weather_report(city, weather)}
+        for city, weather in zip(cities, weather_provider.get_weather_batch(cities))
+    ]
+    status = "success" if any(result["status"] == "success" for result in results) else "error"
+    return {"status": status, "results": results}
     
 print(get_weather("New York"))
 print(get_weather("Paris"))
+print(get_weather_batch(["London", "Tokyo", "Paris"]))
 
 # *****AGENT SETUP*****
 AGENT_MODEL = MODEL_GEMINI_FLASH_2_0_FLASH
@@ -65,20 +102,32 @@ weather_agent = Agent(
     instruction = "You are a helpful weather assistant."
                 "When the user asks for the weather in a specified city, "
                 " use the get_weather tool to retrieve the current weather report for that city. "
+                " When the user asks about more than one city, call the get_weather_batch tool ONCE with all of the cities"
+                " instead of calling get_weather for each of them. "
                 " If the tool returns an error, inform the user politely"
-                " If the tool is successful, present the weather report in a clear and concise manner.",
-    tools = [get_weather],
+                " If the tool is successful, present the weather report in a clear and concise manner."
+                " Summary of the earlier conversation, if any: {conversation_summary?}",
+    tools = [get_weather, get_weather_batch],
 )
 
 print(f"\nAgent {weather_agent.name} created with the model {AGENT_MODEL}.")
 
 # *****Setup Session Service *****
 
-session_service = InMemorySessionService()
+# Sessions are kept in SQLite (WEATHER_SESSION_DB), so a rerun resumes the same conversations;
+# turns older than the last few are folded into state["conversation_summary"] to keep the prompt short
+session_service = SqliteSessionService(compaction=CompactionConfig())
 APP_NAME = "WeatherAgentApp"
 USER_ID = "USER_1"
 SESSION_ID = "session_001"
 
+# Opt-in model response cache: set WEATHER_LLM_CACHE to a database file and identical requests
+# skip the model round-trip. say_hello/say_goodbye return fixed text, so calls after them may be
+# cached; answers written from a get_weather result are never cached.
+llm_cache = load_llm_cache(allow_tools = {"say_hello", "say_goodbye"})
+if llm_cache:
+    llm_cache.attach(weather_agent)
+
 
 
 # *****Define Agent Interaction Function*****
@@ -101,12 +150,16 @@ async def call_agent_async(query: str, runner, user_id, session_id):
     
 # *****Run Conversation*****
 async def run_conversation():
-    session = await session_service.create_session(
+    session = await session_service.get_session(
+        app_name = APP_NAME,
+        user_id = USER_ID,
+        session_id = SESSION_ID,
+    ) or await session_service.create_session(
         app_name = APP_NAME,
         user_id = USER_ID,
         session_id = SESSION_ID,
     )
-    print(f"\nSession created: {SESSION_ID} for user {USER_ID} in app {APP_NAME}.")
+    print(f"\nSession ready: {SESSION_ID} for user {USER_ID} in app {APP_NAME} ({len(session.events)} earlier events).")
     runner = Runner(
         agent = weather_agent,
         session_service = session_service,
@@ -194,15 +247,20 @@ if greeting_agent and farewell_agent and "get_weather" in globals():
         description = "THe main coordinating agent that handles the weather requests, and delegates greeting/farewell to the specialists.",
         instruction = "You are the main Weather Agent."
                     "Use the 'get_weather' tool ONLY for specific weather requests (e.g., 'weather in London'). "
+                    "If the request names more than one city (e.g., 'weather in London, Tokyo and New York'), "
+                    "call 'get_weather_batch' ONCE with all of the cities instead of calling 'get_weather' for each. "
                     "You have specialized sub-agents: "
                     "1. 'greeting_agent': Handles simple greetings like 'Hi', 'Hello'. Delegate to it for these. "
                     "2. 'farewell_agent': Handles simple farewells like 'Bye', 'See you'. Delegate to it for these. "
                     "Analyze the user's query. If it's a greeting, delegate to 'greeting_agent'. If it's a farewell, delegate to 'farewell_agent'. "
                     "If it's a weather request, handle it yourself using 'get_weather'. "
-                    "For anything else, respond appropriately or state you cannot handle it.",
-        tools = [get_weather, say_hello, say_goodbye],
+                    "For anything else, respond appropriately or state you cannot handle it. "
+                    "Summary of the earlier conversation, if any: {conversation_summary?}",
+        tools = [get_weather, get_weather_batch, say_hello, say_goodbye],
         sub_agents = [greeting_agent, farewell_agent],
     )
+    if llm_cache:
+        llm_cache.attach(weather_agent_team)
     print(f"\n Root Agent {weather_agent_team.name} created with the model {root_agent_model} with sub-agents {[sa.name for sa in weather_agent_team.sub_agents]}.")
 else:
     print("Cannot create root agent because one or more sub-agents failed to initialize or 'get_weather' tool is missing.")    
@@ -223,16 +281,19 @@ elif 'root_agent' not in globals():
 if "weather_agent_team" in globals() and globals()[root_agent_var_name]:
     async def run_team_conversation():
         print("\n---Testing Agent Team Delegation---")
-        session_service = InMemorySessionService()
         SESSION_ID =  "session_001_agent_team"
         USER_ID = "USER_1_agent_team"
         APP_NAME = "WeatherAgentApp_Team"
-        session = await session_service.create_session(
+        session = await session_service.get_session(
+            app_name = APP_NAME,
+            user_id = USER_ID,
+            session_id = SESSION_ID,
+        ) or await session_service.create_session(
             app_name = APP_NAME,
             user_id = USER_ID,
             session_id = SESSION_ID,
         )
-        print(f"\nSession created: {SESSION_ID} for user {USER_ID} in app {APP_NAME}.")
+        print(f"\nSession ready: {SESSION_ID} for user {USER_ID} in app {APP_NAME} ({len(session.events)} earlier events).")
         
         actual_root_agent = globals()[root_agent_var_name]
         runner_agent_team = Runner(
@@ -246,6 +307,8 @@ if "weather_agent_team" in globals() and globals()[root_agent_var_name]:
         await call_agent_async("Hello", runner=runner_agent_team, user_id=USER_ID, session_id=SESSION_ID)
         await call_agent_async("Bye", runner=runner_agent_team, user_id=USER_ID, session_id=SESSION_ID)
         await call_agent_async("Hey I'm Abhay", runner=runner_agent_team, user_id=USER_ID, session_id=SESSION_ID)        
+        if llm_cache:
+            print(f"\nModel response cache: {llm_cache.stats()}")
         
         
     if __name__ == "__main__":
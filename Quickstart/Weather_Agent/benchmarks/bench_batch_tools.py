@@ -0,0 +1,115 @@
+"""
+Count model invocations per multi-city question, with and without the batch tools.
+
+Runs the same weather and time questions through Runner twice, against the
+scripted fake model: once with an agent that only has the single-city tools
+and once with the agent's real tool list, which includes get_weather_batch and
+get_current_time_batch. Each model invocation is a full LLM round trip, so the
+difference is the latency the batch tools save.
+
+Usage:
+    python Quickstart/Weather_Agent/benchmarks/bench_batch_tools.py
+    python Quickstart/Weather_Agent/benchmarks/bench_batch_tools.py --agent weather_agent --latency 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import runpy
+import sys
+import time
+import warnings
+
+from google.adk.agents import Agent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+WEATHER_AGENT_DIR = os.path.dirname(BENCHMARK_DIR)
+QUICKSTART_DIR = os.path.dirname(WEATHER_AGENT_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+from fake_llm import ScriptedLlm  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+QUESTIONS = [
+    "What is the weather in New York?",
+    "What is the weather in London and Tokyo?",
+    "What is the weather in London, Tokyo and New York?",
+    "What time is it in New York, London, Tokyo, Paris and Sydney?",
+]
+APP_NAME = "BatchToolsBenchmark"
+USER_ID = "bench_user"
+
+
+def load_agent_tools(agent_name: str):
+    """Return (instruction, all tools, single-city tools) of the agent to benchmark."""
+    if agent_name == "weather_agent":
+        # Weather_Agent/agent.py is a script: running it defines the tools and prints its demo output
+        sys.path.insert(0, WEATHER_AGENT_DIR)
+        module = runpy.run_path(os.path.join(WEATHER_AGENT_DIR, "agent.py"), run_name="weather_agent")
+        agent = module["weather_agent"]
+        return agent.instruction, agent.tools, [module["get_weather"]]
+    sys.path.insert(0, QUICKSTART_DIR)
+    from multi_tool_agent import agent as multi_tool_agent
+
+    agent = multi_tool_agent.root_agent
+    return agent.instruction, agent.tools, [multi_tool_agent.get_weather, multi_tool_agent.get_current_time]
+
+
+async def ask(agent: Agent, model: ScriptedLlm, question: str) -> dict:
+    session_service = InMemorySessionService()
+    runner = Runner(agent=agent, app_name=APP_NAME, session_service=session_service)
+    session = await session_service.create_session(app_name=APP_NAME, user_id=USER_ID)
+    before = model.invocations
+    tool_calls = 0
+    final_text = ""
+    start = time.perf_counter()
+    content = types.Content(role="user", parts=[types.Part(text=question)])
+    async for event in runner.run_async(user_id=USER_ID, session_id=session.id, new_message=content):
+        tool_calls += len(event.get_function_calls())
+        if event.is_final_response() and event.content and event.content.parts:
+            final_text = event.content.parts[0].text or ""
+    return {
+        "model_invocations": model.invocations - before,
+        "tool_calls": tool_calls,
+        "seconds": round(time.perf_counter() - start, 4),
+        "answer": final_text,
+    }
+
+
+async def run(agent_name: str, latency: float) -> dict:
+    instruction, all_tools, single_tools = load_agent_tools(agent_name)
+    results = []
+    for label, tools in (("single_city_tools", single_tools), ("batch_tools", all_tools)):
+        model = ScriptedLlm(latency=latency)
+        agent = Agent(name=f"{label}_agent", model=model, instruction=instruction, tools=list(tools))
+        for question in QUESTIONS:
+            results.append({"tools": label, "question": question, **await ask(agent, model, question)})
+    return {"agent": agent_name, "model_latency_seconds": latency, "results": results}
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Compare model round trips with and without the batch tools.")
+    parser.add_argument("--agent", choices=("multi_tool_agent", "weather_agent"), default="multi_tool_agent")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds each fake model invocation takes")
+    parser.add_argument("--output", default="", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args.agent, args.latency))
+    print(f"{'tools':<18} {'model calls':>11} {'tool calls':>10} {'seconds':>8}  question")
+    for entry in report["results"]:
+        print(
+            f"{entry['tools']:<18} {entry['model_invocations']:>11} {entry['tool_calls']:>10} "
+            f"{entry['seconds']:>8.3f}  {entry['question']}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Measure prompt size and turn latency of a long weather conversation, with and
+without session compaction.
+
+Sends `--turns` weather questions through Runner to one session, against the
+scripted fake model, whose latency grows with the prompt size
+(`--latency-per-1k-tokens`). The weather tool reads the unit preference and
+records the last city in state like get_weather_stateful, and the agent saves
+its answer under output_key, as in Stateful_agent.py. The run is repeated on a
+SqliteSessionService without and with compaction. The report gives the prompt
+tokens the model received, the turn latency, and the events and bytes stored
+for the session at a few points in the conversation.
+
+Usage:
+    python Quickstart/Weather_Agent/benchmarks/bench_compaction.py
+    python Quickstart/Weather_Agent/benchmarks/bench_compaction.py --turns 100 --keep-turns 6
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+from google.adk.agents import Agent
+from google.adk.runners import Runner
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+from compaction import CompactionConfig  # noqa: E402
+from fake_llm import ScriptedLlm  # noqa: E402
+from session_store import SqliteSessionService  # noqa: E402
+from weather_provider import StaticWeatherProvider, load_city_index  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+APP_NAME = "CompactionBenchmark"
+USER_ID = "bench_user"
+SESSION_ID = "long_session"
+CITIES = ["London", "Tokyo", "New York", "Paris", "Sydney", "Berlin", "Mumbai", "Toronto"]
+
+weather_provider = StaticWeatherProvider(load_city_index(), {city: (20 + position, "sunny") for position, city in enumerate(CITIES)})
+
+
+def get_weather(city: str, tool_context: ToolContext) -> dict:
+    """Retrieves the current weather report for a city in the user's preferred unit."""
+    weather = weather_provider.get_weather(city)
+    if weather["status"] != "success":
+        return {"status": "error", "message": f"City {city} not found in mock database."}
+    unit = tool_context.state.get("user_preference_unit", "Celsius")
+    temperature = weather["temperature_celsius"] * 9 / 5 + 32 if unit == "Fahrenheit" else weather["temperature_celsius"]
+    tool_context.state["last_city_checked_stateful"] = city
+    return {
+        "status": "success",
+        "report": f"The weather in {weather['city']} is {weather['condition']} with a temperature of {temperature}"
+                  f"{'°F' if unit == 'Fahrenheit' else '°C'}",
+    }
+
+
+def stored_history(service: SqliteSessionService) -> dict:
+    events, size = service._conn.execute(
+        "SELECT count(*), coalesce(sum(length(CAST(event_data AS BLOB))), 0) FROM events"
+        " WHERE app_name = ? AND user_id = ? AND session_id = ?",
+        (APP_NAME, USER_ID, SESSION_ID),
+    ).fetchone()
+    return {"stored_events": events, "stored_event_bytes": size}
+
+
+async def converse(compaction, turns: int, latency_per_1k_tokens: float, report_every: int, db_path: str) -> dict:
+    service = SqliteSessionService(db_path, compaction=compaction)
+    model = ScriptedLlm(latency_per_1k_tokens=latency_per_1k_tokens)
+    agent = Agent(
+        name="weather_agent",
+        model=model,
+        instruction="You are the main Weather Agent. Provide weather using 'get_weather'. "
+                    "Summary of the earlier conversation, if any: {conversation_summary?}",
+        tools=[get_weather],
+        output_key="last_weather_report",
+    )
+    runner = Runner(agent=agent, app_name=APP_NAME, session_service=service)
+    await service.create_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID, state={"user_preference_unit": "Celsius"}
+    )
+
+    samples = []
+    total_tokens = 0
+    total_seconds = 0.0
+    for turn in range(1, turns + 1):
+        content = types.Content(role="user", parts=[types.Part(text=f"What is the weather in {CITIES[turn % len(CITIES)]}?")])
+        prompt_tokens = 0
+        start = time.perf_counter()
+        async for event in runner.run_async(user_id=USER_ID, session_id=SESSION_ID, new_message=content):
+            if event.usage_metadata and event.usage_metadata.prompt_token_count:
+                prompt_tokens += event.usage_metadata.prompt_token_count
+        seconds = time.perf_counter() - start
+        total_tokens += prompt_tokens
+        total_seconds += seconds
+        if turn == 1 or turn % report_every == 0 or turn == turns:
+            samples.append({
+                "turn": turn,
+                "prompt_tokens": prompt_tokens,
+                "turn_ms": round(seconds * 1000, 1),
+                **stored_history(service),
+            })
+    state = await service.get_state(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
+    service.close()
+    return {
+        "compaction": compaction._asdict() if compaction else None,
+        "mean_prompt_tokens_per_turn": round(total_tokens / turns, 1),
+        "mean_turn_ms": round(total_seconds * 1000 / turns, 1),
+        "turns": samples,
+        "final_state_keys": sorted(state),
+    }
+
+
+async def run(args) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for label, compaction in (
+            ("full_history", None),
+            ("compacted", CompactionConfig(keep_turns=args.keep_turns, max_history_bytes=args.max_history_bytes)),
+        ):
+            results[label] = await converse(
+                compaction, args.turns, args.latency_per_1k_tokens, args.report_every,
+                os.path.join(directory, f"{label}.db"),
+            )
+    return results
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Compare prompt size and latency with and without compaction.")
+    parser.add_argument("--turns", type=int, default=60, help="Conversation turns (default: 60)")
+    parser.add_argument("--keep-turns", type=int, default=4, help="Turns kept verbatim (default: 4)")
+    parser.add_argument("--max-history-bytes", type=int, default=64 * 1024,
+                        help="Cap on the kept history per session (default: 65536)")
+    parser.add_argument("--latency-per-1k-tokens", type=float, default=0.01,
+                        help="Seconds of fake model latency per thousand prompt tokens (default: 0.01)")
+    parser.add_argument("--report-every", type=int, default=10, help="Sample every N turns (default: 10)")
+    parser.add_argument("--output", default="", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    print(f"{'history':<13} {'turn':>5} {'prompt tokens':>13} {'turn ms':>8} {'events':>7} {'bytes':>8}")
+    for label, result in results.items():
+        for sample in result["turns"]:
+            print(
+                f"{label:<13} {sample['turn']:>5} {sample['prompt_tokens']:>13} {sample['turn_ms']:>8} "
+                f"{sample['stored_events']:>7} {sample['stored_event_bytes']:>8}"
+            )
+        print(f"{label:<13} {'mean':>5} {result['mean_prompt_tokens_per_turn']:>13} {result['mean_turn_ms']:>8}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
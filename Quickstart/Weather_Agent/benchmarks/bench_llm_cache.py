@@ -0,0 +1,94 @@
+"""
+Measure the model response cache on the weather agent team.
+
+Runs the load test's query mix (see load_test.py) through the agent team from
+agent.py with the scripted fake model, three times on the same seeded plan:
+
+- no_cache: every model call goes to the model
+- cold_cache: an LlmResponseCache attached to the team, starting empty
+- warm_cache: a new cache object on the database the cold run left behind,
+  as after a restart
+
+Each session starts fresh, so the first turns of different sessions send the
+model identical requests. Answers written from a get_weather result are never
+cached, so a weather turn saves at most its first model call. The report gives
+the model invocations, throughput and per-route p50/p95 of each run, with the
+cache's hit rate, bypasses, latency saved and database size.
+
+Usage:
+    python Quickstart/Weather_Agent/benchmarks/bench_llm_cache.py
+    python Quickstart/Weather_Agent/benchmarks/bench_llm_cache.py --sessions 100 --turns 2 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+WEATHER_AGENT_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, WEATHER_AGENT_DIR)
+from fake_llm import ScriptedLlm  # noqa: E402
+from llm_cache import LlmResponseCache  # noqa: E402
+from load_test import DEFAULT_MIX, load_root_agent, parse_mix, run_load, summarize, use_model  # noqa: E402
+
+from google.adk.sessions import InMemorySessionService  # noqa: E402
+
+# Tools of agent.py whose results are fixed text
+STATIC_TOOLS = {"say_hello", "say_goodbye"}
+
+
+def run_once(args, agent_file: str, cache_path: str = "") -> dict:
+    root_agent = load_root_agent(agent_file, "weather_agent_team")
+    model = ScriptedLlm(latency=args.latency)
+    use_model(root_agent, model)
+    cache = LlmResponseCache(cache_path, allow_tools=STATIC_TOOLS) if cache_path else None
+    if cache:
+        cache.attach(root_agent)
+    results, wall_seconds = asyncio.run(
+        run_load(root_agent, InMemorySessionService(), args.sessions, args.turns, args.mix, args.seed)
+    )
+    report = summarize(results, wall_seconds, model)
+    report["routes"] = {
+        route: {key: value for key, value in stats.items() if key != "answered_by"}
+        for route, stats in report["routes"].items()
+    }
+    if cache:
+        report["cache"] = cache.stats()
+        cache.close()
+    return report
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Compare the agent team with and without the model response cache.")
+    parser.add_argument("--agent-file", default=os.path.join(WEATHER_AGENT_DIR, "agent.py"),
+                        help="Script defining weather_agent_team (default: agent.py)")
+    parser.add_argument("--sessions", type=int, default=50, help="Concurrent sessions (default: 50)")
+    parser.add_argument("--turns", type=int, default=3, help="Queries per session (default: 3)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Route weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds per fake model call (default: 0.1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["WEATHER_SESSION_DB"] = os.path.join(directory, "agent_sessions.db")
+        os.environ.pop("WEATHER_LLM_CACHE", None)
+        cache_path = os.path.join(directory, "llm_cache.db")
+        for label, path in (("no_cache", ""), ("cold_cache", cache_path), ("warm_cache", cache_path)):
+            results[label] = run_once(args, args.agent_file, path)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
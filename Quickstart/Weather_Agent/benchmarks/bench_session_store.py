@@ -0,0 +1,153 @@
+"""
+Benchmark SqliteSessionService against InMemorySessionService.
+
+Creates `--sessions` sessions, appends `--events` events to each (every third
+one carrying a one-key state delta, like a weather tool call), then reads every
+session back with its full history and reads its state alone. Reports
+operations per second for each step, plus the size of the database file.
+A last run sends `--turns` conversation turns through Runner with the
+scripted fake model, to show the cost per turn of persisting sessions. Each
+service first runs `--warmup-turns` untimed turns in a session of their own,
+so the one-off imports and caches of the first Runner pass are not charged to
+whichever service runs first.
+
+Usage:
+    python Quickstart/Weather_Agent/benchmarks/bench_session_store.py
+    python Quickstart/Weather_Agent/benchmarks/bench_session_store.py --sessions 1000 --events 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+from google.adk.agents import Agent
+from google.adk.events import Event, EventActions
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.genai import types
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+from fake_llm import ScriptedLlm  # noqa: E402
+from session_store import SqliteSessionService  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+APP_NAME = "SessionStoreBenchmark"
+USER_ID = "bench_user"
+CITIES = ["London", "Tokyo", "New York", "Paris", "Sydney"]
+
+
+def make_event(position: int) -> Event:
+    city = CITIES[position % len(CITIES)]
+    delta = {"last_city_checked_stateful": city} if position % 3 == 0 else {}
+    return Event(
+        invocation_id=f"inv_{position // 4}",
+        author="user" if position % 2 == 0 else "weather_agent",
+        content=types.Content(role="user", parts=[types.Part(text=f"What is the weather in {city}?")]),
+        actions=EventActions(state_delta=delta),
+    )
+
+
+async def bench_service(service, sessions: int, events: int) -> dict:
+    ids = [f"session_{number}" for number in range(sessions)]
+    timings = {}
+
+    start = time.perf_counter()
+    handles = [
+        await service.create_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id, state={"user_preference_unit": "Celsius"}
+        )
+        for session_id in ids
+    ]
+    timings["create_per_second"] = sessions / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for position in range(events):
+        for session in handles:
+            await service.append_event(session, make_event(position))
+    timings["append_per_second"] = sessions * events / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for session_id in ids:
+        await service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+    timings["get_with_history_per_second"] = sessions / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for session_id in ids:
+        await service.get_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id, config=GetSessionConfig(num_recent_events=0)
+        )
+    timings["get_state_only_per_second"] = sessions / (time.perf_counter() - start)
+    return {key: round(value) for key, value in timings.items()}
+
+
+async def run_turns(runner: Runner, session_id: str, turns: int) -> None:
+    for turn in range(turns):
+        content = types.Content(role="user", parts=[types.Part(text=f"What is the weather in {CITIES[turn % 5]}?")])
+        async for _ in runner.run_async(user_id=USER_ID, session_id=session_id, new_message=content):
+            pass
+
+
+async def bench_runner(service, turns: int, warmup_turns: int) -> float:
+    """Seconds per conversation turn through Runner, with the fake model and the weather tool."""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(BENCHMARK_DIR)))
+    from multi_tool_agent import agent as multi_tool_agent
+
+    agent = Agent(name="weather_time_agent", model=ScriptedLlm(), tools=[multi_tool_agent.get_weather])
+    runner = Runner(agent=agent, app_name=APP_NAME, session_service=service)
+    for session_id in ("warmup_session", "runner_session"):
+        await service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+    await run_turns(runner, "warmup_session", warmup_turns)
+    start = time.perf_counter()
+    await run_turns(runner, "runner_session", turns)
+    return (time.perf_counter() - start) / turns
+
+
+async def run(sessions: int, events: int, turns: int, warmup_turns: int) -> dict:
+    results = {"sessions": sessions, "events_per_session": events}
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "sessions.db")
+        for label, factory in (
+            ("in_memory", InMemorySessionService),
+            ("sqlite", lambda: SqliteSessionService(db_path)),
+        ):
+            service = factory()
+            results[label] = await bench_service(service, sessions, events)
+            if turns:
+                results[label]["runner_ms_per_turn"] = round(await bench_runner(service, turns, warmup_turns) * 1000, 2)
+            if label == "sqlite":
+                service.close()
+                results[label]["database_bytes"] = sum(
+                    os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+                )
+    return results
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Compare the SQLite and in-memory session services.")
+    parser.add_argument("--sessions", type=int, default=200, help="Sessions to create (default: 200)")
+    parser.add_argument("--events", type=int, default=20, help="Events appended per session (default: 20)")
+    parser.add_argument("--turns", type=int, default=50, help="Runner turns with the fake model, 0 to skip (default: 50)")
+    parser.add_argument("--warmup-turns", type=int, default=5,
+                        help="Untimed Runner turns per service before the timed ones (default: 5)")
+    parser.add_argument("--output", default="", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args.sessions, args.events, args.turns, args.warmup_turns))
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark the city index behind the weather tools.
+
+Builds a CityIndex of synthetic cities (default 200,000, about the size of the
+GeoNames cities1000 dump, with diacritics and aliases mixed in) or loads a real
+dataset, then reports build time, memory per city, and the latency of hits,
+country-qualified hits and suggestions for misses. A second run sends
+concurrent requests for the same few cities to a slow provider, with and
+without the weather cache, and counts the upstream fetches.
+
+Usage:
+    python Quickstart/Weather_Agent/benchmarks/bench_weather_provider.py --cities 200000
+    python Quickstart/Weather_Agent/benchmarks/bench_weather_provider.py --dataset cities1000.txt
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from weather_provider import (  # noqa: E402
+    CityIndex,
+    WeatherCache,
+    WeatherProvider,
+    load_city_index,
+    normalize_city,
+)
+
+SYLLABLES = [
+    "ka", "lo", "san", "ber", "mé", "ri", "to", "vil", "ståd", "no", "gü", "ra", "del", "por", "ia", "ze",
+    "mar", "ho", "lin", "ås", "ter", "bu", "qua", "sé", "wen", "dor", "fi", "gra", "ny", "pol", "ek", "sur",
+]
+SUFFIXES = ["", "", "", " City", "burg", "ville", " Springs", "ton"]
+COUNTRIES = ["US", "GB", "DE", "FR", "BR", "IN", "JP", "CN", "ES", "IT", "SE", "TR"]
+
+
+def synthetic_index(count: int, seed: int) -> CityIndex:
+    rng = random.Random(seed)
+    index = CityIndex()
+    for _ in range(count):
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))).capitalize() + rng.choice(SUFFIXES)
+        aliases = [name.upper() + " TOWN"] if rng.random() < 0.1 else []
+        index.add(
+            name=name,
+            country=rng.choice(COUNTRIES),
+            latitude=rng.uniform(-90, 90),
+            longitude=rng.uniform(-180, 180),
+            population=int(rng.paretovariate(1.2) * 1000),
+            timezone="Etc/UTC",
+            aliases=aliases,
+        )
+    return index
+
+
+class SlowProvider(WeatherProvider):
+    """Simulates a remote weather API: every fetch takes `latency` seconds and is counted."""
+
+    def __init__(self, cities: CityIndex, latency: float, cache: WeatherCache):
+        super().__init__(cities, cache)
+        self.latency = latency
+        self.fetches = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, city):
+        with self._lock:
+            self.fetches += 1
+        time.sleep(self.latency)
+        return {"temperature_celsius": 20.0, "condition": "clear"}
+
+
+def bench_cache(index: CityIndex, requests: int, concurrency: int, cities: int, latency: float) -> dict:
+    """`requests` lookups of `cities` distinct cities from `concurrency` threads, with and without the cache."""
+    names = [index.name(city_id) for city_id in range(min(cities, len(index)))]
+    queries = [names[position % len(names)] for position in range(requests)]
+    results = {}
+    for label, ttl in (("uncached", 0), ("cached", 300)):
+        provider = SlowProvider(index, latency, WeatherCache(ttl=ttl))
+        # Without a cache every request goes upstream
+        request = provider.get_weather if ttl else (lambda query: provider.fetch(index.lookup(query)))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(request, queries))
+        results[label] = {
+            "seconds": round(time.perf_counter() - start, 3),
+            "upstream_fetches": provider.fetches,
+            **({"cache": provider.cache.stats()} if ttl else {}),
+        }
+    return {"requests": requests, "concurrency": concurrency, "distinct_cities": len(names), **results}
+
+
+def per_call_ns(func, queries) -> float:
+    start = time.perf_counter_ns()
+    for query in queries:
+        func(query)
+    return round((time.perf_counter_ns() - start) / len(queries), 1)
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark the weather agents' city index.")
+    parser.add_argument("--cities", type=int, default=200_000, help="Synthetic cities to index (default: 200000)")
+    parser.add_argument("--dataset", default="", help="Load this GeoNames or CSV dataset instead of synthetic cities")
+    parser.add_argument("--queries", type=int, default=100_000, help="Lookups per measurement (default: 100000)")
+    parser.add_argument("--cache-requests", type=int, default=2000,
+                        help="Requests in the weather cache run, 0 to skip it (default: 2000)")
+    parser.add_argument("--cache-concurrency", type=int, default=32,
+                        help="Threads in the weather cache run (default: 32)")
+    parser.add_argument("--cache-cities", type=int, default=20,
+                        help="Distinct cities requested in the weather cache run (default: 20)")
+    parser.add_argument("--fetch-latency", type=float, default=0.02,
+                        help="Seconds each upstream fetch takes in the weather cache run (default: 0.02)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = load_city_index(args.dataset) if args.dataset else synthetic_index(args.cities, args.seed)
+    build_seconds = time.perf_counter() - start
+
+    rng = random.Random(args.seed)
+    names = [index.city(rng.randrange(len(index))).name for _ in range(args.queries)]
+    # Spell the names the way users do: different case, diacritics dropped, underscores
+    spelled = [
+        rng.choice((str.lower, str.upper, str.title))(name).replace(" ", rng.choice((" ", "_")))
+        for name in names
+    ]
+    misses = [name + "qx" for name in names[: max(1, args.queries // 100)]]
+    qualified = [f"{name}, {index.city(index.lookup_id(name)).country}" for name in names[: max(1, args.queries // 10)]]
+
+    normalize_city.cache_clear()
+    uncached_ns = per_call_ns(index.lookup_id, spelled)
+    repeated = spelled[:1000] * (len(spelled) // 1000 or 1)
+    per_call_ns(index.lookup_id, repeated)
+    cached_ns = per_call_ns(index.lookup_id, repeated)
+    dict_probe_ns = per_call_ns(index._ids.get, [normalize_city(query) for query in spelled])
+
+    start = time.perf_counter()
+    index.suggest("x")
+    suggestion_build_seconds = time.perf_counter() - start
+    suggest_ns = per_call_ns(index.suggest, misses)
+    qualified_ns = per_call_ns(index.lookup_id, qualified)
+
+    hits = sum(index.lookup_id(query) is not None for query in spelled[:10000])
+    results = {
+        "cities": len(index),
+        "build_seconds": round(build_seconds, 3),
+        "cities_per_second": round(len(index) / build_seconds) if build_seconds else None,
+        "lookup_ns_repeated_names": cached_ns,
+        "lookup_ns_distinct_names": uncached_ns,
+        "dict_probe_ns": dict_probe_ns,
+        "qualified_lookup_ns": qualified_ns,
+        "suggestion_index_build_seconds": round(suggestion_build_seconds, 3),
+        "suggest_ns": suggest_ns,
+        "hit_rate_sample": round(hits / min(len(spelled), 10000), 4),
+        "memory": index.memory_usage(),
+    }
+    if args.cache_requests:
+        results["weather_cache"] = bench_cache(
+            index, args.cache_requests, args.cache_concurrency, args.cache_cities, args.fetch_latency
+        )
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
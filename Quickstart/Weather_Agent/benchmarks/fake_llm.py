@@ -0,0 +1,218 @@
+"""
+Deterministic stand-in for Gemini, for running the weather agents offline.
+
+ScriptedLlm reads the last user message and the tool results that followed
+it, and answers the way a tool-calling model would:
+
+- weather and time questions ("weather in London, Tokyo and New York") call the
+  agent's *_batch tool once with every city if the agent has one, otherwise
+  the single-city tool (get_weather, or a variant such as get_weather_stateful)
+  once per model turn for each city in turn
+- greetings and farewells are handed to the sub-agent named after them
+  (greeting_agent, farewell_agent) with transfer_to_agent if there is one,
+  otherwise answered with the agent's own say_hello or say_goodbye tool
+- an agent without the tool a question needs transfers it to the weather or
+  root agent, the way a sub-agent hands the next question back to its parent
+- when every call has a result, it replies with the tool reports as text
+
+Every generate_content_async call is counted in `invocations`, and can be
+delayed by `latency` seconds plus `latency_per_1k_tokens` seconds per thousand
+prompt tokens, to stand in for a real model round trip whose cost grows with
+the prompt. Token usage is estimated at four characters per token of the
+request contents, system instruction and tool declarations, and reported in
+usage_metadata.
+"""
+
+import asyncio
+import json
+import re
+from collections import Counter
+from typing import AsyncGenerator, List, Optional, Tuple
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+# Question keyword -> single-city tool; the batch variant is the same name with "_batch"
+INTENT_TOOLS = {
+    "weather": "get_weather",
+    "time": "get_current_time",
+}
+
+# Small-talk intent -> (pattern, tool); the intent name is also how the sub-agent to transfer to is found
+SMALL_TALK = {
+    "greeting": (re.compile(r"^\W*(?:hi|hello|hey|good (?:morning|afternoon|evening))\b", re.IGNORECASE), "say_hello"),
+    "farewell": (re.compile(r"\b(?:bye|goodbye|see you|farewell)\b", re.IGNORECASE), "say_goodbye"),
+}
+TRANSFER_TOOL = "transfer_to_agent"
+OTHER_AGENT_CONTEXT = "For context:"
+# Agents that answer weather and time questions, by name
+MAIN_AGENT_KEYWORDS = ("weather", "root")
+
+CHARS_PER_TOKEN = 4
+
+_USER_NAME = re.compile(r"\b(?:i'm|i am|my name is)\s+([A-Za-z][\w-]*)", re.IGNORECASE)
+
+_CITY_LIST = re.compile(r"\bin\s+(.+)$", re.IGNORECASE)
+_CITY_SEPARATOR = re.compile(r"\s*(?:,|\band\b|&)\s*", re.IGNORECASE)
+
+
+def parse_cities(question: str) -> List[str]:
+    """The cities after the last " in " of a question: "weather in London, Tokyo and Paris?" -> 3 cities."""
+    match = _CITY_LIST.search(question.strip().rstrip("?.!"))
+    if not match:
+        return []
+    return [city for city in _CITY_SEPARATOR.split(match.group(1)) if city]
+
+
+def estimate_tokens(llm_request: LlmRequest) -> int:
+    """Rough prompt size of a request: its contents, instruction and tool declarations at CHARS_PER_TOKEN."""
+    characters = 0
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if part.text:
+                characters += len(part.text)
+            if part.function_call is not None:
+                characters += len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+            if part.function_response is not None:
+                characters += len(json.dumps(part.function_response.response or {}, default=str))
+    config = llm_request.config
+    if config is not None and config.system_instruction:
+        characters += len(str(config.system_instruction))
+    if config is not None and config.tools:
+        characters += sum(len(tool.model_dump_json(exclude_none=True)) for tool in config.tools)
+    return characters // CHARS_PER_TOKEN
+
+
+def _last_user_turn(llm_request: LlmRequest) -> Tuple[str, List[types.FunctionResponse]]:
+    """
+    The text of the last user message and the function responses that came after it.
+
+    ADK hands an agent the events of other agents as user messages that start
+    with "For context:"; they are not questions. A transfer_to_agent result
+    among them counts as a transfer_to_agent response, so the agent that was
+    transferred to does not transfer the question again.
+    """
+    responses = []
+    for content in reversed(llm_request.contents or []):
+        parts = content.parts or []
+        if content.role == "user" and parts and (parts[0].text or "").startswith(OTHER_AGENT_CONTEXT):
+            if any(f"`{TRANSFER_TOOL}` tool returned" in (part.text or "") for part in parts):
+                responses.append(types.FunctionResponse(name=TRANSFER_TOOL, response={}))
+            continue
+        for part in reversed(parts):
+            if part.function_response is not None:
+                responses.append(part.function_response)
+            elif content.role == "user" and part.text:
+                return part.text, list(reversed(responses))
+    return "", list(reversed(responses))
+
+
+class ScriptedLlm(BaseLlm):
+    """
+    Fake model that plans tool calls from the question text.
+
+    Args:
+        model (str): Name reported in LlmRequest/LlmResponse
+        latency (float): Seconds each invocation sleeps before answering
+        latency_per_1k_tokens (float): Extra seconds per thousand prompt tokens
+    """
+
+    model: str = "scripted-fake-llm"
+    latency: float = 0.0
+    latency_per_1k_tokens: float = 0.0
+    invocations: int = 0
+
+    @staticmethod
+    def _call(name: str, args: dict) -> types.Part:
+        return types.Part(function_call=types.FunctionCall(name=name, args=args))
+
+    @staticmethod
+    def _transfer_target(tools: dict, keywords: Tuple[str, ...]) -> Optional[str]:
+        """The first agent transfer_to_agent can reach whose name contains one of the keywords."""
+        tool = tools.get(TRANSFER_TOOL)
+        for agent_name in getattr(tool, "_agent_names", None) or ():
+            if any(keyword in agent_name for keyword in keywords):
+                return agent_name
+        return None
+
+    def _plan(self, llm_request: LlmRequest) -> Optional[types.Part]:
+        """The next function call to make for the current question, or None when it is answered."""
+        question, responses = _last_user_turn(llm_request)
+        tools = llm_request.tools_dict or {}
+        cities = parse_cities(question)
+        answered = Counter(response.name for response in responses)
+        transferred = TRANSFER_TOOL in answered
+
+        for keyword, tool_name in INTENT_TOOLS.items():
+            if keyword not in question.lower() or not cities:
+                continue
+            batch_name = f"{tool_name}_batch"
+            if batch_name in tools and len(cities) > 1:
+                if batch_name not in answered:
+                    return self._call(batch_name, {"cities": cities})
+                continue
+            # get_weather, or a variant of it such as get_weather_stateful
+            single_name = tool_name if tool_name in tools else next(
+                (name for name in tools if name.startswith(f"{tool_name}_") and name != batch_name), None
+            )
+            if single_name is not None:
+                done = answered[single_name]
+                if done < len(cities):
+                    return self._call(single_name, {"city": cities[done]})
+                continue
+            target = None if transferred else self._transfer_target(tools, MAIN_AGENT_KEYWORDS)
+            if target is not None:
+                return self._call(TRANSFER_TOOL, {"agent_name": target})
+        if any(keyword in question.lower() for keyword in INTENT_TOOLS) and cities:
+            return None
+
+        for intent, (pattern, tool_name) in SMALL_TALK.items():
+            if not pattern.search(question):
+                continue
+            if tool_name in answered:
+                return None
+            target = None if transferred else self._transfer_target(tools, (intent,))
+            if target is not None:
+                return self._call(TRANSFER_TOOL, {"agent_name": target})
+            if tool_name in tools:
+                name = _USER_NAME.search(question) if tool_name == "say_hello" else None
+                return self._call(tool_name, {"name": name.group(1)} if name else {})
+            return None
+        return None
+
+    @staticmethod
+    def _summary(llm_request: LlmRequest) -> str:
+        _, responses = _last_user_turn(llm_request)
+        reports = []
+        for response in responses:
+            if response.name == TRANSFER_TOOL:
+                continue
+            result = response.response or {}
+            for entry in result.get("results", [result]):
+                reports.append(
+                    entry.get("report") or entry.get("error_message") or entry.get("message")
+                    or entry.get("result") or str(entry)
+                )
+        return " ".join(reports) or "I can only help with the weather and the time."
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.invocations += 1
+        prompt_tokens = estimate_tokens(llm_request)
+        delay = self.latency + self.latency_per_1k_tokens * prompt_tokens / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        call = self._plan(llm_request)
+        part = call if call is not None else types.Part(text=self._summary(llm_request))
+        output_tokens = len(part.text or str(part.function_call.args)) // CHARS_PER_TOKEN
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=prompt_tokens + output_tokens,
+            ),
+        )
@@ -0,0 +1,207 @@
+"""
+Load test for the weather agent team: many concurrent sessions through Runner.
+
+Loads the agent team from agent.py (weather_agent_team) or Stateful_agent.py
+(root_agent_stateful), swaps every agent's model for the scripted fake model
+with the given latency, and runs `--sessions` sessions concurrently, each
+sending `--turns` queries drawn from the query mix:
+
+- weather: a city the mock weather table knows
+- greeting / farewell: small talk the root agent delegates to its sub-agents
+- unknown_city: a weather question the tool cannot answer
+
+The query sequence is seeded, so runs are repeatable. The report gives overall
+throughput and, per route, the number of queries, the agent that gave the
+final answer and the p50/p95/p99 time from sending a query to its final
+response.
+
+Usage:
+    python Quickstart/Weather_Agent/benchmarks/load_test.py --sessions 50 --turns 10
+    python Quickstart/Weather_Agent/benchmarks/load_test.py --agent stateful --latency 0.2 \\
+        --mix weather=6,greeting=2,farewell=1,unknown_city=1 --sqlite
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import runpy
+import sys
+import tempfile
+import time
+import warnings
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+from google.adk.agents import LlmAgent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+WEATHER_AGENT_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, WEATHER_AGENT_DIR)
+from fake_llm import ScriptedLlm  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+# Script and variable name of each agent team
+AGENTS = {
+    "team": ("agent.py", "weather_agent_team"),
+    "stateful": ("Stateful_agent.py", "root_agent_stateful"),
+}
+QUERIES = {
+    "weather": ["What is the weather in New York?", "What's the weather in London?", "Tell me the weather in Tokyo."],
+    "greeting": ["Hello", "Hi, I'm Abhay!", "Hey there"],
+    "farewell": ["Bye", "Goodbye!", "See you later"],
+    "unknown_city": ["What is the weather in Atlantis?", "What's the weather in Gotham?"],
+}
+DEFAULT_MIX = "weather=6,greeting=2,farewell=1,unknown_city=1"
+APP_NAME = "WeatherLoadTest"
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """"weather=6,greeting=2" -> {"weather": 6.0, "greeting": 2.0}; routes must be keys of QUERIES."""
+    mix = {}
+    for item in text.split(","):
+        route, _, weight = item.partition("=")
+        route = route.strip()
+        if route not in QUERIES:
+            raise argparse.ArgumentTypeError(f"unknown route {route!r}, expected one of {', '.join(QUERIES)}")
+        mix[route] = float(weight or 1)
+    return mix
+
+
+def load_root_agent(path: str, variable: str) -> LlmAgent:
+    """Run an agent script (without its __main__ demo) and return its root agent."""
+    return runpy.run_path(path, run_name="load_test_agent")[variable]
+
+
+def use_model(agent: LlmAgent, model: ScriptedLlm) -> None:
+    """Point an agent and all of its sub-agents at the fake model."""
+    agent.model = model
+    for sub_agent in agent.sub_agents:
+        use_model(sub_agent, model)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = min(max(1, math.ceil(fraction * len(sorted_values))), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+async def run_session(runner: Runner, session_service, session_number: int, plan: List[tuple], results: list) -> None:
+    user_id = f"load_user_{session_number}"
+    session = await session_service.create_session(app_name=APP_NAME, user_id=user_id)
+    for route, query in plan:
+        content = types.Content(role="user", parts=[types.Part(text=query)])
+        start = time.perf_counter()
+        final_author = None
+        async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=content):
+            if final_author is None and event.is_final_response():
+                final_author = event.author
+                seconds = time.perf_counter() - start
+        if final_author is None:
+            seconds = time.perf_counter() - start
+        results.append((route, seconds, final_author or "no final response"))
+
+
+async def run_load(root_agent: LlmAgent, session_service, sessions: int, turns: int, mix: Dict[str, float], seed: int):
+    rng = random.Random(seed)
+    routes, weights = list(mix), list(mix.values())
+    plans = [
+        [(route, rng.choice(QUERIES[route])) for route in rng.choices(routes, weights, k=turns)]
+        for _ in range(sessions)
+    ]
+    runner = Runner(agent=root_agent, app_name=APP_NAME, session_service=session_service)
+    results: list = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_session(runner, session_service, number, plan, results) for number, plan in enumerate(plans)
+    ))
+    return results, time.perf_counter() - start
+
+
+def summarize(results: list, wall_seconds: float, model: ScriptedLlm) -> dict:
+    by_route = defaultdict(list)
+    authors: Dict[str, Counter] = defaultdict(Counter)
+    for route, seconds, author in results:
+        by_route[route].append(seconds)
+        authors[route][author] += 1
+    routes = {}
+    for route, timings in sorted(by_route.items()):
+        timings.sort()
+        routes[route] = {
+            "queries": len(timings),
+            "answered_by": dict(authors[route]),
+            "p50_ms": round(percentile(timings, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(timings, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(timings, 0.99) * 1000, 1),
+        }
+    return {
+        "queries": len(results),
+        "wall_seconds": round(wall_seconds, 3),
+        "queries_per_second": round(len(results) / wall_seconds, 1) if wall_seconds else None,
+        "model_invocations": model.invocations,
+        "routes": routes,
+    }
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Run concurrent sessions through the weather agent team.")
+    parser.add_argument("--agent", choices=sorted(AGENTS), default="team", help="Agent team to load (default: team)")
+    parser.add_argument("--agent-file", default="", help="Load the agent team from this script instead")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent sessions (default: 20)")
+    parser.add_argument("--turns", type=int, default=10, help="Queries per session (default: 10)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Route weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per fake model call (default: 0.05)")
+    parser.add_argument("--latency-per-1k-tokens", type=float, default=0.0,
+                        help="Extra seconds per thousand prompt tokens (default: 0)")
+    parser.add_argument("--sqlite", action="store_true", help="Keep sessions in SqliteSessionService instead of memory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # The agent scripts open their own session database on import; keep it out of the source tree
+        os.environ["WEATHER_SESSION_DB"] = os.path.join(directory, "agent_sessions.db")
+        script, variable = AGENTS[args.agent]
+        root_agent = load_root_agent(args.agent_file or os.path.join(WEATHER_AGENT_DIR, script), variable)
+        model = ScriptedLlm(latency=args.latency, latency_per_1k_tokens=args.latency_per_1k_tokens)
+        use_model(root_agent, model)
+
+        if args.sqlite:
+            from session_store import SqliteSessionService
+
+            session_service = SqliteSessionService(os.path.join(directory, "load_test.db"))
+        else:
+            session_service = InMemorySessionService()
+        results, wall_seconds = asyncio.run(
+            run_load(root_agent, session_service, args.sessions, args.turns, args.mix, args.seed)
+        )
+        if args.sqlite:
+            session_service.close()
+
+    report = {
+        "agent": args.agent,
+        "sessions": args.sessions,
+        "turns_per_session": args.turns,
+        "model_latency_seconds": args.latency,
+        "session_service": type(session_service).__name__,
+        **summarize(results, wall_seconds, model),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
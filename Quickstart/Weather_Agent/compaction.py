@@ -0,0 +1,133 @@
+"""
+Rolling compaction of session event history.
+
+Every turn replays the whole session history into the model context, so a
+long conversation gets slower and more expensive with every turn. Compaction
+keeps the last `keep_turns` turns verbatim and folds everything older into one
+line per turn in the CONVERSATION_SUMMARY_KEY state entry: the user's
+question, each tool call with its arguments and its report, and the start of
+the final answer. The latest city and report are already in state
+(last_city_checked_stateful from the weather tool, last_weather_report from
+the root agent's output_key), so the summary only has to keep the thread of
+the conversation. Agents see it through an optional instruction placeholder,
+"{conversation_summary?}".
+
+A turn starts at each user message. Turns are also folded, oldest first, while
+the kept history is larger than `max_history_bytes`, though the current turn is
+always kept. The summary keeps its most recent `max_summary_lines` lines.
+
+SqliteSessionService runs compaction when a new turn starts, before the model
+sees the history, and deletes the folded events from the database.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from google.adk.events import Event
+
+CONVERSATION_SUMMARY_KEY = "conversation_summary"
+
+
+class CompactionConfig(NamedTuple):
+    # 0 turns off the turn limit or the byte limit
+    keep_turns: int = int(os.getenv("WEATHER_SESSION_KEEP_TURNS", "4"))
+    max_history_bytes: int = int(os.getenv("WEATHER_SESSION_MAX_HISTORY_BYTES", str(64 * 1024)))
+    max_summary_lines: int = 20
+    max_line_chars: int = 240
+
+
+def is_turn_start(event: Event) -> bool:
+    """A user message: the event a new turn starts with."""
+    return event.author == "user" and bool(event.content and any(part.text for part in event.content.parts or []))
+
+
+def _shorten(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def summarize_turn(events: Sequence[Event], max_chars: int) -> str:
+    """One line for a turn: "Q: ... | tool(args) -> report | A: ...", at most max_chars long."""
+    pieces = []
+    calls: Dict[str, str] = {}
+    answer = ""
+    for event in events:
+        for part in (event.content.parts if event.content else None) or []:
+            if part.function_call is not None:
+                call = part.function_call
+                args = ", ".join(f"{key}={value}" for key, value in (call.args or {}).items())
+                calls[call.id or call.name] = f"{call.name}({args})"
+            elif part.function_response is not None:
+                response = part.function_response
+                result = response.response or {}
+                detail = result.get("report") or result.get("error_message") or result.get("message") \
+                    or result.get("result") or json.dumps(result, default=str)
+                pieces.append(f"{calls.pop(response.id or response.name, response.name)} -> {detail}")
+            elif part.text and not part.thought:
+                if event.author == "user":
+                    pieces.insert(0, f"Q: {part.text}")
+                else:
+                    answer = part.text
+    pieces.extend(calls.values())
+    if answer:
+        pieces.append(f"A: {answer}")
+    return _shorten(" | ".join(pieces), max_chars)
+
+
+def plan_compaction(
+    events: Sequence[Event], config: CompactionConfig, sizes: Optional[Sequence[int]] = None
+) -> int:
+    """
+    How many leading events to fold.
+
+    Args:
+        events (list): The session history, oldest first
+        config (CompactionConfig): Turns and bytes to keep
+        sizes (list, optional): Serialized size of each event; computed if not given
+
+    Returns:
+        int: Number of leading events to fold, always at a turn start so a turn
+        is never split, and never past the start of the current turn.
+    """
+    starts = [position for position, event in enumerate(events) if is_turn_start(event)]
+    if len(starts) <= 1:
+        return 0
+    cut = starts[-config.keep_turns] if config.keep_turns and len(starts) > config.keep_turns else 0
+    if config.max_history_bytes:
+        if sizes is None:
+            sizes = [len(event.model_dump_json(exclude_none=True)) for event in events]
+        kept = sum(sizes[cut:])
+        for start in starts:
+            if kept <= config.max_history_bytes:
+                break
+            if start > cut:
+                kept -= sum(sizes[cut:start])
+                cut = start
+    return cut
+
+
+def compact(
+    events: Sequence[Event], summary: str, config: CompactionConfig, sizes: Optional[Sequence[int]] = None
+) -> Tuple[int, str]:
+    """
+    Fold the events that fall outside the kept window into the summary.
+
+    Returns:
+        tuple: (number of leading events folded, updated summary). The summary is
+        unchanged when nothing is folded.
+    """
+    cut = plan_compaction(events, config, sizes)
+    if not cut:
+        return 0, summary
+    starts = [position for position, event in enumerate(events[:cut]) if is_turn_start(event)]
+    # Events before the first user message (e.g. a state update) have no turn of their own
+    bounds = list(zip(starts, starts[1:] + [cut]))
+    lines: List[str] = summary.splitlines() if summary else []
+    lines += [summarize_turn(events[start:end], config.max_line_chars) for start, end in bounds]
+    return cut, "\n".join(line for line in lines[-config.max_summary_lines:] if line)
+
+
+def summary_of(state: Dict[str, Any]) -> str:
+    value = state.get(CONVERSATION_SUMMARY_KEY)
+    return value if isinstance(value, str) else ""
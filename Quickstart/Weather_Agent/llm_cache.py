@@ -0,0 +1,305 @@
+"""
+On-disk cache of model responses for the weather agents.
+
+Many turns are identical: "Hello", "Bye" or "weather in London" at the start
+of a session send the model the same instruction, tool schemas and contents
+every time, and each one pays a full model round-trip. LlmResponseCache sits
+on the agents' before_model_callback and after_model_callback: the request is
+reduced to a canonical hash (model, generation config including the system
+instruction and the tool declarations, and the contents), a hit returns the
+stored LlmResponse instead of calling the model, and a miss stores the
+model's response when it arrives.
+
+The key is a 16-byte BLAKE2b digest of the request serialized as JSON with
+sorted keys. Function call ids, which ADK generates afresh for every call, are
+left out, as are the http options and labels that do not change the answer.
+
+Responses computed from live data are never cached: a model call is bypassed
+(neither looked up nor stored) when the current turn already carries the
+result of a tool that is not in `allow_tools`, either as a function response
+or in the "For context:" transcript ADK hands an agent of what the other
+agents did. transfer_to_agent is always allowed; the weather agents add the
+tools whose results are fixed text (say_hello, say_goodbye). So for "weather
+in London" the first call, which decides to call get_weather, is cached, and
+the answer written from the weather report is not.
+
+Entries live in a SQLite table, one row per key with the response as
+zlib-compressed JSON, and are evicted least recently used beyond
+`max_entries` and dropped once older than `ttl_seconds`. Hits, misses,
+bypasses and the model time the hits saved (the latency of the original call,
+recorded with the entry) are kept in stats() and prometheus_text().
+
+The cache is opt-in: load_llm_cache() returns None unless WEATHER_LLM_CACHE
+names the database file.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Iterable, Optional, Set, Tuple
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+LLM_CACHE_PATH = os.getenv("WEATHER_LLM_CACHE", "")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("WEATHER_LLM_CACHE_TTL_SECONDS", str(24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_LLM_CACHE_MAX_ENTRIES", "10000"))
+
+# Tools whose results never depend on live data
+ALWAYS_CACHEABLE_TOOLS = frozenset({"transfer_to_agent"})
+# Config fields that do not change the response
+IGNORED_CONFIG_FIELDS = {"http_options", "labels", "should_return_http_response"}
+# How ADK shows other agents' events to the current agent (see google.adk.flows.llm_flows.context)
+OTHER_AGENT_CONTEXT = "For context:"
+OTHER_AGENT_TOOL_RESULT = re.compile(r"`([^`]+)` tool returned result:")
+# Requests waiting for their response; entries of calls that failed are dropped oldest first
+MAX_PENDING = 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key BLOB PRIMARY KEY,
+    response BLOB NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    latency_seconds REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+def _strip_call_ids(content: dict) -> dict:
+    for part in content.get("parts") or []:
+        for field in ("function_call", "function_response"):
+            if field in part:
+                part[field].pop("id", None)
+    return content
+
+
+def request_key(llm_request: LlmRequest) -> bytes:
+    """16-byte digest of everything in the request that decides the response."""
+    config = llm_request.config.model_dump(mode="json", exclude_none=True, exclude=IGNORED_CONFIG_FIELDS)
+    canonical = {
+        "model": llm_request.model,
+        "config": config,
+        "contents": [
+            _strip_call_ids(content.model_dump(mode="json", exclude_none=True)) for content in llm_request.contents
+        ],
+    }
+    text = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def _is_user_message(content: types.Content) -> bool:
+    """A message typed by the user, not a function response or another agent's transcript."""
+    if content.role != "user":
+        return False
+    texts = [part.text for part in content.parts or [] if part.text]
+    return bool(texts) and not texts[0].startswith(OTHER_AGENT_CONTEXT)
+
+
+def current_turn_tools(contents: Iterable[types.Content]) -> Set[str]:
+    """Names of the tools whose results the request carries since the user's last message."""
+    contents = list(contents)
+    start = next((position for position in range(len(contents) - 1, -1, -1) if _is_user_message(contents[position])), 0)
+    tools = set()
+    for content in contents[start:]:
+        for part in content.parts or []:
+            if part.function_response is not None:
+                tools.add(part.function_response.name)
+            elif part.text and content.role == "user":
+                tools.update(OTHER_AGENT_TOOL_RESULT.findall(part.text))
+    return tools
+
+
+class LlmResponseCache:
+    """
+    LRU/TTL cache of model responses in a SQLite file.
+
+    Args:
+        path (str): Database file; ":memory:" keeps the cache in memory
+        ttl_seconds (float): Age after which an entry is no longer used
+        max_entries (int): Entries kept; the least recently used are evicted beyond it
+        allow_tools (iterable): Tools whose results are static, so calls made
+            after them may be cached (transfer_to_agent is always allowed)
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        allow_tools: Iterable[str] = (),
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.allow_tools = ALWAYS_CACHEABLE_TOOLS | frozenset(allow_tools)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._entries = self._conn.execute("SELECT count(*) FROM responses").fetchone()[0]
+        self._pending: "OrderedDict[Tuple[str, str], Tuple[bytes, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get(self, key: bytes) -> Optional[Tuple[LlmResponse, float]]:
+        """The stored response and the latency of the call that produced it, or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created, latency_seconds FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._entries -= 1
+                self.evictions += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        return LlmResponse.model_validate_json(zlib.decompress(row[0])), row[2]
+
+    def put(self, key: bytes, response: LlmResponse, latency_seconds: float) -> None:
+        # Token usage belongs to the call that was paid for, not to the hits; call ids are given out per call
+        stored = response.model_dump(mode="json", exclude_none=True, exclude={"usage_metadata"})
+        if "content" in stored:
+            _strip_call_ids(stored["content"])
+        data = zlib.compress(json.dumps(stored, separators=(",", ":"), ensure_ascii=False).encode())
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, last_used, latency_seconds)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, data, now, now, latency_seconds),
+            )
+            self.stores += 1
+            self._entries += 0 if exists else 1
+            if self._entries > self.max_entries:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        expired = self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)).rowcount
+        excess = max(0, self._entries - expired - self.max_entries)
+        if excess:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)", (excess,)
+            )
+        self._entries -= expired + excess
+        self.evictions += expired + excess
+
+    def is_cacheable(self, llm_request: LlmRequest) -> bool:
+        """False when the current turn carries results of tools that read live data."""
+        return current_turn_tools(llm_request.contents) <= self.allow_tools
+
+    def before_model(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        """before_model_callback: return the cached response, or remember the request to store its response."""
+        if not self.is_cacheable(llm_request):
+            self.bypassed += 1
+            return None
+        try:
+            key = request_key(llm_request)
+        except (TypeError, ValueError):
+            self.bypassed += 1
+            return None
+        cached = self.get(key)
+        if cached is not None:
+            response, latency_seconds = cached
+            self.hits += 1
+            self.saved_seconds += latency_seconds
+            response.custom_metadata = {**(response.custom_metadata or {}), "llm_cache_hit": True}
+            return response
+        self.misses += 1
+        pending_id = (callback_context.invocation_id, callback_context.agent_name)
+        self._pending[pending_id] = (key, time.perf_counter())
+        while len(self._pending) > MAX_PENDING:
+            self._pending.popitem(last=False)
+        return None
+
+    def after_model(self, callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        """after_model_callback: store the response to a request before_model missed."""
+        if llm_response.partial:
+            return None
+        pending = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if pending is None or llm_response.error_code or not llm_response.content:
+            return None
+        key, start = pending
+        self.put(key, llm_response, time.perf_counter() - start)
+        return None
+
+    def attach(self, agent: LlmAgent) -> LlmAgent:
+        """Install the cache callbacks on an agent and its sub-agents, after any callbacks they already have."""
+        for attribute, callback in (("before_model_callback", self.before_model), ("after_model_callback", self.after_model)):
+            existing = getattr(agent, attribute)
+            if existing is None:
+                setattr(agent, attribute, callback)
+            else:
+                callbacks = list(existing) if isinstance(existing, list) else [existing]
+                if callback not in callbacks:
+                    setattr(agent, attribute, callbacks + [callback])
+        for sub_agent in agent.sub_agents:
+            if isinstance(sub_agent, LlmAgent):
+                self.attach(sub_agent)
+        return agent
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        with self._lock:
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            "entries": self._entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed_live_data": self.bypassed,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "latency_saved_seconds": round(self.saved_seconds, 3),
+            "database_bytes": page_count * page_size,
+        }
+
+    def prometheus_text(self) -> str:
+        """Return the cache counters in the Prometheus text format."""
+        stats = self.stats()
+        lines = []
+        for name, kind, value, help_text in (
+            ("weather_llm_cache_hits_total", "counter", stats["hits"], "Model calls answered from the cache."),
+            ("weather_llm_cache_misses_total", "counter", stats["misses"], "Cacheable model calls not in the cache."),
+            ("weather_llm_cache_bypassed_total", "counter", stats["bypassed_live_data"],
+             "Model calls not cached because the turn carries live tool results."),
+            ("weather_llm_cache_evictions_total", "counter", stats["evictions"], "Entries evicted or expired."),
+            ("weather_llm_cache_latency_saved_seconds_total", "counter", stats["latency_saved_seconds"],
+             "Model latency the cache hits saved."),
+            ("weather_llm_cache_hit_rate", "gauge", stats["hit_rate"], "Hits over cacheable model calls."),
+            ("weather_llm_cache_entries", "gauge", stats["entries"], "Responses in the cache."),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def load_llm_cache(allow_tools: Iterable[str] = ()) -> Optional[LlmResponseCache]:
+    """The cache at WEATHER_LLM_CACHE, or None when the variable is not set."""
+    path = os.getenv("WEATHER_LLM_CACHE", LLM_CACHE_PATH)
+    return LlmResponseCache(path, allow_tools=allow_tools) if path else None
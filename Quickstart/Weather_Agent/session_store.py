@@ -0,0 +1,424 @@
+"""
+Persistent session service for the weather agents, on SQLite in WAL mode.
+
+SqliteSessionService is a drop-in replacement for InMemorySessionService
+that survives restarts. ADK ships its own SqliteSessionService; this one is
+laid out for the way the agents write:
+
+- state is stored one row per key (session, user: and app: scopes in their own
+  tables), so an event that changes one key writes one row, and a key set to
+  the value it already has writes nothing
+- events are appended under a per-session sequence number with the JSON
+  payload in one column; an append is one transaction of a few primary-key
+  writes, on one long-lived connection with synchronous=NORMAL
+- event history is only read when asked for: get_state() and update_state()
+  never touch the events table, and get_session() loads the most recent
+  `max_events` events (all of them by default, as the Runner needs the
+  history to build the prompt), or whatever GetSessionConfig asks for
+
+With `compaction` set, each new turn first folds the turns outside the
+configured window into a summary in state and deletes their events (see
+compaction.py), so the history the model sees and the database stay bounded.
+
+State changes from outside a run go through update_state(), which appends a
+state-only event the same way a tool's tool_context.state change does, so it
+is recorded in the history and picked up by the next get_session().
+
+The database path comes from WEATHER_SESSION_DB (default weather_sessions.db
+next to this file). Calls are synchronous sqlite3 calls on the event loop;
+each is a handful of indexed writes, well under a millisecond.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from google.adk.errors import StaleSessionError
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.errors.session_not_found_error import SessionNotFoundError
+from google.adk.events import Event, EventActions
+from google.adk.sessions import BaseSessionService, Session, State
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from pydantic_core import to_jsonable_python
+
+from compaction import CONVERSATION_SUMMARY_KEY, CompactionConfig, compact, is_turn_start, summary_of
+
+SESSION_DB = os.getenv(
+    "WEATHER_SESSION_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "weather_sessions.db")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    create_time REAL NOT NULL,
+    update_time REAL NOT NULL,
+    event_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (app_name, user_id, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS session_state (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_state (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS app_state (
+    app_name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (app_name, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS events (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    event_data TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id, seq)
+) WITHOUT ROWID;
+"""
+
+# "WHERE value IS NOT excluded.value" leaves a row, and its page, untouched when the value is unchanged
+_UPSERT_STATE = {
+    "session": (
+        "INSERT INTO session_state (app_name, user_id, session_id, key, value) VALUES (?, ?, ?, ?, ?)"
+        " ON CONFLICT (app_name, user_id, session_id, key) DO UPDATE SET value = excluded.value"
+        " WHERE value IS NOT excluded.value"
+    ),
+    "user": (
+        "INSERT INTO user_state (app_name, user_id, key, value) VALUES (?, ?, ?, ?)"
+        " ON CONFLICT (app_name, user_id, key) DO UPDATE SET value = excluded.value"
+        " WHERE value IS NOT excluded.value"
+    ),
+    "app": (
+        "INSERT INTO app_state (app_name, key, value) VALUES (?, ?, ?)"
+        " ON CONFLICT (app_name, key) DO UPDATE SET value = excluded.value"
+        " WHERE value IS NOT excluded.value"
+    ),
+}
+
+
+def split_state(state: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+    """
+    Split a state dict or delta by scope and JSON-encode each value.
+
+    Returns:
+        dict: {"session": {...}, "user": {...}, "app": {...}} with the user: and
+        app: prefixes removed; temp: keys are dropped, as they are never persisted.
+    """
+    scopes: Dict[str, Dict[str, str]] = {"session": {}, "user": {}, "app": {}}
+    for key, value in state.items():
+        if key.startswith(State.TEMP_PREFIX):
+            continue
+        if key.startswith(State.APP_PREFIX):
+            scope, key = "app", key[len(State.APP_PREFIX):]
+        elif key.startswith(State.USER_PREFIX):
+            scope, key = "user", key[len(State.USER_PREFIX):]
+        else:
+            scope = "session"
+        scopes[scope][key] = json.dumps(to_jsonable_python(value))
+    return scopes
+
+
+class SqliteSessionService(BaseSessionService):
+    """
+    Session service on one SQLite database in WAL mode.
+
+    Args:
+        db_path (str): Database file, created if missing; ":memory:" for a throwaway store
+        max_events (int, optional): Most recent events get_session() loads when no
+            GetSessionConfig is given; None loads the whole history
+        compaction (CompactionConfig, optional): Compact each session's history
+            when a new turn starts; None keeps the whole history
+    """
+
+    def __init__(
+        self,
+        db_path: str = SESSION_DB,
+        max_events: Optional[int] = None,
+        compaction: Optional[CompactionConfig] = None,
+    ):
+        self.db_path = db_path
+        self.max_events = max_events
+        self.compaction = compaction
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL with synchronous=NORMAL only fsyncs at checkpoints; a power loss can drop the last commits, never corrupt
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, statements: Iterable[Tuple[str, tuple]]) -> None:
+        """Run statements in one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @staticmethod
+    def _state_writes(app_name: str, user_id: str, session_id: str, state: Dict[str, Any]) -> List[Tuple[str, tuple]]:
+        scopes = split_state(state)
+        writes = [(_UPSERT_STATE["session"], (app_name, user_id, session_id, key, value))
+                  for key, value in scopes["session"].items()]
+        writes += [(_UPSERT_STATE["user"], (app_name, user_id, key, value)) for key, value in scopes["user"].items()]
+        writes += [(_UPSERT_STATE["app"], (app_name, key, value)) for key, value in scopes["app"].items()]
+        return writes
+
+    def _read_state(self, app_name: str, user_id: str, session_id: str) -> Dict[str, Any]:
+        """Merged session, user: and app: state of a session. Callers hold the lock."""
+        state = {
+            key: json.loads(value)
+            for key, value in self._conn.execute(
+                "SELECT key, value FROM session_state WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                (app_name, user_id, session_id),
+            )
+        }
+        for key, value in self._conn.execute(
+            "SELECT key, value FROM app_state WHERE app_name = ?", (app_name,)
+        ):
+            state[State.APP_PREFIX + key] = json.loads(value)
+        for key, value in self._conn.execute(
+            "SELECT key, value FROM user_state WHERE app_name = ? AND user_id = ?", (app_name, user_id)
+        ):
+            state[State.USER_PREFIX + key] = json.loads(value)
+        return state
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = (session_id or "").strip() or uuid.uuid4().hex
+        now = time.time()
+        writes = [(
+            "INSERT INTO sessions (app_name, user_id, id, create_time, update_time) VALUES (?, ?, ?, ?, ?)",
+            (app_name, user_id, session_id, now, now),
+        )]
+        writes += self._state_writes(app_name, user_id, session_id, state or {})
+        try:
+            self._write(writes)
+        except sqlite3.IntegrityError:
+            raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+        with self._lock:
+            merged_state = self._read_state(app_name, user_id, session_id)
+        return Session(
+            app_name=app_name, user_id=user_id, id=session_id, state=merged_state, events=[], last_update_time=now
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        limit = self.max_events if config is None else config.num_recent_events
+        after = config.after_timestamp if config is not None else None
+        query = "SELECT event_data FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+        params: List[Any] = [app_name, user_id, session_id]
+        if after:
+            query += " AND timestamp >= ?"
+            params.append(after)
+        query += " ORDER BY seq DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                (app_name, user_id, session_id),
+            ).fetchone()
+            if row is None:
+                return None
+            state = self._read_state(app_name, user_id, session_id)
+            event_rows = [] if limit == 0 else self._conn.execute(query, params).fetchall()
+        events = [Event.model_validate_json(event_data) for (event_data,) in reversed(event_rows)]
+        return Session(
+            app_name=app_name, user_id=user_id, id=session_id, state=state, events=events, last_update_time=row[0]
+        )
+
+    async def get_state(self, *, app_name: str, user_id: str, session_id: str) -> Optional[Dict[str, Any]]:
+        """The merged state of a session without loading its events, or None if there is no such session."""
+        session = await self.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=GetSessionConfig(num_recent_events=0)
+        )
+        return None if session is None else session.state
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        query = "SELECT user_id, id, update_time FROM sessions WHERE app_name = ?"
+        params: List[Any] = [app_name]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        query += " ORDER BY update_time, user_id, id"
+        with self._lock:
+            sessions = [
+                Session(
+                    app_name=app_name,
+                    user_id=row_user_id,
+                    id=session_id,
+                    state=self._read_state(app_name, row_user_id, session_id),
+                    events=[],
+                    last_update_time=update_time,
+                )
+                for row_user_id, session_id, update_time in self._conn.execute(query, params).fetchall()
+            ]
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        self._write([
+            ("DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", key),
+            ("DELETE FROM session_state WHERE app_name = ? AND user_id = ? AND session_id = ?", key),
+            ("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key),
+        ])
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                key: json.loads(value)
+                for key, value in self._conn.execute(
+                    "SELECT key, value FROM user_state WHERE app_name = ? AND user_id = ?", (app_name, user_id)
+                )
+            }
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        # temp: keys are visible for the rest of the invocation but never stored
+        self._apply_temp_state(session, event)
+        event = self._trim_temp_delta_state(event)
+        app_name, user_id, session_id = session.app_name, session.user_id, session.id
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                # Claims the next sequence number and rejects a session object that is older than the stored one
+                row = self._conn.execute(
+                    "UPDATE sessions SET update_time = ?, event_count = event_count + 1"
+                    " WHERE app_name = ? AND user_id = ? AND id = ? AND update_time <= ?"
+                    " RETURNING event_count",
+                    (event.timestamp, app_name, user_id, session_id, session.last_update_time),
+                ).fetchone()
+                if row is None:
+                    exists = self._conn.execute(
+                        "SELECT 1 FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                        (app_name, user_id, session_id),
+                    ).fetchone()
+                    if exists is None:
+                        raise SessionNotFoundError(f"Session {session_id} not found.")
+                    raise StaleSessionError(
+                        f"Session {session_id} was updated after this copy was loaded; get_session() it again."
+                    )
+                self._conn.execute(
+                    "INSERT INTO events (app_name, user_id, session_id, seq, timestamp, event_data)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (app_name, user_id, session_id, row[0], event.timestamp, event.model_dump_json(exclude_none=True)),
+                )
+                if event.actions and event.actions.state_delta:
+                    for sql, params in self._state_writes(app_name, user_id, session_id, event.actions.state_delta):
+                        self._conn.execute(sql, params)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+        session.last_update_time = event.timestamp
+        event = self._commit_event_to_session(session, event)
+        if self.compaction is not None and is_turn_start(event):
+            self._compact(session)
+        return event
+
+    def _compact(self, session: Session) -> None:
+        """Fold the turns outside the compaction window into the summary and delete their events."""
+        key = (session.app_name, session.user_id, session.id)
+        with self._lock:
+            sizes = [
+                size
+                for (size,) in self._conn.execute(
+                    "SELECT length(CAST(event_data AS BLOB)) FROM events"
+                    " WHERE app_name = ? AND user_id = ? AND session_id = ? ORDER BY seq DESC LIMIT ?",
+                    (*key, len(session.events)),
+                )
+            ][::-1]
+        cut, summary = compact(
+            session.events,
+            summary_of(session.state),
+            self.compaction,
+            sizes if len(sizes) == len(session.events) else None,
+        )
+        if not cut:
+            return
+        # session.events is the newest stretch of the stored events, so everything before its kept tail goes
+        kept = len(session.events) - cut
+        writes = [(
+            "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?"
+            " AND seq <= (SELECT event_count FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?) - ?",
+            (*key, *key, kept),
+        )]
+        writes += self._state_writes(*key, {CONVERSATION_SUMMARY_KEY: summary})
+        self._write(writes)
+        del session.events[:cut]
+        session.state[CONVERSATION_SUMMARY_KEY] = summary
+
+    async def update_state(
+        self, *, app_name: str, user_id: str, session_id: str, state_delta: Dict[str, Any], author: str = "system"
+    ) -> Dict[str, Any]:
+        """
+        Change session state from outside an agent run.
+
+        Appends an event that carries only `state_delta`, so the change is
+        persisted, recorded in the history and seen by the next run.
+
+        Args:
+            app_name (str): App the session belongs to
+            user_id (str): User the session belongs to
+            session_id (str): Session to update
+            state_delta (dict): Keys to set; user: and app: prefixes update the shared scopes
+            author (str): Author recorded on the event
+
+        Returns:
+            dict: The session's merged state after the update.
+        """
+        session = await self.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=GetSessionConfig(num_recent_events=0)
+        )
+        if session is None:
+            raise SessionNotFoundError(f"Session {session_id} not found.")
+        event = Event(
+            invocation_id=f"state_update_{uuid.uuid4().hex}",
+            author=author,
+            actions=EventActions(state_delta=dict(state_delta)),
+            timestamp=max(time.time(), session.last_update_time),
+        )
+        await self.append_event(session, event)
+        return session.state
@@ -0,0 +1,553 @@
+"""
+City index and pluggable weather backends for the weather agents.
+
+The city dataset is loaded once per process into a CityIndex:
+
+- every city name and alias is normalized (case, diacritics, punctuation and
+  abbreviations such as "St." -> "saint") and mapped to a city id in one dict.
+  Names whose lower-case spelling differs from their key ("são paulo",
+  "st. louis") also get that spelling mapped to the key, so a lookup of a
+  name as written, in any case and with "_" for spaces, is a lower() and one
+  or two dict probes; only other spellings pay for a (cached) normalization
+- per-city fields live in flat arrays (UTF-8 names in one buffer, float32
+  coordinates, uint32 populations, two-byte country codes, timezone ids)
+  instead of one object per city
+- a sorted copy of the keys is built on the first miss and used for prefix
+  suggestions ("Did you mean ...")
+
+By default the small table bundled in data/cities.csv is loaded. Point
+WEATHER_CITY_DATASET at a GeoNames dump (cities500.txt, cities1000.txt, ...,
+optionally gzipped) or at a CSV with the bundled columns to load a full
+dataset instead.
+
+A WeatherProvider turns a resolved city into current conditions. Subclasses
+implement fetch(); StaticWeatherProvider serves a fixed table, like the mock
+databases the agents used before. Results are cached per resolved city for
+WEATHER_CACHE_TTL_SECONDS in a WeatherCache shared by every session in the
+process, and concurrent requests for the same city wait for a single fetch.
+Conditions are cached in Celsius; unit conversion is up to the caller.
+"""
+
+import bisect
+import csv
+import functools
+import gzip
+import io
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+BUNDLED_DATASET = os.path.join(DATA_DIR, "cities.csv")
+CITY_DATASET = os.getenv("WEATHER_CITY_DATASET", BUNDLED_DATASET)
+
+# GeoNames alternate names are kept only if they normalize to plain latin text, at most this many per city
+MAX_ALIASES_PER_CITY = 8
+SUGGESTION_LIMIT = 5
+# Matching keys examined per suggestion request before ranking them by population
+SUGGESTION_SCAN_LIMIT = 200
+NORMALIZE_CACHE_SIZE = 65536
+
+WEATHER_CACHE_TTL_SECONDS = float(os.getenv("WEATHER_CACHE_TTL_SECONDS", "300"))
+# Cities the backend has no data for are retried sooner
+WEATHER_CACHE_NEGATIVE_TTL_SECONDS = 60
+WEATHER_CACHE_MAX_ENTRIES = 10000
+
+# Abbreviations expanded token by token, so "St. Louis" and "Saint Louis" share a key
+TOKEN_ALIASES = {
+    "st": "saint",
+    "ste": "sainte",
+    "mt": "mount",
+    "ft": "fort",
+    "pt": "port",
+}
+
+_ALIAS_TOKENS = frozenset(TOKEN_ALIASES)
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_PLAIN_KEY = re.compile(r"[0-9a-z ]+")
+_NO_COUNTRY = b"  "
+
+
+class City(NamedTuple):
+    id: int
+    name: str
+    country: str
+    latitude: float
+    longitude: float
+    population: int
+    timezone: str
+
+
+def _plain_spelling(name: str) -> str:
+    """Lower-case a name and turn underscores into spaces; the cheap first try of a lookup."""
+    return name.lower().replace("_", " ")
+
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_city(name: str) -> str:
+    """
+    Normalize a city name for lookup.
+
+    Strips diacritics, case and punctuation and expands common abbreviations:
+    "São Paulo", "sao_paulo" and "SAO-PAULO" all become "sao paulo".
+    """
+    folded = name.casefold()
+    if not folded.isascii():
+        folded = "".join(char for char in unicodedata.normalize("NFKD", folded) if not unicodedata.combining(char))
+    tokens = _NON_ALNUM.sub(" ", folded).split()
+    if _ALIAS_TOKENS.isdisjoint(tokens):
+        return " ".join(tokens)
+    return " ".join(TOKEN_ALIASES.get(token, token) for token in tokens)
+
+
+class CityIndex:
+    """
+    Compact, read-mostly index of a city dataset.
+
+    Cities are added with add() and get consecutive ids. When several cities
+    share a name, the most populous one answers plain lookups; the others are
+    reachable with a country qualifier ("London, CA").
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        # lower-cased name or alias -> its key, only where the two differ
+        self._plain_keys: Dict[str, str] = {}
+        # key -> ids of less populous cities with the same key, only for the few keys that collide
+        self._collisions: Dict[str, List[int]] = {}
+        self._name_bytes = bytearray()
+        self._name_offsets = array("I", [0])
+        self._countries = bytearray()
+        self._latitudes = array("f")
+        self._longitudes = array("f")
+        self._populations = array("I")
+        self._timezone_ids = array("H")
+        self._timezones: List[str] = []
+        self._timezone_lookup: Dict[str, int] = {}
+        self._sorted_keys: Optional[List[str]] = None
+        self._sorted_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._name_offsets) - 1
+
+    def add(
+        self,
+        name: str,
+        country: str = "",
+        latitude: float = 0.0,
+        longitude: float = 0.0,
+        population: int = 0,
+        timezone: str = "",
+        aliases: Iterable[str] = (),
+    ) -> int:
+        """Add a city and its aliases. Returns the new city id."""
+        city_id = len(self)
+        self._name_bytes += name.encode("utf-8")
+        self._name_offsets.append(len(self._name_bytes))
+        self._countries += (country.upper().encode("ascii", "replace") + b"  ")[:2]
+        self._latitudes.append(latitude)
+        self._longitudes.append(longitude)
+        self._populations.append(max(0, min(int(population), 2**32 - 1)))
+        timezone_id = self._timezone_lookup.get(timezone)
+        if timezone_id is None:
+            timezone_id = self._timezone_lookup[timezone] = len(self._timezones)
+            self._timezones.append(timezone)
+        self._timezone_ids.append(timezone_id)
+
+        keys = set()
+        for alias in (name, *aliases):
+            key = normalize_city(alias)
+            if not key:
+                continue
+            keys.add(key)
+            plain = _plain_spelling(alias)
+            if plain != key:
+                self._plain_keys.setdefault(plain, key)
+        for key in keys:
+            self._add_key(key, city_id)
+        self._sorted_keys = None
+        return city_id
+
+    def _add_key(self, key: str, city_id: int) -> None:
+        current = self._ids.get(key)
+        if current is None:
+            self._ids[key] = city_id
+            return
+        population = self._populations[city_id]
+        if population > self._populations[current]:
+            self._ids[key] = city_id
+            city_id = current
+        self._collisions.setdefault(key, []).append(city_id)
+
+    def name(self, city_id: int) -> str:
+        return self._name_bytes[self._name_offsets[city_id]:self._name_offsets[city_id + 1]].decode("utf-8")
+
+    def city(self, city_id: int) -> City:
+        country = self._countries[2 * city_id:2 * city_id + 2]
+        return City(
+            id=city_id,
+            name=self.name(city_id),
+            country="" if country == _NO_COUNTRY else country.decode("ascii").strip(),
+            latitude=self._latitudes[city_id],
+            longitude=self._longitudes[city_id],
+            population=self._populations[city_id],
+            timezone=self._timezones[self._timezone_ids[city_id]],
+        )
+
+    def lookup_id(self, query: str) -> Optional[int]:
+        """Resolve a city name, alias or "name, country code" to a city id, or None."""
+        # Most queries are names as written, differing from their key or plain spelling only in case
+        plain = _plain_spelling(query)
+        city_id = self._ids.get(plain)
+        if city_id is None:
+            key = self._plain_keys.get(plain)
+            city_id = self._ids.get(key if key is not None else normalize_city(query))
+        if city_id is not None or "," not in query:
+            return city_id
+        name, _, qualifier = query.rpartition(",")
+        key = normalize_city(name)
+        best = self._ids.get(key)
+        if best is None:
+            return None
+        country = qualifier.strip().upper().encode("ascii", "replace")
+        for candidate in (best, *self._collisions.get(key, ())):
+            if self._countries[2 * candidate:2 * candidate + 2] == country:
+                return candidate
+        return None
+
+    def lookup(self, query: str) -> Optional[City]:
+        city_id = self.lookup_id(query)
+        return None if city_id is None else self.city(city_id)
+
+    def lookup_ids(self, queries: List[str]) -> List[Optional[int]]:
+        """Resolve many names in one pass; a name repeated in the list is only resolved once."""
+        resolved: Dict[str, Optional[int]] = {}
+        for query in queries:
+            if query not in resolved:
+                resolved[query] = self.lookup_id(query)
+        return [resolved[query] for query in queries]
+
+    def _sorted(self) -> List[str]:
+        with self._sorted_lock:
+            if self._sorted_keys is None:
+                self._sorted_keys = sorted(self._ids)
+            return self._sorted_keys
+
+    def suggest(self, query: str, limit: int = SUGGESTION_LIMIT) -> List[str]:
+        """
+        Names of the most populous cities whose name or alias starts with the query.
+
+        If nothing starts with the full query, the query is shortened one
+        character at a time, so small typos at the end still get suggestions.
+        """
+        prefix = normalize_city(query.split(",")[0])
+        keys = self._sorted()
+        while prefix:
+            start = bisect.bisect_left(keys, prefix)
+            candidates = set()
+            for key in keys[start:start + SUGGESTION_SCAN_LIMIT]:
+                if not key.startswith(prefix):
+                    break
+                candidates.add(self._ids[key])
+            if candidates:
+                ranked = sorted(candidates, key=lambda city_id: -self._populations[city_id])
+                return list(dict.fromkeys(self.name(city_id) for city_id in ranked))[:limit]
+            prefix = prefix[:-1].rstrip()
+        return []
+
+    def memory_usage(self) -> dict:
+        """
+        Approximate bytes held by the index, in total and per city.
+
+        Counts the key dict, the key strings, the city id ints, the collision
+        lists and the per-city arrays; the sorted suggestion list is counted
+        once it has been built.
+        """
+        id_objects = {id(value): value for value in self._ids.values()}
+        breakdown = {
+            "key_dict": sys.getsizeof(self._ids) + sys.getsizeof(self._collisions),
+            "key_strings": sum(sys.getsizeof(key) for key in self._ids),
+            "plain_spellings": sys.getsizeof(self._plain_keys) + sum(sys.getsizeof(plain) for plain in self._plain_keys),
+            "id_ints": sum(sys.getsizeof(value) for value in id_objects.values()),
+            "collisions": sum(sys.getsizeof(ids) for ids in self._collisions.values()),
+            "arrays": sum(
+                sys.getsizeof(column)
+                for column in (
+                    self._name_bytes, self._name_offsets, self._countries, self._latitudes, self._longitudes,
+                    self._populations, self._timezone_ids,
+                )
+            ),
+            "suggestion_keys": sys.getsizeof(self._sorted_keys) if self._sorted_keys is not None else 0,
+        }
+        total = sum(breakdown.values())
+        return {
+            "cities": len(self),
+            "keys": len(self._ids),
+            "total_bytes": total,
+            "bytes_per_city": round(total / len(self), 1) if len(self) else 0.0,
+            "breakdown": breakdown,
+        }
+
+
+def _open_text(path: str) -> io.TextIOBase:
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def _latin_aliases(names: Iterable[str]) -> Iterator[str]:
+    """Yield alternate names that are written in latin script, at most MAX_ALIASES_PER_CITY."""
+    count = 0
+    for name in names:
+        if count >= MAX_ALIASES_PER_CITY:
+            return
+        key = normalize_city(name)
+        if key and _PLAIN_KEY.fullmatch(key):
+            count += 1
+            yield name
+
+
+def load_csv(index: CityIndex, path: str) -> CityIndex:
+    """Load a CSV with name, country, latitude, longitude, population, timezone and |-separated aliases."""
+    with _open_text(path) as f:
+        for row in csv.DictReader(f):
+            index.add(
+                name=row["name"],
+                country=row.get("country", ""),
+                latitude=float(row.get("latitude") or 0.0),
+                longitude=float(row.get("longitude") or 0.0),
+                population=int(row.get("population") or 0),
+                timezone=row.get("timezone", ""),
+                aliases=[alias for alias in (row.get("aliases") or "").split("|") if alias],
+            )
+    return index
+
+
+def load_geonames(index: CityIndex, path: str) -> CityIndex:
+    """Load a GeoNames cities dump (tab-separated, 19 columns, no header)."""
+    with _open_text(path) as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 18:
+                continue
+            alternate_names = fields[3].split(",") if fields[3] else ()
+            index.add(
+                name=fields[1],
+                country=fields[8],
+                latitude=float(fields[4] or 0.0),
+                longitude=float(fields[5] or 0.0),
+                population=int(fields[14] or 0),
+                timezone=fields[17],
+                aliases=[fields[2], *_latin_aliases(alternate_names)],
+            )
+    return index
+
+
+_indexes: Dict[str, CityIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def load_city_index(path: str = CITY_DATASET) -> CityIndex:
+    """Load a city dataset once per process; later calls with the same path return the same index."""
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            loader = load_csv if path.endswith((".csv", ".csv.gz")) else load_geonames
+            index = _indexes[path] = loader(CityIndex(), path)
+        return index
+
+
+class _Flight:
+    """One in-progress fetch that concurrent callers for the same key wait on."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class WeatherCache:
+    """
+    Thread-safe LRU cache with a TTL and single-flight fetches.
+
+    When a key is missing, the first caller fetches it and every concurrent
+    caller for the same key waits for that fetch instead of starting its own.
+    A fetch that raises is not cached; its waiters get the same exception.
+
+    Args:
+        ttl (float): Seconds a fetched value is served from the cache, 0 to disable caching
+        negative_ttl (float): Seconds a None result (no data) is cached
+        max_entries (int): Least recently used keys are evicted beyond this
+        clock (Callable): Monotonic time source
+    """
+
+    def __init__(
+        self,
+        ttl: float = WEATHER_CACHE_TTL_SECONDS,
+        negative_ttl: float = WEATHER_CACHE_NEGATIVE_TTL_SECONDS,
+        max_entries: int = WEATHER_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = min(negative_ttl, ttl)
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, object]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], object]):
+        """Return the cached value of key, or fetch it (once, however many callers ask concurrently)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                ttl = self.ttl if flight.result is not None else self.negative_ttl
+                if flight.error is None and ttl > 0:
+                    self._entries[key] = (self.clock() + ttl, flight.result)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.result
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or every key when none is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+class WeatherProvider:
+    """
+    Base class for weather backends.
+
+    Subclasses implement fetch(), which returns the current conditions of a
+    resolved city as {"temperature_celsius": float, "condition": str}, or None
+    if the backend has no data for it. get_weather() only calls fetch() on a
+    cache miss.
+
+    Args:
+        cities (CityIndex): The index used to resolve city names
+        cache (WeatherCache, optional): Cache of fetch() results keyed by city id.
+            Defaults to a new WeatherCache with WEATHER_CACHE_TTL_SECONDS.
+    """
+
+    def __init__(self, cities: CityIndex, cache: Optional[WeatherCache] = None):
+        self.cities = cities
+        self.cache = cache if cache is not None else WeatherCache()
+
+    def fetch(self, city: City) -> Optional[dict]:
+        raise NotImplementedError
+
+    def get_weather(self, query: str) -> dict:
+        """
+        Resolve a city name and fetch its current conditions.
+
+        Returns:
+            dict: On success, "status" "success" plus the canonical "city" name,
+            "temperature_celsius" and "condition". Otherwise "status" "error" and
+            a "reason": "unknown_city" (with "suggestions") or "no_data" (with "city").
+        """
+        return self.get_weather_batch([query])[0]
+
+    def get_weather_batch(self, queries: List[str]) -> List[dict]:
+        """
+        get_weather for many cities at once, one result per query in the same order.
+
+        All names are resolved in one pass, and a city asked for several times
+        (under any spelling) is fetched or read from the cache only once.
+        """
+        city_ids = self.cities.lookup_ids(queries)
+        weather_by_id = {
+            city_id: self.cache.get_or_fetch(city_id, lambda city_id=city_id: self.fetch(self.cities.city(city_id)))
+            for city_id in dict.fromkeys(city_ids)
+            if city_id is not None
+        }
+        results = []
+        for query, city_id in zip(queries, city_ids):
+            if city_id is None:
+                results.append({"status": "error", "reason": "unknown_city", "suggestions": self.cities.suggest(query)})
+            elif weather_by_id[city_id] is None:
+                results.append({"status": "error", "reason": "no_data", "city": self.cities.name(city_id)})
+            else:
+                results.append({"status": "success", "city": self.cities.name(city_id), **weather_by_id[city_id]})
+        return results
+
+
+class StaticWeatherProvider(WeatherProvider):
+    """
+    Serves a fixed table of conditions, keyed by city name.
+
+    Args:
+        cities (CityIndex): The index used to resolve city names
+        observations (Dict[str, Tuple[float, str]]): City name -> (temperature in °C, condition)
+        cache (WeatherCache, optional): See WeatherProvider
+    """
+
+    def __init__(
+        self,
+        cities: CityIndex,
+        observations: Dict[str, Tuple[float, str]],
+        cache: Optional[WeatherCache] = None,
+    ):
+        super().__init__(cities, cache)
+        self._observations: Dict[int, dict] = {}
+        for name, (temperature_celsius, condition) in observations.items():
+            city_id = cities.lookup_id(name)
+            if city_id is None:
+                city_id = cities.add(name)
+            self._observations[city_id] = {"temperature_celsius": temperature_celsius, "condition": condition}
+
+    def fetch(self, city: City) -> Optional[dict]:
+        return self._observations.get(city.id)
@@ -1,7 +1,10 @@
-import datetime
-from zoneinfo import ZoneInfo
 from google.adk.agents import Agent
 
+from .timezones import load_timezone_index
+
+# City/alias -> IANA zone index, built once per process
+timezone_index = load_timezone_index()
+
 def get_weather(city: str) -> dict:
     """Retrieves the current weather report for a specified city.
 
@@ -26,6 +29,17 @@ def get_weather(city: str) -> dict:
         }
 
 
+def _time_report(city: str, formatted_time) -> dict:
+    if formatted_time is None:
+        return {
+            "status": "error",
+            "error_message": (
+                f"Sorry, I don't have timezone information for {city}."
+            ),
+        }
+    return {"status": "success", "report": f"The current time in {city} is {formatted_time}"}
+
+
 def get_current_time(city: str) -> dict:
     """Returns the current time in a specified city.
 
@@ -35,23 +49,51 @@ def get_current_time(city: str) -> dict:
     Returns:
         dict: status and result or error msg.
     """
+    return _time_report(city, timezone_index.format_current_times([city])[0])
 
-    if city.lower() == "new york":
-        tz_identifier = "America/New_York"
-    else:
-        return {
-            "status": "error",
-            "error_message": (
-                f"Sorry, I don't have timezone information for {city}."
-            ),
-        }
 
-    tz = ZoneInfo(tz_identifier)
-    now = datetime.datetime.now(tz)
-    report = (
-        f'The current time in {city} is {now.strftime("%Y-%m-%d %H:%M:%S %Z%z")}'
-    )
-    return {"status": "success", "report": report}
+def _batch_status(results: list) -> str:
+    return "success" if any(result["status"] == "success" for result in results) else "error"
+
+
+def get_weather_batch(cities: list[str]) -> dict:
+    """Retrieves the current weather reports for several cities in one call.
+
+    Use it instead of calling get_weather once per city whenever the user asks
+    about more than one city.
+
+    Args:
+        cities (list[str]): The names of the cities, e.g. ["London", "Tokyo", "New York"].
+
+    Returns:
+        dict: status ("success" if any city has a report) and a "results" list
+        with one entry per city, in order, holding the city and its status and
+        report or error msg.
+    """
+    # Each distinct spelling is looked up once, however often it is repeated
+    reports = {city: get_weather(city) for city in dict.fromkeys(cities)}
+    results = [{"city": city, **reports[city]} for city in cities]
+    return {"status": _batch_status(results), "results": results}
+
+
+def get_current_time_batch(cities: list[str]) -> dict:
+    """Returns the current time in several cities in one call.
+
+    Use it instead of calling get_current_time once per city whenever the user
+    asks about more than one city.
+
+    Args:
+        cities (list[str]): The names of the cities, e.g. ["London", "Tokyo", "New York"].
+
+    Returns:
+        dict: status ("success" if any city has a time) and a "results" list
+        with one entry per city, in order, holding the city and its status and
+        report or error msg.
+    """
+    # The clock is read once, so every city reports the same instant
+    formatted_times = timezone_index.format_current_times(cities)
+    results = [{"city": city, **_time_report(city, formatted)} for city, formatted in zip(cities, formatted_times)]
+    return {"status": _batch_status(results), "results": results}
 
 
 root_agent = Agent(
@@ -62,6 +104,8 @@ root_agent = Agent(
     ),
     instruction=(
         "You are a helpful agent who can answer user questions about the time and weather in a city."
+        " When a question is about more than one city, call get_weather_batch or get_current_time_batch"
+        " ONCE with all of the cities instead of calling get_weather or get_current_time for each city."
     ),
-    tools=[get_weather, get_current_time],
+    tools=[get_weather, get_current_time, get_weather_batch, get_current_time_batch],
 )
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""
+Benchmark the city -> timezone index behind get_current_time.
+
+Reports the cold build time of the bundled index (tz database scan included),
+then lookup throughput for the names users type, against building a new
+ZoneInfo per call the way the tool used to, and the cost per city of
+formatting current times one call per city versus one batch call. A second
+index of synthetic cities (default 50,000, or a real dataset) shows lookups
+stay flat as the index grows.
+
+Usage:
+    python Quickstart/multi_tool_agent/benchmarks/bench_timezones.py
+    python Quickstart/multi_tool_agent/benchmarks/bench_timezones.py --dataset cities15000.txt
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import time
+from zoneinfo import ZoneInfo, available_timezones
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from timezones import (  # noqa: E402
+    BUNDLED_DATASET,
+    TIME_FORMAT,
+    TimezoneIndex,
+    build_timezone_index,
+    normalize_name,
+)
+
+SYLLABLES = [
+    "ka", "lo", "san", "ber", "mé", "ri", "to", "vil", "ståd", "no", "gü", "ra", "del", "por", "ia", "ze",
+    "mar", "ho", "lin", "ås", "ter", "bu", "qua", "sé", "wen", "dor", "fi", "gra", "ny", "pol", "ek", "sur",
+]
+
+
+def synthetic_index(count: int, seed: int) -> TimezoneIndex:
+    rng = random.Random(seed)
+    zones = sorted(available_timezones())
+    index = TimezoneIndex()
+    for _ in range(count):
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))).capitalize()
+        index.add(rng.choice(zones), (name,))
+    index.add_zones(zones)
+    return index
+
+
+def cold_build_seconds(path: str) -> float:
+    normalize_name.cache_clear()
+    ZoneInfo.clear_cache()
+    start = time.perf_counter()
+    build_timezone_index(path)
+    return time.perf_counter() - start
+
+
+def per_call_ns(func, queries) -> float:
+    start = time.perf_counter_ns()
+    for query in queries:
+        func(query)
+    return round((time.perf_counter_ns() - start) / len(queries), 1)
+
+
+def spellings(rng: random.Random, names, count: int):
+    """Names spelled the way users do: different case, underscores for spaces."""
+    return [
+        rng.choice((str.lower, str.upper, str.title))(rng.choice(names)).replace(" ", rng.choice((" ", "_")))
+        for _ in range(count)
+    ]
+
+
+def bench_index(index: TimezoneIndex, names, queries: int, rng: random.Random) -> dict:
+    spelled = spellings(rng, names, queries)
+    normalize_name.cache_clear()
+    distinct_ns = per_call_ns(index.lookup_zone, spelled)
+    repeated = spelled[:1000] * (len(spelled) // 1000 or 1)
+    per_call_ns(index.lookup_zone, repeated)
+    repeated_ns = per_call_ns(index.lookup_zone, repeated)
+    hits = sum(index.lookup_zone(query) is not None for query in spelled[:10000])
+    return {
+        "names": len(index),
+        "zones": index.zone_count,
+        "lookup_ns_distinct_names": distinct_ns,
+        "lookup_ns_repeated_names": repeated_ns,
+        "lookups_per_second": round(1e9 / repeated_ns) if repeated_ns else None,
+        "hit_rate_sample": round(hits / min(len(spelled), 10000), 4),
+    }
+
+
+def bench_formatting(index: TimezoneIndex, names, batch: int, rounds: int, rng: random.Random) -> dict:
+    cities = [rng.choice(names) for _ in range(batch)]
+    zones = [index.lookup_zone(city) for city in cities]
+
+    def uncached_per_city():
+        # What get_current_time did before: a ZoneInfo lookup and a clock read per city
+        for zone in zones:
+            datetime.datetime.now(ZoneInfo(zone)).strftime(TIME_FORMAT)
+
+    def indexed_per_city():
+        for city in cities:
+            index.format_current_times([city])
+
+    def indexed_batch():
+        index.format_current_times(cities)
+
+    results = {"cities_per_call": batch, "distinct_zones": len(set(zones))}
+    for label, func in (
+        ("zoneinfo_per_city_ns", uncached_per_city),
+        ("indexed_per_city_ns", indexed_per_city),
+        ("indexed_batch_ns", indexed_batch),
+    ):
+        func()
+        start = time.perf_counter_ns()
+        for _ in range(rounds):
+            func()
+        results[label] = round((time.perf_counter_ns() - start) / (rounds * batch), 1)
+    return results
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark the multi_tool_agent timezone index.")
+    parser.add_argument("--cities", type=int, default=50_000, help="Synthetic cities in the large index (default: 50000)")
+    parser.add_argument("--dataset", default="", help="Build the large index from this GeoNames or CSV dataset instead")
+    parser.add_argument("--queries", type=int, default=100_000, help="Lookups per measurement (default: 100000)")
+    parser.add_argument("--batch", type=int, default=200, help="Cities per formatting call (default: 200)")
+    parser.add_argument("--rounds", type=int, default=50, help="Formatting calls per measurement (default: 50)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
+    build_seconds = cold_build_seconds(BUNDLED_DATASET)
+    bundled = build_timezone_index(BUNDLED_DATASET)
+    bundled_names = list(bundled._zones)
+
+    start = time.perf_counter()
+    large = build_timezone_index(args.dataset) if args.dataset else synthetic_index(args.cities, args.seed)
+    large_build_seconds = time.perf_counter() - start
+
+    results = {
+        "bundled": {
+            "cold_build_seconds": round(build_seconds, 4),
+            **bench_index(bundled, bundled_names, args.queries, rng),
+        },
+        "large": {
+            "build_seconds": round(large_build_seconds, 3),
+            **bench_index(large, list(large._zones), args.queries, rng),
+        },
+        "formatting": bench_formatting(bundled, bundled_names, args.batch, args.rounds, rng),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
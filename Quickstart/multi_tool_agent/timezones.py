@@ -0,0 +1,240 @@
+"""
+City -> IANA timezone resolution for the time tools.
+
+A TimezoneIndex is built once per process from two sources:
+
+- the bundled city table in data/cities.csv, which covers cities that are not
+  zone names ("Delhi" -> Asia/Kolkata), their aliases and "name, country
+  code" spellings
+- zoneinfo.available_timezones(), which names every zone after a city
+  ("America/New_York" -> "new york") and also answers full zone names such as
+  "Europe/Paris" or "UTC"
+
+Every name is normalized (case, diacritics, underscores and punctuation) and
+mapped to its zone in one dict, so a lookup is one dict probe on the
+lower-cased query and, if that misses, a cached normalization and a second
+probe. ZoneInfo objects are created once per zone and reused.
+
+Point TIMEZONE_CITY_DATASET at a GeoNames dump (cities500.txt,
+cities15000.txt, ..., optionally gzipped) or at a CSV with the bundled columns
+to resolve more cities.
+"""
+
+import csv
+import datetime
+import functools
+import gzip
+import io
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo, available_timezones
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+BUNDLED_DATASET = os.path.join(DATA_DIR, "cities.csv")
+CITY_DATASET = os.getenv("TIMEZONE_CITY_DATASET", BUNDLED_DATASET)
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S %Z%z"
+NORMALIZE_CACHE_SIZE = 65536
+
+# Top-level areas of the tz database whose zones are named after a city
+CITY_AREAS = frozenset({
+    "Africa", "America", "Antarctica", "Asia", "Atlantic", "Australia", "Europe", "Indian", "Pacific",
+})
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_name(name: str) -> str:
+    """
+    Normalize a city or zone name for lookup.
+
+    "São Paulo", "sao_paulo" and "America/Sao_Paulo" become "sao paulo" and
+    "america sao paulo".
+    """
+    folded = name.casefold()
+    if not folded.isascii():
+        folded = "".join(char for char in unicodedata.normalize("NFKD", folded) if not unicodedata.combining(char))
+    return " ".join(_NON_ALNUM.sub(" ", folded).split())
+
+
+class TimezoneIndex:
+    """
+    Read-mostly map from city names, aliases and zone names to IANA zones.
+
+    Names are added with add(); the first zone added for a name keeps it, so
+    datasets are loaded most populous city first and before the zone-derived
+    names.
+    """
+
+    def __init__(self):
+        self._zones: Dict[str, str] = {}
+        # One string per zone, shared by every name that maps to it
+        self._zone_names: Dict[str, str] = {}
+        self._tzinfos: Dict[str, ZoneInfo] = {}
+        self._tzinfos_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._zones)
+
+    @property
+    def zone_count(self) -> int:
+        return len(self._zone_names)
+
+    def add(self, zone: str, names: Iterable[str]) -> None:
+        """Map each of `names` to `zone`, unless the name already has a zone."""
+        zone = self._zone_names.setdefault(zone, zone)
+        for name in names:
+            key = normalize_name(name)
+            if key:
+                self._zones.setdefault(key, zone)
+
+    def add_zones(self, zones: Iterable[str]) -> None:
+        """Add tz database zones under their full name and, for city zones, their city."""
+        for zone in sorted(zones):
+            area, _, location = zone.partition("/")
+            if area in CITY_AREAS and location:
+                # "America/Argentina/Buenos_Aires" -> "Buenos_Aires"
+                self.add(zone, (zone, location.rpartition("/")[2]))
+            else:
+                self.add(zone, (zone,))
+
+    def lookup_zone(self, city: str) -> Optional[str]:
+        """The IANA zone name for a city, alias, "name, country code" or zone name, or None."""
+        # Most queries are plain names that only differ from their key in case
+        zone = self._zones.get(city.lower())
+        if zone is None:
+            zone = self._zones.get(normalize_name(city))
+        return zone
+
+    def tzinfo(self, zone: str) -> ZoneInfo:
+        """The shared ZoneInfo for a zone name, created on first use."""
+        tz = self._tzinfos.get(zone)
+        if tz is None:
+            with self._tzinfos_lock:
+                tz = self._tzinfos.get(zone)
+                if tz is None:
+                    tz = self._tzinfos[zone] = ZoneInfo(zone)
+        return tz
+
+    def lookup(self, city: str) -> Optional[ZoneInfo]:
+        zone = self.lookup_zone(city)
+        return None if zone is None else self.tzinfo(zone)
+
+    def current_times(
+        self, cities: List[str], now: Optional[datetime.datetime] = None
+    ) -> List[Optional[datetime.datetime]]:
+        """
+        The local time in each city at one instant, or None for unknown cities.
+
+        Args:
+            cities (list[str]): City names, in any spelling lookup_zone accepts
+            now (datetime, optional): Timezone-aware instant, defaults to the current time
+
+        Returns:
+            list: One aware datetime or None per city, in order. The clock is
+            read once and each zone is converted once, however many cities
+            share it.
+        """
+        if now is None:
+            now = datetime.datetime.now(datetime.timezone.utc)
+        zones: Dict[str, Optional[str]] = {}
+        local: Dict[str, datetime.datetime] = {}
+        results = []
+        for city in cities:
+            if city not in zones:
+                zones[city] = self.lookup_zone(city)
+            zone = zones[city]
+            if zone is None:
+                results.append(None)
+                continue
+            if zone not in local:
+                local[zone] = now.astimezone(self.tzinfo(zone))
+            results.append(local[zone])
+        return results
+
+    def format_current_times(
+        self, cities: List[str], now: Optional[datetime.datetime] = None, fmt: str = TIME_FORMAT
+    ) -> List[Optional[str]]:
+        """current_times() formatted with `fmt`; each distinct local time is formatted once."""
+        formatted: Dict[int, str] = {}
+        results = []
+        for local in self.current_times(cities, now):
+            if local is None:
+                results.append(None)
+                continue
+            # Cities in the same zone share one datetime object
+            text = formatted.get(id(local))
+            if text is None:
+                text = formatted[id(local)] = local.strftime(fmt)
+            results.append(text)
+        return results
+
+
+def _open_text(path: str) -> io.TextIOBase:
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def _add_cities(index: TimezoneIndex, rows: List[tuple], zones: frozenset) -> TimezoneIndex:
+    """Add (population, zone, names) rows, most populous first, skipping zones the system does not know."""
+    rows.sort(key=lambda row: -row[0])
+    for _, zone, names in rows:
+        if zone in zones:
+            index.add(zone, names)
+    return index
+
+
+def load_csv(index: TimezoneIndex, path: str, zones: frozenset) -> TimezoneIndex:
+    """Load a CSV with name, country, population, timezone and |-separated aliases."""
+    rows = []
+    with _open_text(path) as f:
+        for row in csv.DictReader(f):
+            name, country = row["name"], row.get("country", "")
+            aliases = [alias for alias in (row.get("aliases") or "").split("|") if alias]
+            names = [name, *aliases]
+            if country:
+                names.append(f"{name}, {country}")
+            rows.append((int(row.get("population") or 0), row.get("timezone", ""), names))
+    return _add_cities(index, rows, zones)
+
+
+def load_geonames(index: TimezoneIndex, path: str, zones: frozenset) -> TimezoneIndex:
+    """Load a GeoNames cities dump (tab-separated, 19 columns, no header)."""
+    rows = []
+    with _open_text(path) as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 18:
+                continue
+            names = [fields[1], fields[2], f"{fields[1]}, {fields[8]}"]
+            rows.append((int(fields[14] or 0), fields[17], names))
+    return _add_cities(index, rows, zones)
+
+
+def build_timezone_index(path: str = CITY_DATASET) -> TimezoneIndex:
+    """Build an index from a city dataset plus every zone in the system tz database."""
+    zones = frozenset(available_timezones())
+    index = TimezoneIndex()
+    if path:
+        loader = load_csv if path.endswith((".csv", ".csv.gz")) else load_geonames
+        loader(index, path, zones)
+    index.add_zones(zones)
+    return index
+
+
+_indexes: Dict[str, TimezoneIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def load_timezone_index(path: str = CITY_DATASET) -> TimezoneIndex:
+    """Build the index for a dataset once per process; later calls with the same path return the same index."""
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = build_timezone_index(path)
+        return index